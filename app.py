@@ -1,19 +1,59 @@
 
 import streamlit as st
-import tempfile
+import hashlib
 import os
-import json
 from utils import (
     extract_text_from_pdf,
     extract_pattern_from_text,
     parse_syllabus_modules,
     calculate_topic_weights,
-    generate_question_paper
+    stream_question_paper,
+    routed_llm
 )
 
 # Page Config
 st.set_page_config(page_title="Smart Question Paper Generator", layout="wide")
 
+# --- Caching ---
+# Uploads are keyed by content hash: re-analyzing unchanged files reads no PDF and
+# calls no LLM. Arguments starting with "_" are not hashed by Streamlit.
+
+def file_digest(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def get_llm(task, api_key, temperature=0):
+    # One routed ChatGroq (with its fallbacks) per task and key, shared by all sessions
+    return routed_llm(task, api_key, temperature=temperature)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def pdf_text(digest, use_ocr, _data):
+    text = extract_text_from_pdf(_data, use_ocr_fallback=use_ocr)
+    if text.startswith("Error reading PDF"):
+        raise RuntimeError(text)  # not cached: the next click retries
+    return text
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def syllabus_modules(digest, use_ocr, _syllabus_text, _data, _api_key):
+    # Raises (not cached) when the local parse is unsure and the LLM parse failed,
+    # since the key is not part of the cache key
+    return parse_syllabus_modules(_syllabus_text, _api_key, pdf_file=_data, fallback=False,
+                                  llm=get_llm("syllabus_parse", _api_key) if _api_key else None)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def exam_pattern(digest, use_ocr, _pattern_text, _api_key):
+    pattern = extract_pattern_from_text(_pattern_text, _api_key, llm=get_llm("pattern", _api_key))
+    if pattern.startswith("Error"):
+        raise RuntimeError(pattern)  # not cached: the next click retries
+    return pattern
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def topic_weights(modules, pyq_digests, use_ocr, _pyq_files):
+    # Keyed by the modules, not the syllabus file: its fallback parse gives other modules.
+    # PYQ texts are combined here only: the session keeps just the resulting weights
+    pyq_text = "".join(pdf_text(d, use_ocr, f.getvalue()) + "\n" for d, f in zip(pyq_digests, _pyq_files))
+    return calculate_topic_weights(modules, pyq_text)
+
 st.title("📄 Smart Question Paper Generator")
 st.markdown("""
 Generate a university-standard question paper by analyzing:
@@ -32,6 +72,9 @@ if not api_key and "GROQ_API_KEY" in os.environ:
 if not api_key:
     st.sidebar.warning("Please enter your Groq API Key to proceed.")
 
+# Scanned papers have no text layer; only image-only pages are OCRed (needs Tesseract installed)
+use_ocr = st.sidebar.checkbox("OCR scanned pages", value=True)
+
 # --- SECTION 1: DATA UPLOAD ---
 st.header("1. Upload Documents")
 
@@ -63,52 +106,49 @@ if st.button("🔍 Analyze Inputs"):
         with st.spinner("Analyzing documents..."):
             try:
                 # 1. Parse Syllabus
-                syllabus_text = extract_text_from_pdf(syllabus_file)
-                
+                syllabus_digest = file_digest(syllabus_file)
+                syllabus_text = pdf_text(syllabus_digest, use_ocr, syllabus_file.getvalue())
+
                 # Debug: Show extracted text
                 with st.expander("Debug: Extracted Syllabus Text"):
                     st.text(syllabus_text[:2000] + "..." if len(syllabus_text) > 2000 else syllabus_text)
-                
-                modules = parse_syllabus_modules(syllabus_text, api_key)
-                
-                # 2. Parse PYQs
-                pyq_text = ""
-                for pyq in pyq_files:
-                    pyq_text += extract_text_from_pdf(pyq) + "\n"
-                    
+
+                try:
+                    modules = syllabus_modules(syllabus_digest, use_ocr, syllabus_text, syllabus_file.getvalue(),
+                                               api_key)
+                except RuntimeError as e:
+                    print(f"{e}; using the local parse for this run")
+                    modules = parse_syllabus_modules(syllabus_text, pdf_file=syllabus_file.getvalue())
+
+                # 2. PYQ frequency -> topic weights
+                pyq_digests = tuple(file_digest(pyq) for pyq in pyq_files)
+                weights = topic_weights(modules, pyq_digests, use_ocr, pyq_files) if modules else {}
+
                 # 3. Parse Pattern
-                pattern_text = extract_text_from_pdf(pattern_file)
-                extracted_pattern = extract_pattern_from_text(pattern_text, api_key)
-                
-                # 4. Calculate Weights
-                final_weights = {} # init
-                if modules:
-                    # Helper function calc
-                    # Need to implement the weight calculation inside utils or here
-                    # Using the imported function
-                    # But first we need the 'frequency' which happens inside calculate_topic_weights
-                    # So we pass syllabus modules and PYQ text to it
-                    
-                    # We might want to separate frequency count for display, but for now just get weights
-                    # Actually, we need to pass the modules dict to calculate_topic_weights
-                    pass 
-                
-                # Store in session state
+                pattern_digest = file_digest(pattern_file)
+                try:
+                    extracted_pattern = exam_pattern(pattern_digest, use_ocr,
+                                                     pdf_text(pattern_digest, use_ocr, pattern_file.getvalue()), api_key)
+                except RuntimeError as e:
+                    extracted_pattern = str(e)
+
+                # Only derived summaries live in the session; texts stay in the shared cache
                 st.session_state.extracted_data = {
-                    "syllabus_text": syllabus_text,
                     "modules": modules,
-                    "pyq_text": pyq_text,
+                    "weights": weights,
                     "pattern_desc": extracted_pattern,
-                    # We calc weights later or now? Let's do it now.
-                    "weights": calculate_topic_weights(modules, pyq_text)
+                    # All the generator reads of the syllabus
+                    "syllabus_snippet": syllabus_text[:10000],
+                    "pyq_papers": len(pyq_digests),
                 }
-                
+
                 st.success("Analysis Complete!")
-                
+
             except Exception as e:
                 st.error(f"An error occurred during analysis: {e}")
 
 # --- SECTION 3: VERIFICATION & GENERATION ---
+generate_clicked = False
 
 if "extracted_data" in st.session_state and st.session_state.extracted_data:
     data = st.session_state.extracted_data
@@ -130,30 +170,32 @@ if "extracted_data" in st.session_state and st.session_state.extracted_data:
             # Convert to list for display
             weight_list = [{"Topic": k, "Weight": f"{v:.2f}"} for k, v in weights.items()]
             st.table(weight_list)
+            st.caption(f"Frequency from {data['pyq_papers']} previous paper(s).")
         else:
             st.warning("No specific modules/hours detected in Syllabus. Using equal weights.")
             
     # --- SECTION 4: GENERATION ---
     st.header("3. Generate Question Paper")
     
-    if st.button("✨ Generate Paper"):
-        with st.spinner("Generating Question Paper using Groq..."):
-            final_paper = generate_question_paper(
-                pattern_description=pattern_input,
-                weighted_topics=data["weights"],
-                syllabus_text=data["syllabus_text"],
-                api_key=api_key
-            )
-            
-            st.session_state.final_paper = final_paper
-            st.success("Generation Successful!")
+    generate_clicked = st.button("✨ Generate Paper")
 
 # --- SECTION 5: OUTPUT ---
-if "final_paper" in st.session_state:
+if generate_clicked or "final_paper" in st.session_state:
     st.markdown("---")
     st.subheader("Generated Question Paper")
-    
-    st.markdown(st.session_state.final_paper)
+
+    if generate_clicked:
+        # Rendered token by token as Groq produces them
+        st.session_state.final_paper = st.write_stream(stream_question_paper(
+            pattern_description=pattern_input,
+            weighted_topics=data["weights"],
+            syllabus_text=data["syllabus_snippet"],
+            api_key=api_key,
+            llm=get_llm("generate", api_key, temperature=0.5)
+        ))
+        st.success("Generation Successful!")
+    else:
+        st.markdown(st.session_state.final_paper)
     
     st.download_button(
         label="📥 Download Markdown",
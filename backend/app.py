@@ -1,73 +1,129 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g, Response
 from flask_cors import CORS
+import io
 import os
-import tempfile
-from werkzeug.utils import secure_filename
 from services.analyzer import analyze_syllabus_and_pyqs, extract_text_from_pdf
 from services.generator import generate_paper_content
-from services.pdf_maker import create_pdf
+from services.pdf_cache import PdfRenderer
 from services.chat_agent import ChatAgent
+from services.syllabus_registry import SyllabusRegistry
+from services.pyq_index import PyqIndex
+from services.checkpoints import CheckpointStore, analysis_key
+from services import metrics
+from services.budget import Budget, budget_scope
+from services.speculative import DraftStore
+from services.warmup import WARMUP, start_warmup, warmup_status
+from services.request_inputs import is_enabled, remove_dir, request_dir, resolve_syllabus, save_uploads, write_upload
 
 chat_agent = ChatAgent()
+syllabus_registry = SyllabusRegistry()
+pyq_index = PyqIndex()
+checkpoint_store = CheckpointStore()
+draft_store = DraftStore()
+pdf_renderer = PdfRenderer(chat_agent)
 
 # --- CONFIGURATION ---
 # TODO: Replace with your actual Groq API Key
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") # Required for syllabus overrides
+SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "0").lower() in ("1", "true", "yes")
+SPECULATIVE_WAIT_SECONDS = float(os.getenv("SPECULATIVE_WAIT_SECONDS", 60))
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=["Server-Timing"])  # Enable CORS for all routes
+if WARMUP:
+    start_warmup()  # Heavy modules load in the background instead of on the first request
+
+@app.before_request
+def start_request_metrics():
+    g.request_metrics = metrics.start_request()
+
+@app.after_request
+def finish_request_metrics(response):
+    request_metrics = g.get('request_metrics')
+    if request_metrics is not None:
+        metrics.observe("qpg_http_request_seconds", request_metrics.elapsed(),
+                        endpoint=request.endpoint or "unknown", status=str(response.status_code))
+        if metrics.SERVER_TIMING:
+            response.headers["Server-Timing"] = metrics.server_timing_header(request_metrics)
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/warmup', methods=['GET', 'POST'])
+def warmup():
+    # Pinged by the frontend on page load so the first real request finds the modules loaded
+    start_warmup()
+    return jsonify(warmup_status())
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
+    upload_dir = request_dir()
+    run = None
     try:
         data = request.form
-        syllabus_text = data.get('syllabus_text')
         # Use provided key or fallback to hardcoded key
         api_key = data.get('api_key') or GROQ_API_KEY
+
+        # Known syllabus, layout-parsed syllabus PDF, or raw text to parse
+        try:
+            syllabus_text, syllabus_topics, syllabus_info, syllabus_bytes = resolve_syllabus(
+                data, request.files.get('syllabus_file'), syllabus_registry)
+        except LookupError as e:
+            return jsonify({"error": str(e)}), 404
+        if syllabus_bytes:
+            syllabus_text = extract_text_from_pdf(write_upload(upload_dir, request.files['syllabus_file'].filename,
+                                                               syllabus_bytes))
         
         if not syllabus_text or not api_key:
             return jsonify({"error": "Missing syllabus text or API key"}), 400
         
-        pyq_files = request.files.getlist('pyq_files')
-        reference_file = request.files.get('reference_file') # New input
-        
-        # Save PYQs temporarily
-        temp_pyq_paths = []
-        if pyq_files:
-            for file in pyq_files:
-                if file.filename:
-                    filename = secure_filename(file.filename)
-                    # Use abspath to avoid potential issues with relative paths or mixed slashes
-                    temp_path = os.path.abspath(os.path.join(tempfile.gettempdir(), filename))
-                    file.save(temp_path)
-                    temp_pyq_paths.append(temp_path)
+        # Save PYQs temporarily (private directory per request)
+        temp_pyq_paths = save_uploads(request.files.getlist('pyq_files'), upload_dir)
         
         # Handle Reference File
         reference_text = None
+        reference_file = request.files.get('reference_file') # New input
         if reference_file and reference_file.filename:
-            filename = secure_filename(reference_file.filename)
-            ref_path = os.path.abspath(os.path.join(tempfile.gettempdir(), filename))
-            reference_file.save(ref_path)
-            try:
-                reference_text = extract_text_from_pdf(ref_path)
-            finally:
-                if os.path.exists(ref_path):
-                    os.remove(ref_path)
-
-        # Analyze
-        result = analyze_syllabus_and_pyqs(syllabus_text, temp_pyq_paths, api_key, reference_text)
-        
-        # Cleanup temp files
-        for path in temp_pyq_paths:
-            try:
-                if os.path.exists(path):
-                    os.remove(path)
-            except:
-                pass
+            reference_text = extract_text_from_pdf(write_upload(upload_dir, "reference_" + reference_file.filename,
+                                                                reference_file.read()))
+
+        # Analyze (bounded by the request budget; partial results are flagged).
+        # Classifications are checkpointed per upload set: a retry resumes where this one stops
+        run = checkpoint_store.open(analysis_key(syllabus_text, temp_pyq_paths, data.get('analysis_id')))
+        budget = Budget.from_request(data.get('max_calls'), data.get('max_tokens'), data.get('deadline_seconds'))
+        with budget_scope(budget):
+            result = analyze_syllabus_and_pyqs(syllabus_text, temp_pyq_paths, api_key, reference_text, syllabus_topics,
+                                               registry=syllabus_registry, syllabus_info=syllabus_info,
+                                               pyq_index=pyq_index, checkpoint=run,
+                                               include_indexed=is_enabled(data.get('include_indexed')))
+
+        # Speculatively draft the paper for the defaults while the user reviews them
+        if is_enabled(data.get('speculative'), SPECULATIVE_GENERATION) and not result.get("budget_exhausted"):
+            result["draft_id"] = draft_store.start(api_key, result["default_allocation"], result["paper_pattern"],
+                                                   result["priority_scores"], result.get("section_allocation"))
                 
         return jsonify(result)
 
     except Exception as e:
+        if run is not None:
+            run.fail(e)
+            return jsonify({"error": str(e), "analysis_id": run.analysis_id, "progress": run.progress()}), 500
         return jsonify({"error": str(e)}), 500
+    finally:
+        if run is not None:
+            checkpoint_store.close(run)
+        # Cleanup temp files
+        remove_dir(upload_dir)
+
+@app.route('/api/analyze/<analysis_id>', methods=['GET'])
+def analysis_progress(analysis_id):
+    # Partial frequency table of a running, failed or finished analysis
+    progress = checkpoint_store.progress(analysis_id)
+    if not progress:
+        return jsonify({"error": "Unknown analysis"}), 404
+    return jsonify(progress)
 
 @app.route('/api/generate', methods=['POST'])
 def generate():
@@ -78,14 +134,28 @@ def generate():
         # New optional params
         paper_pattern = data.get('paper_pattern')
         priority_scores = data.get('priority_scores')
+        section_allocation = data.get('section_allocation')
         
         if not api_key:
             return jsonify({"error": "Missing API key"}), 400
             
+        # Sections unchanged since the speculative draft are reused, edited ones regenerated
+        section_cache = None
+        if data.get('draft_id'):
+            section_cache = draft_store.take(data['draft_id'], SPECULATIVE_WAIT_SECONDS)
+
         # Generate Text Content
-        paper_text = generate_paper_content(allocation, api_key, paper_pattern, priority_scores)
+        budget = Budget.from_request(data.get('max_calls'), data.get('max_tokens'), data.get('deadline_seconds'))
+        with budget_scope(budget):
+            paper_text = generate_paper_content(allocation, api_key, paper_pattern, priority_scores, section_allocation,
+                                                section_cache=section_cache)
         
-        return jsonify({"paper_text": paper_text})
+        # Warm the PDF cache (and the refined header) before the user clicks download
+        if data.get('prerender') and not budget.exhausted:
+            pdf_renderer.prerender(paper_text, data.get('college_name', 'COLLEGE OF ENGINEERING'),
+                                   data.get('header_text_raw'), GROQ_API_KEY)
+        
+        return jsonify({"paper_text": paper_text, "budget_exhausted": budget.exhausted})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -96,51 +166,19 @@ def download_pdf():
         data = request.json
         text_content = data.get('text_content')
         college_name = data.get('college_name', 'COLLEGE OF ENGINEERING') # Default if empty
-        college_name = data.get('college_name', 'COLLEGE OF ENGINEERING') # Default if empty
         header_image_data = data.get('header_image') # Base64 string
         header_text_raw = data.get('header_text_raw') # New input
         
         if not text_content:
             return jsonify({"error": "No content provided"}), 400
             
-        # Refine Header if provided
-        polished_header = None
-        if header_text_raw:
-            # Use the ChatAgent to perfect the header
-             # We need a key for this agent interaction. Use global or from request.
-            api_key = GROQ_API_KEY 
-            polished_header = chat_agent.refine_header_text(header_text_raw, api_key)
-
-        # Handle Header Image
-        temp_img_path = None
-        if header_image_data:
-            import base64
-            try:
-                # Remove header if present (e.g., "data:image/png;base64,")
-                if "," in header_image_data:
-                    header_image_data = header_image_data.split(",")[1]
-                
-                img_bytes = base64.b64decode(header_image_data)
-                temp_img_path = os.path.join(tempfile.gettempdir(), "header_logo.png")
-                with open(temp_img_path, "wb") as f:
-                    f.write(img_bytes)
-            except Exception as e:
-                print(f"Error decoding image: {e}")
-                temp_img_path = None
-
-        pdf_bytes = create_pdf(text_content, college_name, header_image_path=temp_img_path, header_text=polished_header)
-        
-        # Cleanup Image
-        if temp_img_path and os.path.exists(temp_img_path):
-            os.remove(temp_img_path)
-        
-        # Save to temp file to send
-        temp_pdf_path = os.path.join(tempfile.gettempdir(), "generated_paper.pdf")
-        with open(temp_pdf_path, "wb") as f:
-            f.write(pdf_bytes)
+        # Cached by text/header/college/image; the header is refined by the ChatAgent
+        # at most once per distinct raw header (using the server key)
+        pdf_bytes = pdf_renderer.render(text_content, college_name, header_text_raw, header_image_data, GROQ_API_KEY)
             
+        # Stream from memory: nothing shared on disk between concurrent downloads
         return send_file(
-            temp_pdf_path,
+            io.BytesIO(pdf_bytes),
             as_attachment=True,
             download_name="question_paper.pdf",
             mimetype="application/pdf"
@@ -160,12 +198,45 @@ def chat():
         if not api_key or not message:
             return jsonify({"error": "Missing API key or message"}), 400
             
-        response = chat_agent.process_message(message, context, api_key)
+        with budget_scope(Budget.from_request(data.get('max_calls'), data.get('max_tokens'), data.get('deadline_seconds'))):
+            response = chat_agent.process_message(message, context, api_key)
         return jsonify(response)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/syllabi', methods=['GET'])
+def list_syllabi():
+    return jsonify({"syllabi": syllabus_registry.list_known()})
+
+@app.route('/api/syllabi/<course_code>', methods=['GET'])
+def get_syllabus(course_code):
+    version = request.args.get('version')
+    if version is not None and not version.isdigit():
+        return jsonify({"error": "version must be a positive integer"}), 400
+    entry = syllabus_registry.lookup(course_code=course_code, version=version)
+    if not entry:
+        return jsonify({"error": "Unknown syllabus"}), 404
+    return jsonify(entry)
+
+@app.route('/api/syllabi/<course_code>/override', methods=['PUT', 'DELETE'])
+def override_syllabus(course_code):
+    try:
+        if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return jsonify({"error": "Admin token required"}), 403
+
+        if request.method == 'DELETE':
+            return jsonify({"cleared": syllabus_registry.clear_override(course_code)})
+
+        topics = (request.json or {}).get('topics')
+        if not isinstance(topics, dict) or not topics:
+            return jsonify({"error": "Provide topics as {topic: hours}"}), 400
+        topics = {str(k): int(v) for k, v in topics.items()}
+        return jsonify(syllabus_registry.set_override(course_code, topics))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
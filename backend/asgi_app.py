@@ -0,0 +1,266 @@
+"""
+Async (ASGI) serving mode for the backend, alongside the Flask app in app.py.
+
+Same /api/analyze, /api/generate, /api/download-pdf, /api/chat and /api/syllabi
+contract, but backed by the async service functions: while a request waits on Groq
+it does not hold a worker, so one process serves many concurrent in-flight LLM calls
+(bounded per request by LLM_CONCURRENCY). CPU-heavy PDF work (text extraction, rendering)
+runs in a process pool of PDF_WORKERS processes.
+
+Run from backend/:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from quart import Quart, Response, g, jsonify, request
+from quart_cors import cors
+from services.analyzer import analyze_syllabus_and_pyqs_async, extract_text_from_pdf
+from services.generator import generate_paper_content_async
+from services.pdf_cache import PdfRenderer
+from services.chat_agent import ChatAgent
+from services.syllabus_registry import SyllabusRegistry
+from services.pyq_index import PyqIndex
+from services.checkpoints import CheckpointStore, analysis_key
+from services import metrics
+from services.budget import Budget, budget_scope
+from services.speculative import DraftStore
+from services.warmup import WARMUP, start_warmup, warmup_status
+from services.request_inputs import is_enabled, remove_dir, request_dir, resolve_syllabus, save_uploads, write_upload
+
+chat_agent = ChatAgent()
+syllabus_registry = SyllabusRegistry()
+pyq_index = PyqIndex()
+checkpoint_store = CheckpointStore()
+draft_store = DraftStore()
+pdf_renderer = PdfRenderer(chat_agent)
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Required for syllabus overrides
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "0").lower() in ("1", "true", "yes")
+SPECULATIVE_WAIT_SECONDS = float(os.getenv("SPECULATIVE_WAIT_SECONDS", 60))
+
+app = cors(Quart(__name__), allow_origin="*", expose_headers=["Server-Timing"])
+pdf_pool = None
+
+
+@app.before_serving
+async def start_pdf_pool():
+    global pdf_pool
+    pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    if WARMUP:
+        start_warmup()
+
+
+@app.after_serving
+async def stop_pdf_pool():
+    pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def in_pdf_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(pdf_pool, func, *args)
+
+
+@app.before_request
+async def start_request_metrics():
+    g.request_metrics = metrics.start_request()
+
+
+@app.after_request
+async def finish_request_metrics(response):
+    request_metrics = g.get('request_metrics')
+    if request_metrics is not None:
+        metrics.observe("qpg_http_request_seconds", request_metrics.elapsed(),
+                        endpoint=request.endpoint or "unknown", status=str(response.status_code))
+        if metrics.SERVER_TIMING:
+            response.headers["Server-Timing"] = metrics.server_timing_header(request_metrics)
+    return response
+
+
+def request_budget(data):
+    return Budget.from_request(data.get('max_calls'), data.get('max_tokens'), data.get('deadline_seconds'))
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/api/warmup', methods=['GET', 'POST'])
+async def warmup():
+    start_warmup()
+    return jsonify(warmup_status())
+
+
+@app.route('/api/analyze', methods=['POST'])
+async def analyze():
+    upload_dir = request_dir()
+    run = None
+    try:
+        data = await request.form
+        files = await request.files
+        api_key = data.get('api_key') or GROQ_API_KEY
+
+        try:
+            syllabus_text, syllabus_topics, syllabus_info, syllabus_bytes = resolve_syllabus(
+                data, files.get('syllabus_file'), syllabus_registry)
+        except LookupError as e:
+            return jsonify({"error": str(e)}), 404
+        if syllabus_bytes:
+            syllabus_text = await in_pdf_pool(extract_text_from_pdf,
+                                              write_upload(upload_dir, files['syllabus_file'].filename, syllabus_bytes))
+
+        if not syllabus_text or not api_key:
+            return jsonify({"error": "Missing syllabus text or API key"}), 400
+
+        temp_pyq_paths = save_uploads(files.getlist('pyq_files'), upload_dir)
+        reference_text = None
+        reference_file = files.get('reference_file')
+        if reference_file and reference_file.filename:
+            reference_text = await in_pdf_pool(extract_text_from_pdf,
+                                               write_upload(upload_dir, "reference_" + reference_file.filename,
+                                                            reference_file.read()))
+
+        run = checkpoint_store.open(analysis_key(syllabus_text, temp_pyq_paths, data.get('analysis_id')))
+        budget = request_budget(data)
+        with budget_scope(budget):
+            result = await analyze_syllabus_and_pyqs_async(syllabus_text, temp_pyq_paths, api_key, reference_text,
+                                                           syllabus_topics, registry=syllabus_registry,
+                                                           syllabus_info=syllabus_info, pyq_index=pyq_index,
+                                                           pdf_executor=pdf_pool, checkpoint=run,
+                                                           include_indexed=is_enabled(data.get('include_indexed')))
+
+        if is_enabled(data.get('speculative'), SPECULATIVE_GENERATION) and not result.get("budget_exhausted"):
+            result["draft_id"] = draft_store.start(api_key, result["default_allocation"], result["paper_pattern"],
+                                                   result["priority_scores"], result.get("section_allocation"))
+
+        return jsonify(result)
+
+    except Exception as e:
+        if run is not None:
+            run.fail(e)
+            return jsonify({"error": str(e), "analysis_id": run.analysis_id, "progress": run.progress()}), 500
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if run is not None:
+            checkpoint_store.close(run)
+        remove_dir(upload_dir)
+
+
+@app.route('/api/analyze/<analysis_id>', methods=['GET'])
+async def analysis_progress(analysis_id):
+    progress = checkpoint_store.progress(analysis_id)
+    if not progress:
+        return jsonify({"error": "Unknown analysis"}), 404
+    return jsonify(progress)
+
+
+@app.route('/api/generate', methods=['POST'])
+async def generate():
+    try:
+        data = await request.get_json()
+        api_key = data.get('api_key') or GROQ_API_KEY
+        if not api_key:
+            return jsonify({"error": "Missing API key"}), 400
+
+        section_cache = None
+        if data.get('draft_id'):
+            section_cache = await asyncio.to_thread(draft_store.take, data['draft_id'], SPECULATIVE_WAIT_SECONDS)
+
+        budget = request_budget(data)
+        with budget_scope(budget):
+            paper_text = await generate_paper_content_async(data.get('allocation'), api_key, data.get('paper_pattern'),
+                                                            data.get('priority_scores'),
+                                                            data.get('section_allocation'),
+                                                            section_cache=section_cache)
+
+        if data.get('prerender') and not budget.exhausted:
+            pdf_renderer.prerender(paper_text, data.get('college_name', 'COLLEGE OF ENGINEERING'),
+                                   data.get('header_text_raw'), GROQ_API_KEY)
+
+        return jsonify({"paper_text": paper_text, "budget_exhausted": budget.exhausted})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/download-pdf', methods=['POST'])
+async def download_pdf():
+    try:
+        data = await request.get_json()
+        text_content = data.get('text_content')
+        college_name = data.get('college_name', 'COLLEGE OF ENGINEERING')
+        header_image_data = data.get('header_image')
+        header_text_raw = data.get('header_text_raw')
+
+        if not text_content:
+            return jsonify({"error": "No content provided"}), 400
+
+        pdf_bytes = await pdf_renderer.render_async(text_content, college_name, header_text_raw, header_image_data,
+                                                    GROQ_API_KEY, executor=pdf_pool)
+
+        return Response(pdf_bytes, mimetype="application/pdf",
+                        headers={"Content-Disposition": 'attachment; filename="question_paper.pdf"'})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/chat', methods=['POST'])
+async def chat():
+    try:
+        data = await request.get_json()
+        api_key = data.get('api_key') or GROQ_API_KEY
+        message = data.get('message')
+        context = data.get('context', {})
+
+        if not api_key or not message:
+            return jsonify({"error": "Missing API key or message"}), 400
+
+        with budget_scope(request_budget(data)):
+            response = await chat_agent.process_message_async(message, context, api_key)
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/syllabi', methods=['GET'])
+async def list_syllabi():
+    return jsonify({"syllabi": syllabus_registry.list_known()})
+
+
+@app.route('/api/syllabi/<course_code>', methods=['GET'])
+async def get_syllabus(course_code):
+    version = request.args.get('version')
+    if version is not None and not version.isdigit():
+        return jsonify({"error": "version must be a positive integer"}), 400
+    entry = syllabus_registry.lookup(course_code=course_code, version=version)
+    if not entry:
+        return jsonify({"error": "Unknown syllabus"}), 404
+    return jsonify(entry)
+
+
+@app.route('/api/syllabi/<course_code>/override', methods=['PUT', 'DELETE'])
+async def override_syllabus(course_code):
+    try:
+        if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return jsonify({"error": "Admin token required"}), 403
+
+        if request.method == 'DELETE':
+            return jsonify({"cleared": syllabus_registry.clear_override(course_code)})
+
+        topics = ((await request.get_json(silent=True)) or {}).get('topics')
+        if not isinstance(topics, dict) or not topics:
+            return jsonify({"error": "Provide topics as {topic: hours}"}), 400
+        topics = {str(k): int(v) for k, v in topics.items()}
+        return jsonify(syllabus_registry.set_override(course_code, topics))
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get("PORT", 5000))
+    app.run(host="0.0.0.0", port=port)
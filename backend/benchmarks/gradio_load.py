@@ -0,0 +1,185 @@
+"""
+Load test of the Gradio app (code_sample.py): sustained requests per minute at a
+given concurrency.
+
+Starts the mock chat server (benchmarks/mock_groq.py, streaming replies) and the
+app pointed at it (HF_BASE_URL), then keeps --concurrency clients submitting
+question-paper requests through gradio_client for --duration seconds, cycling
+over the --pdfs uploads. One request runs first to load the embedding model and
+is reported separately as the cold start. Reports completed requests per minute,
+p50/p95 latency, errors and how many LLM calls the mock served.
+
+Pass --url to load an app that is already running (then nothing is started and
+the mock is not used). --vector-cache 0 disables the knowledge-base cache for a
+before/after comparison.
+
+Needs gradio_client (installed with gradio) and the app's own requirements.
+
+Usage (from backend/):
+    python benchmarks/gradio_load.py --concurrency 16 --duration 120
+    python benchmarks/gradio_load.py --concurrency 2 --app-concurrency 2 --vector-cache 0
+    python benchmarks/gradio_load.py --url http://127.0.0.1:7860 --concurrency 8
+"""
+import argparse
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_groq import start_server  # noqa: E402
+from run_benchmarks import percentile  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ERROR_PREFIXES = ("❌", "⚠️", "⏱️")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port, base_url, concurrency, vector_cache):
+    """
+    Runs code_sample.py against the mock; returns the process once it serves.
+    """
+    env = dict(os.environ, HF_TOKEN="mock-token", HF_BASE_URL=base_url, GRADIO_SERVER_PORT=str(port),
+               GRADIO_CONCURRENCY=str(concurrency), GRADIO_QUEUE_SIZE=str(max(64, concurrency * 4)),
+               VECTOR_CACHE_SIZE=str(vector_cache))
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "code_sample.py")], cwd=REPO_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"code_sample.py exited:\n{process.stderr.read()[-2000:]}")
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return process, url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("code_sample.py did not start within 120 s")
+
+
+def submit(client, pdf, args):
+    """
+    One generation request; returns (seconds, error or None).
+    """
+    from gradio_client import handle_file
+
+    start = time.perf_counter()
+    try:
+        output = client.predict([handle_file(pdf)], "Medium", args.mcq, "Medium", args.short, "Medium", args.long,
+                                args.sets, api_name="/generate_question_paper")
+    except Exception as e:
+        return time.perf_counter() - start, str(e)
+    error = output if not output or output.startswith(ERROR_PREFIXES) else None
+    return time.perf_counter() - start, error
+
+
+def run_load(url, pdfs, args):
+    from gradio_client import Client
+
+    cold_s, cold_error = submit(Client(url, verbose=False), pdfs[0], args)
+    if cold_error:
+        raise RuntimeError(f"Warm-up request failed: {cold_error[:300]}")
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    stop_at = time.perf_counter() + args.duration
+
+    def worker():
+        client = Client(url, verbose=False)
+        while time.perf_counter() < stop_at:
+            with lock:
+                pdf = pdfs[next(counter) % len(pdfs)]
+            seconds, error = submit(client, pdf, args)
+            with lock:
+                if error:
+                    errors.append(error[:200])
+                else:
+                    latencies.append(seconds)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 1),
+        "completed": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "requests_per_min": round(len(latencies) / elapsed * 60, 1),
+        "cold_start_s": round(cold_s, 2),
+        "p50_s": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load an already running app instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients submitting at once")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of sustained load")
+    parser.add_argument("--app-concurrency", type=int, help="GRADIO_CONCURRENCY for the app (default: --concurrency)")
+    parser.add_argument("--vector-cache", type=int, default=32, help="VECTOR_CACHE_SIZE for the app")
+    parser.add_argument("--pdfs", default=os.path.join(REPO_DIR, "QA", "*QA.pdf"), help="glob of PDFs to upload")
+    parser.add_argument("--mcq", type=int, default=5)
+    parser.add_argument("--short", type=int, default=3)
+    parser.add_argument("--long", type=int, default=2)
+    parser.add_argument("--sets", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=300, help="mock time to first token")
+    parser.add_argument("--token-ms", type=float, default=5, help="mock delay between streamed words")
+    args = parser.parse_args()
+    pdfs = sorted(glob.glob(args.pdfs))
+    if not pdfs:
+        parser.error(f"no PDFs match {args.pdfs}")
+
+    server = state = process = None
+    url = args.url
+    if not url:
+        server, state, base_url = start_server(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4,
+                                               token_ms=args.token_ms, seed=0)
+        process, url = start_app(free_port(), base_url, args.app_concurrency or args.concurrency,
+                                 args.vector_cache)
+    try:
+        result = run_load(url, pdfs, args)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if server:
+            server.shutdown()
+    if state:
+        result["llm_calls"] = state.snapshot()["calls"]
+    result.update({"url": args.url or "local", "vector_cache": args.vector_cache, "pdfs": len(pdfs)})
+
+    print(f"concurrency {result['concurrency']}: {result['requests_per_min']} requests/min over "
+          f"{result['duration_s']} s  ({result['completed']} completed, {result['errors']} errors)  "
+          f"p50 {result['p50_s']} s  p95 {result['p95_s']} s  cold start {result['cold_start_s']} s")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, time.strftime("gradio-load-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
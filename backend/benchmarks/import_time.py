@@ -0,0 +1,127 @@
+"""
+Cold-start guard: import time of the backend entry points.
+
+Imports each module in a fresh interpreter under `python -X importtime`, reports
+the median total and the slowest imports, and exits non-zero when an entry point
+takes longer than --max-ms or pulls in a module that must load lazily (LangChain,
+pypdf, the Groq SDK, fpdf, NumPy, PyMuPDF). Meant to run in CI next to the tests.
+
+Usage (from backend/):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules app --runs 9 --max-ms 400
+    python benchmarks/import_time.py --compare benchmarks/results/import-<previous>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Must not be imported when the app starts; services load them on first use
+LAZY_MODULES = ["langchain_community.document_loaders.pdf", "langchain_core", "pypdf", "groq", "fpdf", "numpy",
+                "fitz", "pymupdf", "services.pdf_maker", "services.allocator"]
+
+
+def parse_importtime(stderr):
+    """
+    [(module, self_us, cumulative_us, depth)] from `-X importtime` output.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_part, cumulative_us, name = line.split("|", 2)
+        self_us = int(self_part.split(":", 1)[1])
+        cumulative_us = int(cumulative_us)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def measure(module):
+    """
+    One cold import of `module` in a fresh interpreter: (total ms, rows).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1", WARMUP="0"))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative, depth in reversed(rows) if name == module and depth == 0)
+    return total / 1000.0, rows
+
+
+def summarize(module, runs, top):
+    totals = []
+    rows = []
+    for _ in range(runs):
+        total_ms, rows = measure(module)
+        totals.append(total_ms)
+    loaded = {name for name, _, _, _ in rows}
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "modules_loaded": len(loaded),
+        "eager_heavy_modules": [m for m in LAZY_MODULES if m in loaded],
+        "slowest_self_ms": [[name, round(self_us / 1000.0, 1)] for name, self_us, _, _ in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="app,asgi_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports (self time) to report")
+    parser.add_argument("--max-ms", type=float, default=float(os.getenv("IMPORT_TIME_MAX_MS", 600)),
+                        help="fail when an entry point's median import time exceeds this")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--output", help="results path (default benchmarks/results/import-<timestamp>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for module in [m.strip() for m in args.modules.split(",") if m.strip()]:
+        summary = results[module] = summarize(module, args.runs, args.top)
+        print(f"{module:10s} median {summary['median_ms']:8.1f} ms  (min {summary['min_ms']:.1f}, "
+              f"max {summary['max_ms']:.1f})  {summary['modules_loaded']} modules")
+        for name, self_ms in summary["slowest_self_ms"]:
+            print(f"    {self_ms:8.1f} ms  {name}")
+        if summary["median_ms"] > args.max_ms:
+            failures.append(f"{module}: {summary['median_ms']} ms > {args.max_ms} ms")
+        if summary["eager_heavy_modules"]:
+            failures.append(f"{module}: imports {', '.join(summary['eager_heavy_modules'])} at startup")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("import-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "max_ms": args.max_ms, "modules": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)["modules"]
+        print(f"\nComparison with {args.compare}:")
+        for module, summary in results.items():
+            before = previous.get(module, {}).get("median_ms")
+            if before:
+                change = (summary["median_ms"] - before) / before * 100
+                print(f"  {module:10s} median_ms {before} -> {summary['median_ms']} ({change:+.1f}%)")
+
+    if failures:
+        print("\nCold-start regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
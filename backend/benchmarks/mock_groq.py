@@ -0,0 +1,230 @@
+"""
+Local mock of the Groq (OpenAI-compatible) chat completions API.
+
+Point the Groq SDK at it with GROQ_BASE_URL=http://127.0.0.1:<port>, or the
+Hugging Face client in code_sample.py with HF_BASE_URL (same API under /v1).
+Supports configurable latency, jitter, 429 injection, canned responses and
+streamed (server-sent events) replies, and reports token usage so the pipelines
+can be benchmarked without live quota.
+
+Usage:
+    python mock_groq.py --port 8765 --latency-ms 300 --jitter-ms 100 --rate-429 0.05
+    python mock_groq.py --port 8765 --token-ms 5   # streamed replies: 5 ms per word after the first
+    GET  /stats  -> {"calls", "errors_429", "prompt_tokens", "completion_tokens", "by_kind"}
+    POST /reset  -> clears the counters
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAT_PATH = "/openai/v1/chat/completions"
+HF_CHAT_PATH = "/v1/chat/completions"  # huggingface_hub's (AsyncInferenceClient with base_url)
+
+DEFAULT_PATTERN = {
+    "Section A": {"description": "10 MCQs", "marks_per_question": 1, "questions_to_attempt": 10, "total_questions": 10},
+    "Section B": {"description": "Short Notes (Any 3 out of 5)", "marks_per_question": 5, "questions_to_attempt": 3, "total_questions": 5},
+    "Section C": {"description": "Long Answer (Compulsory)", "marks_per_question": 10, "questions_to_attempt": 2, "total_questions": 2},
+}
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for relative comparisons
+    return max(1, len(text) // 4)
+
+
+def _topic_list(prompt):
+    """
+    Topics offered by a classification prompt (the "one of these topics:" line).
+    """
+    match = re.search(r"one of these topics:\s*\n\s*(.+)", prompt)
+    return [t.strip() for t in match.group(1).split(",")] if match else []
+
+
+def canned_reply(messages, canned=None, rng=random):
+    """
+    Picks a plausible response for a request based on its prompt.
+    Returns (kind, content).
+    """
+    prompt = "\n".join(m.get("content", "") for m in messages)
+    for needle, content in (canned or {}).items():
+        if needle in prompt:
+            return "canned", content
+
+    if "numbered syllabus topics" in prompt:
+        topics = re.findall(r"^\d+\. ", prompt.split("Questions:")[0], re.M)
+        questions = re.findall(r"^Q\d+: ", prompt, re.M)
+        return "classify_batch", json.dumps({"labels": [rng.randint(1, max(len(topics), 1)) for _ in questions]})
+    if "Classify" in prompt:
+        topics = _topic_list(prompt)
+        return "classify", rng.choice(topics) if topics else "Unknown"
+    if "syllabus" in prompt.lower() and "teaching hours" in prompt.lower():
+        return "syllabus", json.dumps({"Introduction": 6, "Core Concepts": 10, "Applications": 8})
+    if "Structure/Pattern" in prompt:
+        return "pattern", json.dumps(DEFAULT_PATTERN)
+    if "Exam Header" in prompt:
+        return "header", "UNIVERSITY OF MUMBAI\nDepartment of Computer Engineering\nSemester VI Examination\nMay 2023"
+    if "Expert Exam Setter Assistant" in prompt:
+        return "chat", json.dumps({"reply": "Pattern updated.", "action": "update_pattern", "data": DEFAULT_PATTERN})
+    if "typesetter" in prompt:
+        return "header_refine", "UNIVERSITY OF MUMBAI\nDEPARTMENT OF COMPUTER ENGINEERING\nEXAMINATION - 2024"
+    count = re.search(r"Generate (\d+)", prompt)
+    count = int(count.group(1)) if count else 5
+    lines = [f"Q{i}. Explain concept {i} with a suitable example. [5 Marks]" for i in range(1, count + 1)]
+    return "generate", "\n".join(lines)
+
+
+class MockState:
+    def __init__(self, latency_ms=200, jitter_ms=50, rate_429=0.0, canned=None, seed=None, token_ms=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_ms = token_ms
+        self.rate_429 = rate_429
+        self.canned = canned or {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {"calls": 0, "errors_429": 0, "prompt_tokens": 0, "completion_tokens": 0, "by_kind": {}}
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, model, content):
+            """
+            The reply as OpenAI-style chunks, one word each, over server-sent events.
+            """
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            words = re.findall(r"\S+\s*", content) or [content]
+            for i, word in enumerate(words):
+                if i and state.token_ms:
+                    time.sleep(state.token_ms / 1000.0)
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [{"index": 0, "delta": {"role": "assistant", "content": word},
+                                                      "finish_reason": "stop" if i == len(words) - 1 else None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._send(200, state.snapshot())
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length) if length else b"{}"
+            if self.path == "/reset":
+                state.reset()
+                return self._send(200, {"ok": True})
+            if self.path.rstrip("/") not in (CHAT_PATH, HF_CHAT_PATH):
+                return self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            request = json.loads(raw or b"{}")
+            with state.lock:
+                inject_429 = state.random.random() < state.rate_429
+                delay = max(0.0, state.latency_ms + state.random.uniform(-state.jitter_ms, state.jitter_ms)) / 1000.0
+            if inject_429:
+                with state.lock:
+                    state.stats["errors_429"] += 1
+                return self._send(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_exceeded"}},
+                                  {"retry-after": "0"})
+
+            messages = request.get("messages", [])
+            with state.lock:
+                kind, content = canned_reply(messages, state.canned, state.random)
+            time.sleep(delay)
+            prompt_tokens = estimate_tokens("".join(m.get("content", "") for m in messages))
+            completion_tokens = min(estimate_tokens(content), request.get("max_tokens") or 10 ** 6)
+            with state.lock:
+                stats = state.stats
+                stats["calls"] += 1
+                stats["prompt_tokens"] += prompt_tokens
+                stats["completion_tokens"] += completion_tokens
+                stats["by_kind"][kind] = stats["by_kind"].get(kind, 0) + 1
+
+            if request.get("stream"):
+                return self._stream(request.get("model", "mock"), content)
+            self._send(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+    return Handler
+
+
+def start_server(port=0, **options):
+    """
+    Starts the mock server in a background thread.
+    Returns (server, state, base_url); stop it with server.shutdown().
+    """
+    state = MockState(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Groq/OpenAI chat completions server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of answering 429")
+    parser.add_argument("--canned", help="JSON file of {prompt substring: response content}")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--token-ms", type=float, default=0, help="Delay between streamed words")
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned, "r", encoding="utf-8") as f:
+            canned = json.load(f)
+    server, _, base_url = start_server(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                       rate_429=args.rate_429, canned=canned, seed=args.seed,
+                                       token_ms=args.token_ms)
+    print(f"Mock Groq listening on {base_url} (set GROQ_BASE_URL={base_url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Throughput and memory of the PDF text backends (services/pdf_text.py) on the QA/ PDFs.
+
+Each backend runs in a fresh interpreter, so import cost and peak RSS are its own:
+  - first_call_ms: first extraction, including importing the library;
+  - pages_per_s / ms_per_pdf: warm extraction over --iterations passes;
+  - python_peak_kb: peak Python heap during one pass (tracemalloc), which is where
+    LangChain's Document objects and metadata live; MuPDF's own buffers are not counted;
+  - max_rss_mb: peak resident memory of the process.
+
+Usage (from backend/):
+    python benchmarks/pdf_text.py
+    python benchmarks/pdf_text.py --backends pymupdf,pypdf --iterations 10
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QA_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "QA")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def run_backend(backend, paths, iterations):
+    """
+    Measures one backend in this process; returns the summary dict.
+    """
+    sys.path.insert(0, BACKEND_DIR)
+    from services.pdf_text import page_texts
+
+    start = time.perf_counter()
+    pages = sum(len(page_texts(path, backend)) for path in paths)
+    first_call = time.perf_counter() - start
+
+    tracemalloc.start()
+    chars = sum(len(text) for path in paths for text in page_texts(path, backend))
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for path in paths:
+            page_texts(path, backend)
+    warm = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "pdfs": len(paths),
+        "pages": pages,
+        "chars": chars,
+        "first_call_ms": round(first_call * 1000, 1),
+        "ms_per_pdf": round(warm / (iterations * len(paths)) * 1000, 2),
+        "pages_per_s": round(pages * iterations / warm, 1),
+        "python_peak_kb": round(python_peak / 1024, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="langchain,pypdf,pymupdf")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--pdfs", default=os.path.join(QA_DIR, "*.pdf"), help="glob of PDFs to extract")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    paths = sorted(glob.glob(args.pdfs))
+
+    if args.child:
+        print(json.dumps(run_backend(args.child, paths, args.iterations)))
+        return
+
+    results = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", backend,
+                                "--iterations", str(args.iterations), "--pdfs", args.pdfs],
+                               cwd=BACKEND_DIR, capture_output=True, text=True)
+        if child.returncode != 0:
+            print(f"{backend:10s} failed: {child.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = results[backend] = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"{backend:10s} {result['ms_per_pdf']:8.2f} ms/pdf  {result['pages_per_s']:8.1f} pages/s  "
+              f"first call {result['first_call_ms']:7.1f} ms  python peak {result['python_peak_kb']:8.1f} KB  "
+              f"max RSS {result['max_rss_mb']:6.1f} MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, time.strftime("pdf-text-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"iterations": args.iterations, "pdfs": paths, "backends": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
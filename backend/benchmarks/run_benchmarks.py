@@ -0,0 +1,217 @@
+"""
+Offline end-to-end benchmark of the backend pipeline.
+
+Runs analyze_syllabus_and_pyqs, generate_paper_content, ChatAgent.process_message
+and create_pdf (plain, with a raw phone-camera-sized logo, with the logo through
+services/header_image.py, and a long paper full of math symbols and typographic
+quotes, which exercises the embedded Unicode font subsetting) against the local mock Groq server (benchmarks/mock_groq.py), using
+the QA/ PDFs as fixtures, and reports p50/p95 latency, LLM calls per request and
+throughput at a given concurrency. Results are written as JSON for comparison
+across runs.
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py --requests 8 --concurrency 4 --latency-ms 150
+    python benchmarks/run_benchmarks.py --scenarios analyze,pdf --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_groq import start_server  # noqa: E402
+
+QA_DIR = os.path.join(REPO_DIR, "QA")
+SYLLABUS_PDF = os.path.join(QA_DIR, "computer-engineering-syllabus-sem-vi-mumbai-university.pdf")
+PYQ_PDFS = [os.path.join(QA_DIR, "2023-Dec QA.pdf"), os.path.join(QA_DIR, "2023-May QA.pdf")]
+COURSE_CODE = "CSDLO6013"  # Quantitative Analysis, matching the QA/ papers
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+API_KEY = "mock-key"
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a non-empty list.
+    """
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def load_fixtures():
+    """
+    Syllabus text (three-line table layout for the QA course), PYQ paths, a reference
+    paper text and a generated-paper-like text for the PDF scenario.
+    """
+    from services.analyzer import extract_text_from_pdf
+    from services.syllabus_parser import parse_syllabus_pdf
+
+    parsed = parse_syllabus_pdf(SYLLABUS_PDF, COURSE_CODE)
+    syllabus_text = "\n".join(f"{i}\n{title}\n{hours}" for i, (title, hours) in enumerate(parsed["topics"].items(), 1))
+    reference_text = extract_text_from_pdf(PYQ_PDFS[0])
+    return {"syllabus_text": syllabus_text, "pyq_paths": PYQ_PDFS, "reference_text": reference_text,
+            "logo_jpeg": make_logo()}
+
+
+def make_logo(width=3000, height=2000):
+    """
+    A large, noisy JPEG standing in for a phone-camera photo of a college logo.
+    """
+    import fitz
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    pixels = (rng.random((height, width, 3)) * 255).astype(np.uint8)
+    return fitz.Pixmap(fitz.csRGB, width, height, pixels.tobytes(), 0).tobytes("jpg", jpg_quality=92)
+
+
+UNICODE_QUESTIONS = (
+    "**Q1. Answer the following (5 marks each)**\n"
+    "a) Evaluate \u222b\u2080\u00b9 x\u00b2 e\u02e3 dx and state the rule used \u2014 \u201cintegration by parts\u201d.\n"
+    "b) Prove that \u2200 \u03b5 > 0, \u2203 \u03b4 such that |f(x) \u2212 L| < \u03b5 whenever 0 < |x \u2212 a| < \u03b4.\n"
+    "c) If \u03b1, \u03b2 \u2208 \u211d and \u03b1 \u2264 \u03b2, show \u221a\u03b1 \u2264 \u221a\u03b2 (\u03b1 \u2265 0).\n"
+)
+
+
+def build_scenarios(fixtures):
+    """
+    Each scenario is a zero-argument callable performing one request's worth of work.
+    """
+    from services.analyzer import analyze_syllabus_and_pyqs
+    from services.chat_agent import ChatAgent
+    import base64
+    import tempfile
+    from services.generator import generate_paper_content
+    from services.header_image import header_image_path
+    from services.pdf_maker import create_pdf
+
+    analysis = analyze_syllabus_and_pyqs(fixtures["syllabus_text"], fixtures["pyq_paths"], API_KEY,
+                                         fixtures["reference_text"])
+    paper_text = generate_paper_content(analysis["default_allocation"], API_KEY, analysis["paper_pattern"],
+                                        analysis["priority_scores"], analysis.get("section_allocation"))
+    agent = ChatAgent()
+    context = {"syllabus_topics": analysis["syllabus_topics"], "paper_pattern": analysis["paper_pattern"]}
+    raw_logo = os.path.join(tempfile.mkdtemp(prefix="qpg-bench-"), "logo.jpg")
+    with open(raw_logo, "wb") as f:
+        f.write(fixtures["logo_jpeg"])
+    logo_data = "data:image/jpeg;base64," + base64.b64encode(fixtures["logo_jpeg"]).decode("ascii")
+
+    return {
+        "analyze": lambda: analyze_syllabus_and_pyqs(fixtures["syllabus_text"], fixtures["pyq_paths"], API_KEY,
+                                                     fixtures["reference_text"]),
+        "generate": lambda: generate_paper_content(analysis["default_allocation"], API_KEY, analysis["paper_pattern"],
+                                                   analysis["priority_scores"], analysis.get("section_allocation")),
+        "chat": lambda: agent.process_message("Add a Section D with 2 case studies of 10 marks", context, API_KEY),
+        "pdf": lambda: create_pdf(paper_text * 4, "COLLEGE OF ENGINEERING", header_text=analysis["extracted_header"]),
+        "pdf_logo_raw": lambda: create_pdf(paper_text * 4, "COLLEGE OF ENGINEERING", header_image_path=raw_logo,
+                                           header_text=analysis["extracted_header"]),
+        "pdf_logo": lambda: create_pdf(paper_text * 4, "COLLEGE OF ENGINEERING",
+                                       header_image_path=header_image_path(logo_data),
+                                       header_text=analysis["extracted_header"]),
+        "pdf_unicode": lambda: create_pdf((paper_text + "\n" + UNICODE_QUESTIONS * 10) * 4, "COLLEGE OF ENGINEERING",
+                                          header_text=analysis["extracted_header"]),
+    }
+
+
+def run_scenario(name, func, state, requests, concurrency):
+    """
+    Runs `requests` calls of `func` with `concurrency` threads and summarises them.
+    """
+    state.reset()
+    latencies = []
+
+    def timed():
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(timed) for _ in range(requests)]:
+            future.result()
+    wall = time.perf_counter() - wall_start
+    stats = state.snapshot()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "throughput_rps": round(requests / wall, 3),
+        "llm_calls_per_request": round(stats["calls"] / requests, 2),
+        "prompt_tokens_per_request": round(stats["prompt_tokens"] / requests, 1),
+        "completion_tokens_per_request": round(stats["completion_tokens"] / requests, 1),
+        "errors_429": stats["errors_429"],
+        "llm_calls_by_kind": stats["by_kind"],
+    }
+
+
+def compare(current, previous_path):
+    """
+    Prints the relative change of the headline metrics against a previous results file.
+    """
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)["scenarios"]
+    print(f"\nComparison with {previous_path}:")
+    for name, result in current.items():
+        if name not in previous:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "throughput_rps", "llm_calls_per_request"):
+            before, after = previous[name].get(metric), result.get(metric)
+            if before:
+                changes.append(f"{metric} {before} -> {after} ({(after - before) / before * 100:+.1f}%)")
+        print(f"  {name:12s} " + "; ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend pipeline against a mock Groq server.")
+    parser.add_argument("--scenarios", default="analyze,generate,chat,pdf,pdf_logo_raw,pdf_logo,pdf_unicode")
+    parser.add_argument("--requests", type=int, default=8, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    server, state, base_url = start_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                           rate_429=args.rate_429, seed=args.seed)
+    os.environ["GROQ_BASE_URL"] = base_url
+    try:
+        fixtures = load_fixtures()
+        scenarios = build_scenarios(fixtures)
+        results = {}
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            results[name] = run_scenario(name, scenarios[name], state, args.requests, args.concurrency)
+            r = results[name]
+            print(f"{name:12s} p50 {r['p50_ms']:9.1f} ms  p95 {r['p95_ms']:9.1f} ms  "
+                  f"{r['throughput_rps']:7.2f} req/s  {r['llm_calls_per_request']:6.1f} LLM calls/req")
+    finally:
+        server.shutdown()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: getattr(args, k) for k in ("requests", "concurrency", "latency_ms", "jitter_ms", "rate_429", "seed")},
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Offline PYQ ingestion.
+
+Classifies a directory of previous-year papers once and stores per-course topic
+frequencies (with per-year breakdowns) in the PYQ index, so /api/analyze only
+has to classify newly uploaded papers.
+
+Usage (from backend/):
+    python ingest_pyqs.py ../QA --syllabus ../QA/computer-engineering-syllabus-sem-vi-mumbai-university.pdf --course-code CSDLO6013
+    python ingest_pyqs.py ../QA --course-code CSDLO6013       # syllabus already in the registry
+
+(The QA/ papers are Quantitative Analysis, CSDLO6013.) Papers are indexed under the
+course code and syllabus version, so they serve every request for that syllabus
+whether it arrives as a PDF, as pasted text or as a known-syllabus pick.
+"""
+import argparse
+import os
+import sys
+from groq import Groq
+from services.analyzer import classify_questions, extract_text_from_pdf, split_questions
+from services.pyq_index import PyqIndex, course_key, detect_year, file_hash
+from services.syllabus_parser import DEFAULT_MIN_CONFIDENCE, parse_syllabus_pdf
+from services.syllabus_registry import SyllabusRegistry, syllabus_fingerprint
+from services.topic_matcher import TopicMatcher
+
+
+def resolve_syllabus(registry, syllabus_path=None, course_code=None, syllabus_id=None, supersede=False):
+    """
+    Finds the registry entry for the course, parsing and registering the syllabus PDF if needed.
+    With `supersede`, a newly parsed syllabus becomes the course's latest version.
+    """
+    if syllabus_path:
+        with open(syllabus_path, "rb") as f:
+            syllabus_bytes = f.read()
+        pdf_key = f"{syllabus_fingerprint(syllabus_bytes)}:{(course_code or '').upper()}"
+        entry = registry.lookup(fingerprint=pdf_key)
+        if entry:
+            return entry
+        parsed = parse_syllabus_pdf(syllabus_bytes, course_code)
+        if not parsed["topics"]:
+            return None
+        if parsed["confidence"] < DEFAULT_MIN_CONFIDENCE and not course_code:
+            print(f"Syllabus parse not confident ({parsed['confidence']}); "
+                  "pass --course-code if the PDF holds several courses.")
+            return None
+        print(f"Parsed syllabus {parsed['course_code']} (confidence {parsed['confidence']}): {len(parsed['topics'])} modules")
+        return registry.register(None, parsed["topics"], parsed["course_code"], parsed["course_title"], fingerprint=pdf_key,
+                                 supersede=supersede)
+    return registry.lookup(fingerprint=syllabus_id, course_code=course_code)
+
+
+def ingest_directory(pyq_dir, entry, index, api_key):
+    """
+    Classifies every PDF in `pyq_dir` not already indexed for the course.
+    Returns the number of newly indexed papers.
+    """
+    client = Groq(api_key=api_key)
+    key = course_key(entry)
+    matcher = TopicMatcher(entry["topics"])
+    added = 0
+    for filename in sorted(os.listdir(pyq_dir)):
+        if not filename.lower().endswith(".pdf") or "syllabus" in filename.lower():
+            continue
+        path = os.path.join(pyq_dir, filename)
+        paper_hash = file_hash(path)
+        if index.has_paper(key, paper_hash):
+            print(f"  = {filename} (already indexed)")
+            continue
+        text = extract_text_from_pdf(path)
+        questions = split_questions(text)
+        frequency, _ = classify_questions(client, questions, entry["topics"], matcher=matcher)
+        year = detect_year(filename, text)
+        index.add_paper(key, paper_hash, frequency, name=filename, year=year,
+                        questions=len(questions), course_code=entry.get("course_code"))
+        added += 1
+        print(f"  + {filename} ({year}): {len(questions)} questions, {sum(frequency.values())} classified")
+    stats = matcher.stats
+    print(f"Topic labels: {stats['exact']} exact, {stats['fuzzy']} fuzzy, {stats['unresolved']} unresolved"
+          + (f" (e.g. {stats['unresolved_labels'][:3]})" if stats['unresolved'] else ""))
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-index a directory of PYQ PDFs for a course.")
+    parser.add_argument("pyq_dir", help="Directory containing previous-year question paper PDFs")
+    parser.add_argument("--syllabus", help="Syllabus PDF (parsed and registered if not known yet)")
+    parser.add_argument("--course-code", help="Course code, e.g. CSDLO6013")
+    parser.add_argument("--syllabus-id", help="Registry id of an already known syllabus")
+    parser.add_argument("--supersede", action="store_true",
+                        help="Make a newly parsed --syllabus the latest version of its course")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        print("Error: GROQ_API_KEY environment variable not set.")
+        return 1
+    if not os.path.isdir(args.pyq_dir):
+        print(f"Directory '{args.pyq_dir}' not found.")
+        return 1
+
+    registry = SyllabusRegistry()
+    entry = resolve_syllabus(registry, args.syllabus, args.course_code, args.syllabus_id, args.supersede)
+    if not entry:
+        print("Error: syllabus not found. Pass --syllabus, or a known --course-code / --syllabus-id.")
+        return 1
+
+    index = PyqIndex()
+    print(f"Ingesting {args.pyq_dir} for {entry.get('course_code') or entry['id']} (v{entry.get('version')})")
+    added = ingest_directory(args.pyq_dir, entry, index, api_key)
+    stats = index.stats(course_key(entry)) or {"papers": [], "totals": {}}
+    print(f"Indexed {added} new paper(s); {len(stats['papers'])} total.")
+    for topic, count in sorted(stats["totals"].items(), key=lambda x: -x[1]):
+        print(f"  {count:4d}  {topic}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
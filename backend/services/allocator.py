@@ -0,0 +1,187 @@
+import numpy as np
+
+
+def _as_bounds(n, value, default):
+    """
+    Broadcasts a scalar / sequence / None bound to an integer array of length n.
+    """
+    if value is None:
+        return np.full(n, default, dtype=np.int64)
+    arr = np.asarray(value, dtype=np.int64)
+    if arr.ndim == 0:
+        return np.full(n, int(arr), dtype=np.int64)
+    return arr.copy()
+
+
+def apportion(weights, total, minimum=0, maximum=None):
+    """
+    Splits `total` integer seats across len(weights) bins proportionally to `weights`
+    using bounded largest-remainder (Hamilton) apportionment.
+
+    - Every bin receives between `minimum` and `maximum` seats (scalars or per-bin arrays).
+    - The result always sums to `total`, unless the upper bounds make that impossible,
+      in which case every bin is filled to its maximum.
+    - If the lower bounds alone exceed `total`, minimums are honoured for the
+      highest-weighted bins first and dropped for the rest.
+
+    Returns an int64 NumPy array.
+    """
+    w = np.clip(np.asarray(weights, dtype=np.float64), 0, None)
+    n = w.size
+    total = int(total)
+    if n == 0 or total <= 0:
+        return np.zeros(n, dtype=np.int64)
+
+    hi = _as_bounds(n, maximum, total)
+    hi = np.clip(hi, 0, total)
+    lo = np.minimum(_as_bounds(n, minimum, 0).clip(0), hi)
+
+    # Upper bounds cap the achievable total
+    if hi.sum() <= total:
+        return hi
+
+    # Infeasible minimums: keep them for the strongest bins only
+    if lo.sum() > total:
+        order = np.argsort(-w, kind="stable")
+        keep = np.cumsum(lo[order]) <= total
+        trimmed = np.zeros(n, dtype=np.int64)
+        trimmed[order[keep]] = lo[order[keep]]
+        lo = trimmed
+
+    if not w.any():
+        w = np.ones(n)
+
+    # Find the divisor so that sum(clip(lam * w, lo, hi)) == total (monotone in lam)
+    lo_f, hi_f = lo.astype(np.float64), hi.astype(np.float64)
+    lam_lo, lam_hi = 0.0, float(total) / w[w > 0].min()
+    for _ in range(64):
+        lam = 0.5 * (lam_lo + lam_hi)
+        if np.clip(lam * w, lo_f, hi_f).sum() < total:
+            lam_lo = lam
+        else:
+            lam_hi = lam
+    quotas = np.clip(lam_hi * w, lo_f, hi_f)
+
+    seats = np.floor(quotas + 1e-9).astype(np.int64)
+    seats = np.clip(seats, lo, hi)
+    remaining = total - int(seats.sum())
+    # One seat per bin per pass, largest remainder first; repeat while bins have room
+    # (zero-weight bins can have slack the quotas never reach)
+    while remaining > 0:
+        remainders = np.where(seats < hi, quotas - seats, -np.inf)
+        winners = np.argsort(-remainders, kind="stable")[:remaining]
+        winners = winners[np.isfinite(remainders[winners])]
+        if winners.size == 0:
+            break
+        seats[winners] += 1
+        remaining -= winners.size
+    while remaining < 0:
+        remainders = np.where(seats > lo, quotas - seats, np.inf)
+        losers = np.argsort(remainders, kind="stable")[:-remaining]
+        losers = losers[np.isfinite(remainders[losers])]
+        if losers.size == 0:
+            break
+        seats[losers] -= 1
+        remaining += losers.size
+    return seats
+
+
+def _section_spec(details):
+    """
+    Reads question count and marks for one section of a paper pattern.
+    """
+    details = details or {}
+    try:
+        count = int(details.get("total_questions") or details.get("questions_to_attempt") or 0)
+    except (TypeError, ValueError):
+        count = 0
+    try:
+        marks = float(details.get("marks_per_question") or 1)
+    except (TypeError, ValueError):
+        marks = 1.0
+    return max(count, 0), max(marks, 0.0)
+
+
+def allocate_sections(priority_scores, paper_pattern, min_per_topic=0, max_per_topic=None):
+    """
+    Assigns questions of every section in `paper_pattern` to syllabus topics.
+
+    Each topic's share of the paper's total marks is proportional to its priority score.
+    Sections are filled from highest to lowest marks_per_question; each one is apportioned
+    against the marks every topic still "owes", so section totals are exact and marks
+    follow priority as closely as integer counts allow.
+
+    `min_per_topic` / `max_per_topic` bound the number of questions a topic gets across
+    the whole paper (scalar or {topic: int}).
+
+    Returns {section_name: {topic: count}} (zero counts omitted).
+    """
+    topics = list(priority_scores.keys())
+    if not topics or not paper_pattern:
+        return {}
+
+    n = len(topics)
+    weights = np.array([max(float(priority_scores[t] or 0), 0.0) for t in topics])
+    if not weights.any():
+        weights = np.ones(n)
+
+    def per_topic(value, default):
+        if isinstance(value, dict):
+            return np.array([int(value.get(t, default)) for t in topics], dtype=np.int64)
+        return _as_bounds(n, value, default)
+
+    sections = [(name, *_section_spec(details)) for name, details in paper_pattern.items()]
+    total_count = sum(count for _, count, _ in sections)
+    lo_total = per_topic(min_per_topic, 0)
+    hi_total = per_topic(max_per_topic, total_count)
+
+    total_marks = sum(count * marks for _, count, marks in sections)
+    owed = total_marks * weights / weights.sum()
+    assigned = np.zeros(n, dtype=np.int64)
+
+    order = sorted(range(len(sections)), key=lambda i: -sections[i][2])
+    result = {name: {} for name, _, _ in sections}
+    for pos, idx in enumerate(order):
+        name, count, marks = sections[idx]
+        if count == 0:
+            continue
+        capacity = np.clip(hi_total - assigned, 0, None)
+        # Only the last section is responsible for topping topics up to their minimum
+        need = np.clip(lo_total - assigned, 0, None) if pos == len(order) - 1 else 0
+        # Tiny floor keeps fully "paid" topics eligible when every topic is paid
+        counts = apportion(np.clip(owed, 0, None) + 1e-6 * weights, count, need, capacity)
+        assigned += counts
+        owed -= counts * marks
+        result[name] = {topics[i]: int(c) for i, c in enumerate(counts) if c > 0}
+    return result
+
+
+def allocate_topics(priority_scores, total_questions, min_per_topic=0, max_per_topic=None):
+    """
+    Apportions `total_questions` across topics by priority score.
+    Returns {topic: count} summing to exactly `total_questions` when the bounds allow it.
+    """
+    topics = list(priority_scores.keys())
+    if not topics:
+        return {}
+    weights = [max(float(priority_scores[t] or 0), 0.0) for t in topics]
+    if isinstance(min_per_topic, dict):
+        min_per_topic = [int(min_per_topic.get(t, 0)) for t in topics]
+    if isinstance(max_per_topic, dict):
+        max_per_topic = [int(max_per_topic.get(t, total_questions)) for t in topics]
+    counts = apportion(weights, total_questions, min_per_topic, max_per_topic)
+    return {t: int(c) for t, c in zip(topics, counts)}
+
+
+def summarize_sections(section_allocation, paper_pattern):
+    """
+    Collapses a section allocation into per-topic question counts and marks.
+    Returns ({topic: questions}, {topic: marks}).
+    """
+    questions, marks = {}, {}
+    for name, topic_counts in section_allocation.items():
+        _, section_marks = _section_spec((paper_pattern or {}).get(name))
+        for topic, count in topic_counts.items():
+            questions[topic] = questions.get(topic, 0) + count
+            marks[topic] = marks.get(topic, 0) + count * section_marks
+    return questions, marks
@@ -1,22 +1,28 @@
 import re
 import os
 import json
+import asyncio
+import contextvars
 from collections import defaultdict
-from langchain_community.document_loaders import PyPDFLoader
-from groq import Groq
+from concurrent.futures import ThreadPoolExecutor
+from services.budget import BudgetExhausted, current_budget, stratified_sample
+from services.llm import LLM_CONCURRENCY, async_client, chat_completion, chat_completion_async, sync_client
+from services.metrics import record_cache, record_topic_resolution, span
+from services.pdf_text import extract_text
+from services.pyq_index import course_key, detect_year, file_hash
+from services.syllabus_parser import DEFAULT_MIN_CONFIDENCE, detect_course_codes, parse_syllabus_text
+from services.topic_matcher import TopicMatcher
 
-def parse_and_clean_syllabus(raw_text, api_key=None):
-    """
-    Parses raw syllabus text to extract Topic -> Hours mapping.
-    Uses Groq LLM as the primary parser for robust extraction from any syllabus format.
-    Falls back to pattern-based parsing if no API key is provided or LLM fails.
-    """
-    # 1. Groq-based parsing (primary)
-    # Uses llama-3.1-8b-instant for low-latency responses in the backend API context.
-    if api_key:
-        try:
-            client = Groq(api_key=api_key)
-            prompt = f"""You are a precise data extraction assistant. Analyze the following syllabus text and extract all module/unit names and their teaching hours.
+# Threads per analysis request: PDF extraction and LLM branches run side by side
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 8))
+# "indexed": batches of numbered questions answered with JSON topic numbers;
+# "label": one call per question answered with the topic name
+CLASSIFY_PROTOCOL = os.getenv("CLASSIFY_PROTOCOL", "indexed").lower()
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", 10))
+MAX_QUESTION_CHARS = 1000
+
+def _syllabus_prompt(raw_text):
+    return f"""You are a precise data extraction assistant. Analyze the following syllabus text and extract all module/unit names and their teaching hours.
 
 Syllabus Text:
 {raw_text[:20000]}
@@ -32,44 +38,301 @@ Output format:
 {{"Module/Topic Name": integer_hours}}
 Example: {{"Introduction to Data Structures": 8, "Sorting Algorithms": 12, "Graph Theory": 10}}"""
 
-            response = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
+def _clean_llm_topics(content):
+    topics = json.loads(content.strip())
+    # Validate: ensure values are positive numbers and keys are non-empty strings
+    rejected = {k: v for k, v in topics.items() if not (k and isinstance(v, (int, float)) and v > 0)}
+    if rejected:
+        print(f"Groq syllabus parsing: skipped invalid entries: {rejected}")
+    return {k: int(v) for k, v in topics.items() if k and isinstance(v, (int, float)) and v > 0}
+
+def parse_and_clean_syllabus(raw_text, api_key=None, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    Parses raw syllabus text to extract Topic -> Hours mapping.
+    Tries the deterministic layout parser first and only calls the Groq LLM when its
+    confidence is below `min_confidence` (e.g. free-form syllabi without hours).
+    Falls back to the local result if no API key is provided or LLM fails.
+    """
+    # 1. Deterministic parsing (no network call for well-formed syllabi)
+    local = parse_syllabus_text(raw_text)
+    if local["topics"] and local["confidence"] >= min_confidence:
+        return local["topics"]
+
+    # 2. Groq-based parsing
+    if api_key:
+        try:
+            client = sync_client(api_key)
+            response = chat_completion(
+                client, "syllabus_parse",
+                messages=[{"role": "user", "content": _syllabus_prompt(raw_text)}],
                 temperature=0,
                 max_tokens=1500,
                 response_format={"type": "json_object"}
             )
-            content = response.choices[0].message.content.strip()
-            topics = json.loads(content)
-            # Validate: ensure values are positive numbers and keys are non-empty strings
-            rejected = {k: v for k, v in topics.items() if not (k and isinstance(v, (int, float)) and v > 0)}
-            if rejected:
-                print(f"Groq syllabus parsing: skipped invalid entries: {rejected}")
-            topics = {k: int(v) for k, v in topics.items() if k and isinstance(v, (int, float)) and v > 0}
+            topics = _clean_llm_topics(response.choices[0].message.content)
             if topics:
                 return topics
         except Exception as e:
             print(f"Groq syllabus parsing failed: {e}. Falling back to pattern-based parsing.")
 
-    # 2. Pattern-based fallback
-    topics = {}
-    lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
-
-    for i in range(len(lines) - 2):
-        if lines[i].isdigit():  # Module number check
-            topic = lines[i + 1]
-            hrs_line = lines[i + 2]
-            if hrs_line.isdigit():
-                hours = int(hrs_line)
-                # Filtering logic
-                if 2 <= hours <= 20 and len(topic) > 3:
-                    topics[topic] = hours
-    return topics
+    # 3. Low-confidence local result is still better than nothing
+    return local["topics"]
+
+async def parse_and_clean_syllabus_async(raw_text, api_key=None, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """
+    parse_and_clean_syllabus() with a non-blocking LLM fallback.
+    """
+    local = parse_syllabus_text(raw_text)
+    if local["topics"] and local["confidence"] >= min_confidence:
+        return local["topics"]
+    if api_key:
+        try:
+            response = await chat_completion_async(
+                async_client(api_key), "syllabus_parse",
+                messages=[{"role": "user", "content": _syllabus_prompt(raw_text)}],
+                temperature=0,
+                max_tokens=1500,
+                response_format={"type": "json_object"}
+            )
+            topics = _clean_llm_topics(response.choices[0].message.content)
+            if topics:
+                return topics
+        except Exception as e:
+            print(f"Groq syllabus parsing failed: {e}. Falling back to pattern-based parsing.")
+    return local["topics"]
 
 def extract_text_from_pdf(file_path):
-    loader = PyPDFLoader(file_path)
-    pages = loader.load()
-    return "\n".join([p.page_content for p in pages])
+    # Backend set by PDF_TEXT_BACKEND (PyMuPDF by default)
+    with span("pdf_parse"):
+        return extract_text(file_path)
+
+def split_questions(pyq_text):
+    """
+    Segments PYQ text into candidate questions.
+    Naive splitting by '?' keeping fragments long enough to be a real question.
+    """
+    return [q for q in pyq_text.split("?") if len(q.strip()) > 30]
+
+def _classify_prompt(question, topic_list_str):
+    return f"""
+        Classify the following question into one of these topics:
+        {topic_list_str}
+
+        Question:
+        {question}
+
+        Respond ONLY with the exact topic name from the list.
+        """
+
+def _classify_batch_prompt(questions, numbered_topics):
+    numbered_questions = "\n".join(f"Q{i}: {' '.join(q.split())[:MAX_QUESTION_CHARS]}"
+                                   for i, q in enumerate(questions, 1))
+    return f"""Classify each numbered question into one of the numbered syllabus topics.
+
+Topics:
+{numbered_topics}
+
+Questions:
+{numbered_questions}
+
+Respond with JSON only: {{"labels": [topic number for Q1, topic number for Q2, ...]}}
+One integer per question, in order; use 0 if no topic fits."""
+
+def _numbered_topics(matcher):
+    return "\n".join(f"{i}. {topic}" for i, topic in enumerate(matcher.topics, 1))
+
+def _batches(questions):
+    return [questions[i:i + CLASSIFY_BATCH_SIZE] for i in range(0, len(questions), CLASSIFY_BATCH_SIZE)]
+
+def _batch_max_tokens(count, topic_count):
+    """
+    Completion limit for a batch answer: {"labels": [...]} with `count` topic numbers
+    of up to len(str(topic_count)) digits. Every digit, comma and space is counted as
+    a token, plus 50% headroom for extra whitespace, so the JSON is never cut off.
+    """
+    per_label = len(str(max(topic_count, 1))) + 2
+    return int(1.5 * (16 + per_label * count))
+
+def _batch_request(batch, numbered_topics, topic_count):
+    return {
+        "messages": [{"role": "user", "content": _classify_batch_prompt(batch, numbered_topics)}],
+        "temperature": 0,
+        "max_tokens": _batch_max_tokens(len(batch), topic_count),
+        "response_format": {"type": "json_object"},
+    }
+
+def _batch_labels(content, count):
+    """
+    The `count` topic numbers of a batch answer; missing entries are None.
+    Raises ValueError for an answer that is not a JSON labels list (e.g. cut off).
+    """
+    answer = json.loads(content)
+    labels = answer.get("labels") if isinstance(answer, dict) else None
+    if not isinstance(labels, list):
+        raise ValueError(f"no labels list in classification answer: {content[:100]}")
+    return (labels + [None] * count)[:count]
+
+def _count(frequency, topics):
+    for topic in topics:
+        if topic:
+            frequency[topic] += 1
+
+def _resume(questions, checkpoint):
+    """
+    Splits `questions` into labels recorded by an earlier attempt and those still to
+    classify. Returns (frequency, classified, remaining).
+    """
+    frequency = defaultdict(int)
+    known = checkpoint.labels(questions) if checkpoint else {}
+    _count(frequency, known.values())
+    return frequency, len(known), [q for q in questions if q not in known]
+
+def _classify_each(client, questions, syllabus_topics, matcher, checkpoint=None):
+    # The "label" protocol: one call per question, answered with a topic name
+    frequency, classified, questions = _resume(questions, checkpoint)
+    topic_list_str = ", ".join(syllabus_topics.keys())
+
+    for q in questions:
+        try:
+            response = chat_completion(
+                client, "classify",
+                messages=[{"role": "user", "content": _classify_prompt(q, topic_list_str)}],
+                temperature=0,
+                max_tokens=60
+            )
+            classified += 1
+            topic = matcher.resolve(response.choices[0].message.content.strip())
+            _count(frequency, [topic])
+            if checkpoint:
+                checkpoint.record([(q, topic)])
+        except BudgetExhausted:
+            break
+        except Exception as e:
+            print(f"Error classifying question: {e}")
+            continue
+
+    return dict(frequency), classified
+
+def _classify_batches(client, questions, syllabus_topics, matcher, checkpoint=None):
+    # The "indexed" protocol: one call per batch, answered with topic numbers
+    frequency, classified, questions = _resume(questions, checkpoint)
+    numbered_topics = _numbered_topics(matcher)
+    for batch in _batches(questions):
+        try:
+            response = chat_completion(client, "classify", **_batch_request(batch, numbered_topics,
+                                                                            len(matcher.topics)))
+        except BudgetExhausted:
+            break
+        except Exception as e:
+            print(f"Error classifying questions: {e}")
+            continue
+        try:
+            labels = _batch_labels(response.choices[0].message.content, len(batch))
+        except ValueError as e:
+            # Not lost: the batch is classified one question at a time instead
+            print(f"Unreadable batch answer ({e}), classifying its questions one by one")
+            batch_frequency, batch_classified = _classify_each(client, batch, syllabus_topics, matcher, checkpoint)
+            for topic, count in batch_frequency.items():
+                frequency[topic] += count
+            classified += batch_classified
+            continue
+        classified += len(batch)
+        topics = [matcher.resolve_id(label) for label in labels]
+        _count(frequency, topics)
+        if checkpoint:
+            checkpoint.record(zip(batch, topics))
+
+    return dict(frequency), classified
+
+def classify_questions(client, questions, syllabus_topics, matcher=None, checkpoint=None):
+    """
+    Classifies questions into syllabus topics. By default (CLASSIFY_PROTOCOL=indexed)
+    topics are numbered and each call classifies a batch of CLASSIFY_BATCH_SIZE
+    questions, answered as JSON topic numbers; "label" makes one call per question
+    answered with a topic name. Answers are resolved by `matcher` (a TopicMatcher,
+    shared across the papers of one analysis). Stops early when the request budget runs out.
+    With a `checkpoint` (a PaperCheckpoint) each answer is recorded as it arrives, the
+    paper is flushed to disk at the end, and questions recorded by an earlier attempt
+    are not sent again.
+    Returns ({topic: count}, number of questions classified).
+    """
+    matcher = matcher or TopicMatcher(syllabus_topics)
+    classify = _classify_each if CLASSIFY_PROTOCOL == "label" else _classify_batches
+    result = classify(client, questions, syllabus_topics, matcher, checkpoint)
+    if checkpoint:
+        checkpoint.flush()
+    return result
+
+async def classify_questions_async(client, questions, syllabus_topics, concurrency=None, matcher=None,
+                                   checkpoint=None):
+    """
+    classify_questions() with up to `concurrency` (LLM_CONCURRENCY) calls in flight.
+    """
+    matcher = matcher or TopicMatcher(syllabus_topics)
+    semaphore = asyncio.Semaphore(concurrency or LLM_CONCURRENCY)
+    topic_list_str = ", ".join(syllabus_topics.keys())
+    numbered_topics = _numbered_topics(matcher)
+
+    async def classify(q):
+        async with semaphore:
+            response = await chat_completion_async(
+                client, "classify",
+                messages=[{"role": "user", "content": _classify_prompt(q, topic_list_str)}],
+                temperature=0,
+                max_tokens=60
+            )
+        return [(q, matcher.resolve(response.choices[0].message.content.strip()))]
+
+    async def classify_batch(batch):
+        async with semaphore:
+            response = await chat_completion_async(client, "classify",
+                                                   **_batch_request(batch, numbered_topics, len(matcher.topics)))
+        try:
+            labels = _batch_labels(response.choices[0].message.content, len(batch))
+        except ValueError as e:
+            # Not lost: the batch is classified one question at a time instead
+            print(f"Unreadable batch answer ({e}), classifying its questions one by one")
+            results = await asyncio.gather(*(classify(q) for q in batch), return_exceptions=True)
+            answered = [pair for result in results if not isinstance(result, BaseException) for pair in result]
+            if not answered:
+                raise results[0]
+            return answered
+        return [(q, matcher.resolve_id(label)) for q, label in zip(batch, labels)]
+
+    async def run(unit):
+        answered = await (classify(unit[0]) if CLASSIFY_PROTOCOL == "label" else classify_batch(unit))
+        # Recorded as each call returns, so a failure later on loses nothing
+        if checkpoint:
+            checkpoint.record(answered)
+        return answered
+
+    frequency, classified, questions = _resume(questions, checkpoint)
+    units = [[q] for q in questions] if CLASSIFY_PROTOCOL == "label" else _batches(questions)
+    for answered in await asyncio.gather(*(run(unit) for unit in units), return_exceptions=True):
+        if isinstance(answered, BaseException):
+            if not isinstance(answered, BudgetExhausted):
+                print(f"Error classifying question: {answered}")
+            continue
+        classified += len(answered)
+        _count(frequency, [topic for _, topic in answered])
+    if checkpoint:
+        checkpoint.flush()
+    return dict(frequency), classified
+
+def estimate_classify_tokens(questions, syllabus_topics):
+    """
+    Rough token cost of one classification call (prompt + completion), ~4 chars per token.
+    With the indexed protocol a call covers a batch of CLASSIFY_BATCH_SIZE questions.
+    """
+    avg_question = sum(len(q) for q in questions) / len(questions) if questions else 0
+    if CLASSIFY_PROTOCOL == "label":
+        return int((len(", ".join(syllabus_topics)) + avg_question + 250) / 4) + 60
+    topics_chars = sum(len(t) + 5 for t in syllabus_topics)
+    batch_chars = CLASSIFY_BATCH_SIZE * (min(avg_question, MAX_QUESTION_CHARS) + 5)
+    return int((topics_chars + batch_chars + 350) / 4) + _batch_max_tokens(CLASSIFY_BATCH_SIZE, len(syllabus_topics))
+
+def questions_per_call():
+    return 1 if CLASSIFY_PROTOCOL == "label" else CLASSIFY_BATCH_SIZE
 
 def compute_priority_scores(syllabus_topics, frequency_dict):
     if not syllabus_topics:
@@ -88,111 +351,357 @@ def compute_priority_scores(syllabus_topics, frequency_dict):
 
     return priority_scores
 
-def calculate_allocation(priority_scores, total_questions=10):
-    total_priority = sum(priority_scores.values())
-    allocation = {}
-    if total_priority == 0:
-        return {k: 1 for k in priority_scores} # Fallback
-        
-    for topic, score in priority_scores.items():
-        # Ensure at least 1 question if score is decent, else proportional
-        count = int((score / total_priority) * total_questions)
-        allocation[topic] = max(1, count) if score > 0.1 else 0
-        
-    return allocation
+def _allocation_bounds(priority_scores, min_per_topic, max_per_topic, min_score):
+    """
+    Per-topic question bounds: topics scoring at or below `min_score` are excluded
+    (unless every topic is), the rest get at least `min_per_topic`.
+    """
+    eligible = {t for t, s in priority_scores.items() if s > min_score} or set(priority_scores)
+    minimum = {t: min_per_topic for t in eligible}
+    maximum = {t: 0 for t in priority_scores if t not in eligible}
+    if max_per_topic is not None:
+        maximum.update({t: max_per_topic for t in eligible})
+    return minimum, maximum
 
-def analyze_syllabus_and_pyqs(syllabus_text, pyq_paths, api_key, reference_text=None):
-    client = Groq(api_key=api_key)
-    
-    # 1. Parse Syllabus
-    syllabus_topics = parse_and_clean_syllabus(syllabus_text, api_key=api_key)
+def calculate_allocation(priority_scores, total_questions=10, min_per_topic=1, max_per_topic=None, min_score=0.1):
+    """
+    Distributes `total_questions` across topics with bounded largest-remainder
+    apportionment, so the counts always add up to `total_questions`.
+    """
+    if not priority_scores:
+        return {}
+    from services.allocator import allocate_topics  # NumPy, loaded on first allocation
+
+    minimum, maximum = _allocation_bounds(priority_scores, min_per_topic, max_per_topic, min_score)
+    return allocate_topics(priority_scores, total_questions, minimum, maximum)
+
+def calculate_section_allocation(priority_scores, paper_pattern, min_per_topic=1, max_per_topic=None, min_score=0.1):
+    """
+    Assigns every section's questions in `paper_pattern` to topics, honouring section
+    totals and marks per question.
+    Returns ({section: {topic: count}}, {topic: count}).
+    """
+    if not priority_scores or not paper_pattern:
+        return {}, {}
+    from services.allocator import allocate_sections, summarize_sections
+
+    minimum, maximum = _allocation_bounds(priority_scores, min_per_topic, max_per_topic, min_score)
+    section_allocation = allocate_sections(priority_scores, paper_pattern, minimum, maximum)
+    questions, _ = summarize_sections(section_allocation, paper_pattern)
+    return section_allocation, {t: questions.get(t, 0) for t in priority_scores}
+
+def _lookup_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info):
+    """
+    Topics already resolved by the caller (syllabus PDF / known syllabus pick) or
+    found in the registry for this exact syllabus text. Returns (topics, info).
+    """
+    if not syllabus_topics and registry is not None:
+        syllabus_info = registry.lookup(text=syllabus_text)
+        record_cache("syllabus_registry", bool(syllabus_info))
+        if syllabus_info:
+            syllabus_topics = syllabus_info["topics"]
+    return syllabus_topics, syllabus_info
+
+def _register_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info):
+    """
+    Memoizes a parsed syllabus text, but only a confident deterministic parse (LLM
+    output and low-confidence parses are not stored). It is filed under a course
+    code only when the text names exactly one course.
+    """
     if not syllabus_topics:
         raise ValueError("Could not parse syllabus. Please ensure the syllabus contains module/topic names and teaching hours.")
+    if registry is None:
+        return syllabus_info
+    local = parse_syllabus_text(syllabus_text)
+    if local["topics"] != syllabus_topics or local["confidence"] < DEFAULT_MIN_CONFIDENCE:
+        return syllabus_info
+    codes = detect_course_codes(syllabus_text)
+    if len(codes) > 1:
+        return syllabus_info
+    return registry.register(syllabus_text, syllabus_topics, codes[0] if codes else None)
 
-    # 2. Analyze PYQs
+def _indexed_papers(syllabus_topics, syllabus_info, pyq_index, pyq_paths, include_indexed=False):
+    """
+    With a known syllabus, uploaded papers already in the PYQ index contribute their
+    stored counts and only new uploads need classification. With `include_indexed`
+    the frequency starts from every indexed paper of the course instead.
+    Returns (index key or None, frequency, [(pdf_path, paper_hash)] to classify).
+    """
+    index_key = course_key(syllabus_info) if (pyq_index is not None and syllabus_info) else None
     frequency = defaultdict(int)
-    
+
+    def add(counts):
+        for topic, count in counts.items():
+            if topic in syllabus_topics:
+                frequency[topic] += count
+
+    if index_key and include_indexed:
+        add(pyq_index.frequencies(index_key))
+    papers = []
     for pdf_path in pyq_paths:
-        pyq_text = extract_text_from_pdf(pdf_path)
-        # Naive splitting by '?'
-        questions = pyq_text.split("?")
-        
-        topic_list_str = ", ".join(syllabus_topics.keys())
-        
-        # Batch processing would be better but keeping it simple per logic
-        # We will process a subset to save time/tokens if needed, or all.
-        # Let's process valid looking questions.
-        
-        for q in questions:
-            if len(q.strip()) > 30:
-                prompt = f"""
-                Classify the following question into one of these topics:
-                {topic_list_str}
-
-                Question:
-                {q}
-
-                Respond ONLY with the exact topic name from the list.
-                """
-                
-                try:
-                    response = client.chat.completions.create(
-                        model="llama-3.1-8b-instant",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0,
-                        max_tokens=60
-                    )
-                    topic = response.choices[0].message.content.strip()
-                    
-                    # Fuzzy match or direct check
-                    # We'll check if the returned string contains a topic key
-                    matched = False
-                    for t in syllabus_topics:
-                        if t.lower() in topic.lower():
-                            frequency[t] += 1
-                            matched = True
-                            break
-                except Exception as e:
-                    print(f"Error classifying question: {e}")
-                    continue
+        paper_hash = file_hash(pdf_path) if index_key else None
+        if paper_hash:
+            indexed = pyq_index.paper_frequency(index_key, paper_hash)
+            record_cache("pyq_index", indexed is not None)
+            if indexed is not None:
+                if not include_indexed:
+                    add(indexed)
+                continue
+        papers.append((pdf_path, paper_hash))
+    return index_key, frequency, papers
 
+def _sample_pending(pending, syllabus_topics, reference_text, pyq_paths):
+    """
+    Under a budget, keep calls for pattern/header extraction and classify a sample
+    of questions stratified by paper instead of running unbounded.
+    """
+    budget = current_budget()
+    limit = None
+    if budget is not None:
+        all_questions = [q for _, _, questions in pending for q in questions]
+        reserve = (1 if reference_text else 0) + (1 if pyq_paths else 0)
+        calls = budget.allowance(estimate_classify_tokens(all_questions, syllabus_topics), reserve)
+        limit = None if calls is None else calls * questions_per_call()
+    return stratified_sample([questions for _, _, questions in pending], limit)
+
+def _start_checkpoint(checkpoint, pending, samples, syllabus_topics, frequency):
+    """
+    Registers the papers about to be classified with the analysis checkpoint (an
+    AnalysisRun). Returns one PaperCheckpoint (None without a checkpoint) per paper.
+    """
+    if checkpoint is None:
+        return [None] * len(pending)
+    keys = [paper_hash or file_hash(path) for path, paper_hash, _ in pending]
+    papers = [(key, os.path.basename(path), sample) for key, (path, _, _), sample in zip(keys, pending, samples)]
+    reused = checkpoint.start(syllabus_topics, papers, frequency)
+    record_cache("analysis_checkpoint", reused > 0)
+    return [checkpoint.paper(key) for key in keys]
+
+def _merge_paper(frequency, paper, result, pyq_texts, index_key, pyq_index, syllabus_info):
+    pdf_path, paper_hash, questions = paper
+    paper_frequency, classified = result
+    complete = classified == len(questions)
+    if classified and not complete:
+        # Scale the sampled counts up to the whole paper
+        scale = len(questions) / classified
+        paper_frequency = {t: round(n * scale) for t, n in paper_frequency.items()}
+    for topic, count in paper_frequency.items():
+        frequency[topic] += count
+    # Only fully classified papers go into the shared index
+    if paper_hash and complete:
+        name = os.path.basename(pdf_path)
+        pyq_index.add_paper(index_key, paper_hash, paper_frequency, name=name,
+                            year=detect_year(name, pyq_texts[pdf_path]), questions=len(questions),
+                            course_code=syllabus_info.get("course_code"))
+
+def _finish_analysis(syllabus_topics, syllabus_info, frequency, paper_pattern, extracted_header, index_key, pyq_index,
+                     matcher=None, checkpoint=None):
     # 3. Compute Priority
     priority_scores = compute_priority_scores(syllabus_topics, frequency)
-    
-    # 4. Pattern Extraction (if reference provided)
-    paper_pattern = None
-    if reference_text:
-        paper_pattern = extract_paper_pattern(reference_text, api_key)
-
-    # 5. Header Extraction (from first PYQ)
-    extracted_header = None
-    if pyq_paths:
-        try:
-            first_pyq_text = extract_text_from_pdf(pyq_paths[0])
-            extracted_header = extract_header_info(first_pyq_text, api_key)
-        except Exception as e:
-            print(f"Failed to extract header from PYQ: {e}")
 
     # 6. Allocation
-    # If pattern exists, allocation might be different (section based), 
-    # but for now we still return default_allocation for the frontend visualization
-    default_allocation = calculate_allocation(priority_scores)
+    # With a pattern, section totals and marks drive the split; the topic view is
+    # still returned as default_allocation for the frontend visualization
+    section_allocation = None
+    with span("allocation"):
+        if paper_pattern:
+            section_allocation, default_allocation = calculate_section_allocation(priority_scores, paper_pattern)
+        else:
+            default_allocation = calculate_allocation(priority_scores)
+
+    index_stats = pyq_index.stats(index_key) if index_key else None
+    budget = current_budget()
+    # How the classification labels of this analysis were mapped to topics
+    topic_resolution = dict(matcher.stats) if matcher else None
+    if topic_resolution:
+        record_topic_resolution(topic_resolution)
+        if topic_resolution["unresolved"]:
+            print(f"Unresolved classification labels: {topic_resolution['unresolved']} "
+                  f"(e.g. {topic_resolution['unresolved_labels'][:3]})")
 
     return {
         "syllabus_topics": syllabus_topics,
         "frequency": frequency,
         "priority_scores": priority_scores,
         "default_allocation": default_allocation,
+        "section_allocation": section_allocation,
         "paper_pattern": paper_pattern,
-        "extracted_header": extracted_header
+        "extracted_header": extracted_header,
+        "frequency_by_year": index_stats["by_year"] if index_stats else None,
+        # Counts over every indexed paper of the course, kept apart from `frequency`
+        "indexed_frequency": {t: n for t, n in index_stats["totals"].items() if t in syllabus_topics} if index_stats else None,
+        "syllabus": {k: syllabus_info.get(k) for k in ("id", "course_code", "version", "source")} if syllabus_info else None,
+        "topic_resolution": topic_resolution,
+        "analysis_id": checkpoint.analysis_id if checkpoint else None,
+        "resumed_questions": checkpoint.reused if checkpoint else 0,
+        "budget_exhausted": bool(budget and budget.exhausted),
+        "budget": budget.to_dict() if budget else None
     }
 
-def extract_paper_pattern(text, api_key):
+def _pattern_task(reference_text, api_key):
+    with span("pattern_extraction"):
+        return extract_paper_pattern(reference_text, api_key)
+
+def _header_task(first_pyq_text, api_key):
+    # `first_pyq_text` is the future of the first PYQ's text extraction
+    try:
+        text = first_pyq_text.result()
+        with span("header_extraction"):
+            return extract_header_info(text, api_key)
+    except Exception as e:
+        print(f"Failed to extract header from PYQ: {e}")
+        return None
+
+def _classification_task(client, sample, syllabus_topics, matcher, checkpoint):
+    with span("classification"):
+        return classify_questions(client, sample, syllabus_topics, matcher=matcher, checkpoint=checkpoint)
+
+def analyze_syllabus_and_pyqs(syllabus_text, pyq_paths, api_key, reference_text=None, syllabus_topics=None,
+                              registry=None, syllabus_info=None, pyq_index=None, checkpoint=None,
+                              include_indexed=False):
     """
-    Uses LLM to deduce the exam pattern from a reference paper text.
+    Runs the analysis as a task graph: syllabus parsing, pattern extraction, header
+    extraction and PYQ text extraction start together; only classification waits,
+    on the topic list and the paper texts. Takes about as long as the slowest branch.
+    With a `checkpoint` (checkpoints.AnalysisRun) classifications are recorded as they
+    complete and reused when the same uploads are analyzed again. Frequencies count
+    the uploaded papers only, unless `include_indexed` adds the course's indexed corpus.
+    """
+    client = sync_client(api_key)
+    pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+    def submit(func, *args):
+        # Worker threads do not inherit contextvars: carry the request budget and metrics
+        return pool.submit(contextvars.copy_context().run, func, *args)
+
+    try:
+        # With already known topics the PYQ index tells up front which papers need reading
+        syllabus_topics, syllabus_info = _lookup_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info)
+        papers = None
+        if syllabus_topics:
+            index_key, frequency, papers = _indexed_papers(syllabus_topics, syllabus_info, pyq_index, pyq_paths,
+                                                           include_indexed)
+
+        # Independent branches, started at once
+        extract_paths = [path for path, _ in papers] if papers is not None else pyq_paths
+        texts = {path: submit(extract_text_from_pdf, path) for path in dict.fromkeys(extract_paths)}
+        pattern = submit(_pattern_task, reference_text, api_key) if reference_text else None
+        header = None
+        if pyq_paths:
+            first_pyq_text = texts.get(pyq_paths[0]) or submit(extract_text_from_pdf, pyq_paths[0])
+            header = submit(_header_task, first_pyq_text, api_key)
+
+        # 1. Parse Syllabus (on this thread, overlapping the branches above)
+        if not syllabus_topics:
+            with span("syllabus_parse"):
+                syllabus_topics = parse_and_clean_syllabus(syllabus_text, api_key=api_key)
+            syllabus_info = _register_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info)
+            index_key, frequency, papers = _indexed_papers(syllabus_topics, syllabus_info, pyq_index, pyq_paths,
+                                                           include_indexed)
+
+        # 2. Analyze PYQs: needs the topics and the texts; papers are classified concurrently
+        pyq_texts = {path: texts[path].result() for path, _ in papers}
+        pending = [(path, paper_hash, split_questions(pyq_texts[path])) for path, paper_hash in papers]
+        samples = _sample_pending(pending, syllabus_topics, reference_text, pyq_paths)
+        matcher = TopicMatcher(syllabus_topics)
+        paper_checkpoints = _start_checkpoint(checkpoint, pending, samples, syllabus_topics, frequency)
+        classifications = [submit(_classification_task, client, sample, syllabus_topics, matcher, paper_checkpoint)
+                           for sample, paper_checkpoint in zip(samples, paper_checkpoints)]
+        for paper, result in zip(pending, classifications):
+            _merge_paper(frequency, paper, result.result(), pyq_texts, index_key, pyq_index, syllabus_info)
+
+        # 4. Pattern Extraction and 5. Header Extraction, most likely done by now
+        paper_pattern = pattern.result() if pattern else None
+        extracted_header = header.result() if header else None
+        if checkpoint:
+            checkpoint.finish()
+    finally:
+        # On errors, don't wait for branches whose results are no longer needed
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return _finish_analysis(syllabus_topics, syllabus_info, frequency, paper_pattern, extracted_header,
+                            index_key, pyq_index, matcher, checkpoint)
+
+async def analyze_syllabus_and_pyqs_async(syllabus_text, pyq_paths, api_key, reference_text=None, syllabus_topics=None,
+                                          registry=None, syllabus_info=None, pyq_index=None, pdf_executor=None,
+                                          checkpoint=None, include_indexed=False):
+    """
+    analyze_syllabus_and_pyqs() for the ASGI app, with the same task graph as
+    asyncio tasks: PDF text extraction runs in `pdf_executor` (a process pool; a
+    worker thread if None) and classification calls are issued concurrently.
     """
-    client = Groq(api_key=api_key)
-    prompt = f"""
+    loop = asyncio.get_running_loop()
+    client = async_client(api_key)
+
+    async def extract(path):
+        with span("pdf_parse"):
+            return await loop.run_in_executor(pdf_executor, extract_text_from_pdf, path)
+
+    async def pattern():
+        with span("pattern_extraction"):
+            return await extract_paper_pattern_async(reference_text, api_key)
+
+    async def header(first_pyq_text):
+        try:
+            text = await first_pyq_text
+            with span("header_extraction"):
+                return await extract_header_info_async(text, api_key)
+        except Exception as e:
+            print(f"Failed to extract header from PYQ: {e}")
+            return None
+
+    # Tasks copy the current context, so budget and metrics follow them
+    syllabus_topics, syllabus_info = _lookup_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info)
+    papers = None
+    if syllabus_topics:
+        index_key, frequency, papers = _indexed_papers(syllabus_topics, syllabus_info, pyq_index, pyq_paths,
+                                                       include_indexed)
+
+    extract_paths = [path for path, _ in papers] if papers is not None else pyq_paths
+    texts = {path: asyncio.ensure_future(extract(path)) for path in dict.fromkeys(extract_paths)}
+    pattern_task = asyncio.ensure_future(pattern()) if reference_text else None
+    header_task = None
+    if pyq_paths:
+        first_pyq_text = texts.get(pyq_paths[0]) or asyncio.ensure_future(extract(pyq_paths[0]))
+        header_task = asyncio.ensure_future(header(first_pyq_text))
+    branches = [task for task in [pattern_task, header_task, *texts.values()] if task is not None]
+
+    try:
+        # 1. Parse Syllabus
+        if not syllabus_topics:
+            with span("syllabus_parse"):
+                syllabus_topics = await parse_and_clean_syllabus_async(syllabus_text, api_key=api_key)
+            syllabus_info = _register_syllabus(syllabus_text, syllabus_topics, registry, syllabus_info)
+            index_key, frequency, papers = _indexed_papers(syllabus_topics, syllabus_info, pyq_index, pyq_paths,
+                                                           include_indexed)
+
+        # 2. Analyze PYQs
+        pyq_texts = {path: await texts[path] for path, _ in papers}
+        pending = [(path, paper_hash, split_questions(pyq_texts[path])) for path, paper_hash in papers]
+        samples = _sample_pending(pending, syllabus_topics, reference_text, pyq_paths)
+        matcher = TopicMatcher(syllabus_topics)
+        paper_checkpoints = _start_checkpoint(checkpoint, pending, samples, syllabus_topics, frequency)
+        with span("classification"):
+            results = await asyncio.gather(*(classify_questions_async(client, sample, syllabus_topics, matcher=matcher,
+                                                                      checkpoint=paper_checkpoint)
+                                             for sample, paper_checkpoint in zip(samples, paper_checkpoints)))
+        for paper, result in zip(pending, results):
+            _merge_paper(frequency, paper, result, pyq_texts, index_key, pyq_index, syllabus_info)
+
+        # 4. Pattern Extraction and 5. Header Extraction
+        paper_pattern = await pattern_task if pattern_task else None
+        extracted_header = await header_task if header_task else None
+        if checkpoint:
+            checkpoint.finish()
+    finally:
+        for task in branches:
+            task.cancel()
+
+    return _finish_analysis(syllabus_topics, syllabus_info, frequency, paper_pattern, extracted_header,
+                            index_key, pyq_index, matcher, checkpoint)
+
+def _pattern_prompt(text):
+    return f"""
     Analyze the following exam paper text and extract the **Structure/Pattern**.
     
     **Text:**
@@ -230,11 +739,16 @@ def extract_paper_pattern(text, api_key):
     4. Estimate reasonable values if distinct sections aren't explicitly labeled but pattern is clear from marks distribution.
     5. Return ONLY VALID JSON.
     """
-    
+
+def extract_paper_pattern(text, api_key):
+    """
+    Uses LLM to deduce the exam pattern from a reference paper text.
+    """
+    client = sync_client(api_key)
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+        response = chat_completion(
+            client, "pattern",
+            messages=[{"role": "user", "content": _pattern_prompt(text)}],
             temperature=0,
             max_tokens=1500,
             response_format={"type": "json_object"}
@@ -245,12 +759,22 @@ def extract_paper_pattern(text, api_key):
         print(f"Pattern Extraction Failed: {e}")
         return None
 
-def extract_header_info(text, api_key):
-    """
-    Extracts the exam header information from the text.
-    """
-    client = Groq(api_key=api_key)
-    prompt = f"""
+async def extract_paper_pattern_async(text, api_key):
+    try:
+        response = await chat_completion_async(
+            async_client(api_key), "pattern",
+            messages=[{"role": "user", "content": _pattern_prompt(text)}],
+            temperature=0,
+            max_tokens=1500,
+            response_format={"type": "json_object"}
+        )
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        print(f"Pattern Extraction Failed: {e}")
+        return None
+
+def _header_prompt(text):
+    return f"""
     Extract the **Exam Header Information** from the following text (first page of a question paper).
     
     **Text:**
@@ -267,11 +791,29 @@ def extract_header_info(text, api_key):
     Just the text, plain and simple, centered-style (no markdown alignment syntax).
     If you can't find specific details, just return what looks like the header.
     """
-    
+
+def extract_header_info(text, api_key):
+    """
+    Extracts the exam header information from the text.
+    """
+    client = sync_client(api_key)
+    try:
+        response = chat_completion(
+            client, "header",
+            messages=[{"role": "user", "content": _header_prompt(text)}],
+            temperature=0.1,
+            max_tokens=200
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Header Extraction Failed: {e}")
+        return None
+
+async def extract_header_info_async(text, api_key):
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
+        response = await chat_completion_async(
+            async_client(api_key), "header",
+            messages=[{"role": "user", "content": _header_prompt(text)}],
             temperature=0.1,
             max_tokens=200
         )
@@ -0,0 +1,192 @@
+"""
+Per-request budget for Groq usage: max LLM calls, max tokens and a wall-clock deadline.
+
+A Budget is bound to the current request with budget_scope(); services.llm reserves
+a call and its estimated tokens before every call (under the budget's lock, so
+concurrent calls cannot all slip through) and settles the reservation with the
+actual usage afterwards. When it runs out, calls raise
+BudgetExhausted and the services return partial-but-valid results.
+
+Defaults come from BUDGET_MAX_CALLS, BUDGET_MAX_TOKENS and BUDGET_DEADLINE_SECONDS
+(unset = unlimited); a request may tighten them but never loosen them.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("qpg_budget", default=None)
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of making an LLM call once the request budget is spent."""
+
+
+def _number(value, cast):
+    try:
+        return cast(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _tighter(default, requested):
+    if requested is None:
+        return default
+    return requested if default is None else min(default, requested)
+
+
+class Budget:
+    def __init__(self, max_calls=None, max_tokens=None, deadline_seconds=None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.deadline_seconds = deadline_seconds
+        self.calls = 0
+        self.tokens = 0
+        self.reserved_calls = 0  # calls in flight, not yet settled
+        self.reserved_tokens = 0
+        self.exhausted = False
+        self.reason = None
+        self.lock = threading.Lock()  # charged from the analysis worker threads too
+
+    @classmethod
+    def from_request(cls, max_calls=None, max_tokens=None, deadline_seconds=None):
+        """
+        Budget from the environment defaults, tightened by per-request values.
+        """
+        return cls(
+            _tighter(_number(os.getenv("BUDGET_MAX_CALLS"), int), _number(max_calls, int)),
+            _tighter(_number(os.getenv("BUDGET_MAX_TOKENS"), int), _number(max_tokens, int)),
+            _tighter(_number(os.getenv("BUDGET_DEADLINE_SECONDS"), float), _number(deadline_seconds, float)),
+        )
+
+    def remaining_seconds(self):
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def _stop(self, reason):
+        self.exhausted = True
+        self.reason = self.reason or reason
+        raise BudgetExhausted(reason)
+
+    def _check(self, tokens=0):
+        if self.max_calls is not None and self.calls + self.reserved_calls >= self.max_calls:
+            self._stop("max_calls")
+        committed = self.tokens + self.reserved_tokens
+        if self.max_tokens is not None and (committed >= self.max_tokens or committed + tokens > self.max_tokens):
+            self._stop("max_tokens")
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            self._stop("deadline")
+
+    def check(self, tokens=0):
+        """
+        Raises BudgetExhausted if another LLM call of ~`tokens` tokens is not allowed.
+        """
+        with self.lock:
+            self._check(tokens)
+
+    def reserve(self, tokens=0):
+        """
+        Claims one call and ~`tokens` tokens before sending it; raises BudgetExhausted
+        when they do not fit next to what is spent and in flight. Returns the token
+        reservation to pass to settle() or release().
+        """
+        with self.lock:
+            self._check(tokens)
+            self.reserved_calls += 1
+            self.reserved_tokens += tokens
+            return tokens
+
+    def settle(self, reserved, response):
+        """
+        Replaces a reservation with the call's actual usage (Groq `usage.total_tokens`,
+        else the reserved estimate).
+        """
+        usage = getattr(response, "usage", None)
+        with self.lock:
+            self.reserved_calls -= 1
+            self.reserved_tokens -= reserved
+            self.calls += 1
+            self.tokens += getattr(usage, "total_tokens", None) or reserved
+
+    def release(self, reserved):
+        """
+        Drops the reservation of a call that failed (failed calls are not charged).
+        """
+        with self.lock:
+            self.reserved_calls -= 1
+            self.reserved_tokens -= reserved
+
+    def allowance(self, tokens_per_call=0, reserve_calls=0):
+        """
+        How many more calls of ~`tokens_per_call` tokens fit, keeping `reserve_calls`
+        for later essential steps. None means unlimited.
+        """
+        limits = []
+        with self.lock:
+            calls = self.calls + self.reserved_calls
+            tokens = self.tokens + self.reserved_tokens
+        if self.max_calls is not None:
+            limits.append(self.max_calls - calls - reserve_calls)
+        if self.max_tokens is not None and tokens_per_call:
+            limits.append((self.max_tokens - tokens) // tokens_per_call - reserve_calls)
+        return max(0, min(limits)) if limits else None
+
+    def to_dict(self):
+        return {
+            "max_calls": self.max_calls,
+            "max_tokens": self.max_tokens,
+            "deadline_seconds": self.deadline_seconds,
+            "calls": self.calls,
+            "tokens": self.tokens,
+            "exhausted": self.exhausted,
+            "reason": self.reason,
+        }
+
+
+def current_budget():
+    return _current.get()
+
+
+@contextmanager
+def budget_scope(budget):
+    """
+    Binds `budget` to the current context for the duration of the block.
+    """
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def stratified_sample(groups, limit):
+    """
+    Picks at most `limit` items spread across `groups` (e.g. questions per paper):
+    every group gets a near-equal share, taken evenly spaced through the group so
+    each paper's whole range is represented. Returns a list of per-group lists.
+    """
+    if limit is None or limit >= sum(len(g) for g in groups):
+        return [list(g) for g in groups]
+    quotas = [0] * len(groups)
+    remaining = limit
+    open_groups = [i for i, g in enumerate(groups) if g]
+    while remaining > 0 and open_groups:
+        share = max(1, remaining // len(open_groups))
+        for i in list(open_groups):
+            take = min(share, len(groups[i]) - quotas[i], remaining)
+            quotas[i] += take
+            remaining -= take
+            if quotas[i] >= len(groups[i]):
+                open_groups.remove(i)
+            if remaining == 0:
+                break
+    sampled = []
+    for group, quota in zip(groups, quotas):
+        if quota == 0:
+            sampled.append([])
+            continue
+        step = len(group) / quota
+        sampled.append([group[int(k * step)] for k in range(quota)])
+    return sampled
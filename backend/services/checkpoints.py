@@ -0,0 +1,237 @@
+"""
+Checkpoints of in-progress analyses, so a failed or interrupted /api/analyze
+resumes instead of starting over.
+
+A run is keyed by its uploads (syllabus fingerprint + PYQ file hashes), or by an
+id the client picks to poll progress before the first response, and stored as one
+JSON file under data/analysis_checkpoints/. Every classified
+question's topic is recorded per paper as soon as its LLM call returns, and
+written to disk at most every CHECKPOINT_FLUSH_SECONDS (default 2) and when each
+paper is done, so a retry of the same uploads only classifies what is left, and
+the partial frequency table of a run can be read while it is still going.
+
+Labels are only reused for the same topic list; runs untouched for
+CHECKPOINT_TTL_HOURS (default 72) are pruned.
+"""
+import hashlib
+import os
+import threading
+import time
+from services.pyq_index import file_hash
+from services.storage import data_path, load_json, save_json_atomic
+from services.syllabus_registry import syllabus_fingerprint
+
+DEFAULT_CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", data_path("analysis_checkpoints"))
+CHECKPOINT_TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", 72))
+CHECKPOINT_FLUSH_SECONDS = float(os.getenv("CHECKPOINT_FLUSH_SECONDS", 2))
+
+
+def valid_id(analysis_id):
+    return bool(analysis_id) and 8 <= len(analysis_id) <= 64 and all(c in "0123456789abcdef" for c in analysis_id)
+
+
+def analysis_key(syllabus_text, pyq_paths, requested_id=None):
+    """
+    Id of an analysis: `requested_id` when it is a valid client id (8-64 lowercase hex
+    characters, e.g. a uuid4 hex), else derived from the uploads, so the same syllabus
+    and PYQs always map to the same run.
+    """
+    if valid_id(requested_id):
+        return requested_id
+    digest = hashlib.sha256(syllabus_fingerprint(syllabus_text).encode("ascii"))
+    for paper_hash in sorted(file_hash(path) for path in pyq_paths):
+        digest.update(paper_hash.encode("ascii"))
+    return digest.hexdigest()[:32]
+
+
+def question_key(question):
+    return hashlib.sha1(" ".join(question.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def topics_key(syllabus_topics):
+    return hashlib.sha256("\n".join(sorted(syllabus_topics)).encode("utf-8")).hexdigest()[:16]
+
+
+class PaperCheckpoint:
+    """
+    Recorded classifications of one paper of a run.
+    """
+
+    def __init__(self, run, paper_key):
+        self.run = run
+        self.paper_key = paper_key
+
+    def labels(self, questions):
+        """
+        {question: topic or None} for the questions already classified.
+        """
+        known = self.run.data["papers"][self.paper_key]["labels"]
+        return {q: known[question_key(q)] for q in questions if question_key(q) in known}
+
+    def record(self, pairs):
+        """
+        Stores (question, topic or None) results; the run is saved every
+        CHECKPOINT_FLUSH_SECONDS at most.
+        """
+        self.run.record(self.paper_key, pairs)
+
+    def flush(self):
+        self.run.flush()
+
+
+class AnalysisRun:
+    def __init__(self, store, analysis_id, data):
+        self.store = store
+        self.analysis_id = analysis_id
+        self.data = data
+        self.reused = 0
+        self.users = 0  # open() calls not yet closed, guarded by the store's lock
+        self.dirty = False
+        self.saved_at = 0
+        self.lock = threading.Lock()
+
+    def _save(self):
+        self.data["updated_at"] = int(time.time())
+        save_json_atomic(self.store.path_for(self.analysis_id), self.data)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def start(self, syllabus_topics, papers, indexed_frequency=None):
+        """
+        Begins (or resumes) classification. `papers` are (paper_key, name, questions
+        to classify); labels recorded for another topic list are dropped.
+        Returns the number of questions whose labels are reused.
+        """
+        with self.lock:
+            key = topics_key(syllabus_topics)
+            if self.data.get("topics_key") != key:
+                self.data["papers"] = {}
+            self.data.update(topics_key=key, status="running", error=None,
+                             indexed_frequency={t: n for t, n in (indexed_frequency or {}).items() if n})
+            reused = 0
+            for paper_key, name, questions in papers:
+                paper = self.data["papers"].setdefault(paper_key, {"name": name, "labels": {}})
+                paper["questions"] = len(questions)
+                reused += sum(1 for q in questions if question_key(q) in paper["labels"])
+            self.reused = reused
+            self._save()
+            return reused
+
+    def paper(self, paper_key):
+        return PaperCheckpoint(self, paper_key)
+
+    def record(self, paper_key, pairs):
+        with self.lock:
+            labels = self.data["papers"][paper_key]["labels"]
+            for question, topic in pairs:
+                labels[question_key(question)] = topic
+            self.dirty = True
+            if time.monotonic() - self.saved_at >= CHECKPOINT_FLUSH_SECONDS:
+                self._save()
+
+    def flush(self):
+        """
+        Saves labels recorded since the last save.
+        """
+        with self.lock:
+            if self.dirty:
+                self._save()
+
+    def finish(self):
+        with self.lock:
+            self.data["status"] = "complete"
+            self._save()
+
+    def fail(self, error):
+        with self.lock:
+            self.data.update(status="failed", error=str(error))
+            self._save()
+
+    def progress(self):
+        with self.lock:
+            return progress_of(self.analysis_id, self.data)
+
+
+def progress_of(analysis_id, data):
+    """
+    Status, per-paper progress and the partial frequency table (indexed papers plus
+    the questions classified so far) of a run.
+    """
+    frequency = dict(data.get("indexed_frequency") or {})
+    papers = []
+    for paper in data.get("papers", {}).values():
+        for topic in paper["labels"].values():
+            if topic:
+                frequency[topic] = frequency.get(topic, 0) + 1
+        papers.append({"name": paper.get("name"), "questions": paper.get("questions", 0),
+                       "classified": len(paper["labels"])})
+    return {
+        "analysis_id": analysis_id,
+        "status": data.get("status"),
+        "error": data.get("error"),
+        "updated_at": data.get("updated_at"),
+        "papers": papers,
+        "frequency": frequency,
+    }
+
+
+class CheckpointStore:
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, ttl_hours=CHECKPOINT_TTL_HOURS):
+        self.directory = directory
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._runs = {}  # analysis runs in progress in this process
+
+    def path_for(self, analysis_id):
+        return os.path.join(self.directory, f"{analysis_id}.json")
+
+    def open(self, analysis_id):
+        """
+        The run for `analysis_id`, with whatever an earlier attempt recorded.
+        Concurrent requests for the same id share one run; each must close() it.
+        """
+        with self._lock:
+            run = self._runs.get(analysis_id)
+            if run is None:
+                self._prune()
+                data = load_json(self.path_for(analysis_id), {})
+                data.setdefault("papers", {})
+                run = AnalysisRun(self, analysis_id, data)
+                self._runs[analysis_id] = run
+            run.users += 1
+            return run
+
+    def close(self, run):
+        """
+        Saves `run` and, once its last user has closed it, stops tracking it.
+        """
+        run.flush()
+        with self._lock:
+            run.users -= 1
+            if run.users <= 0 and self._runs.get(run.analysis_id) is run:
+                del self._runs[run.analysis_id]
+
+    def progress(self, analysis_id):
+        """
+        Progress of a run (live if it is running in this process), or None if unknown.
+        """
+        if not valid_id(analysis_id):
+            return None
+        with self._lock:
+            run = self._runs.get(analysis_id)
+        if run is not None:
+            return run.progress()
+        data = load_json(self.path_for(analysis_id), None)
+        return progress_of(analysis_id, data) if data else None
+
+    def _prune(self):
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json") and name[:-5] not in self._runs and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -1,15 +1,25 @@
-from groq import Groq
+from services.budget import BudgetExhausted
+from services.llm import LLM_CONCURRENCY, async_client, chat_completion, chat_completion_async, sync_client
+from services.metrics import record_cache, timed
 
+import asyncio
+import hashlib
+import json
 import random
 
-def generate_paper_content(allocation, api_key, paper_pattern=None, priority_scores=None):
+def section_key(*parts):
     """
-    Generates question paper.
-    If paper_pattern is provided, follows that structure.
-    Otherwise uses topic allocation.
+    Cache key of one generated section: a digest of everything its prompt depends on.
     """
-    client = Groq(api_key=api_key)
-    final_questions = []
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def plan_paper(allocation, paper_pattern=None, priority_scores=None, section_allocation=None):
+    """
+    Splits a paper into independently generated units, in output order.
+    Each unit is a dict with "key", "heading", "prompt", "max_tokens" and "kind".
+    """
+    units = []
 
     # MODE 1: Strict Pattern Matching (Reference Paper)
     if paper_pattern and priority_scores:
@@ -23,7 +33,12 @@ def generate_paper_content(allocation, api_key, paper_pattern=None, priority_sco
             
             # Select topics for this section (weighted random to favor high priority)
             # Simple approach: Cycle through top topics or pick random from top 50%
-            section_content = f"## {section_name} ({desc} - {marks} Marks each)\n"
+            section_topics = (section_allocation or {}).get(section_name)
+            if section_topics:
+                count = sum(section_topics.values())
+                topics_line = ', '.join(f"{t} ({n} question{'s' if n > 1 else ''})" for t, n in section_topics.items())
+            else:
+                topics_line = f"{', '.join(top_topics[:min(len(top_topics), 10)])}... (Focus on these)"
             
             # Generate in batches or single prompt
             prompt = f"""
@@ -31,30 +46,25 @@ def generate_paper_content(allocation, api_key, paper_pattern=None, priority_sco
             
             **Structure**: {desc}
             **Marks per Question**: {marks}
-            **Topics to Cover**: {', '.join(top_topics[:min(len(top_topics), 10)])}... (Focus on these)
+            **Topics to Cover**: {topics_line}
             
             **Rules**:
             1. Strictly follow the question type (MCQ, Short, Long) implied by the description.
             2. Use the provided topics.
             3. Format clearly.
             """
-            
-            try:
-                response = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                section_content += response.choices[0].message.content + "\n\n"
-                final_questions.append(section_content)
-            except Exception as e:
-                final_questions.append(f"## {section_name}\n[Error: {e}]\n")
-                
-        return "\n".join(final_questions)
+            units.append({
+                "kind": "section",
+                "name": section_name,
+                "key": section_key("section", section_name, desc, marks, count, topics_line),
+                "heading": f"## {section_name} ({desc} - {marks} Marks each)\n",
+                "prompt": prompt,
+                "max_tokens": 1000,
+            })
+        return units
 
     # MODE 2: Default Allocation (Original)
-    for topic, count in allocation.items():
+    for topic, count in (allocation or {}).items():
         if count > 0:
             prompt = f"""
             Generate {count} new exam questions for topic: {topic}
@@ -66,16 +76,121 @@ def generate_paper_content(allocation, api_key, paper_pattern=None, priority_sco
             - Professional formatting
             - Include marks for each question
             """
+            units.append({
+                "kind": "topic",
+                "name": topic,
+                "key": section_key("topic", topic, count),
+                "heading": f"## Topic: {topic}\n",
+                "prompt": prompt,
+                "max_tokens": 800,
+            })
+    return units
+
+
+def _unit_text(unit, content):
+    if unit["kind"] == "section":
+        return unit["heading"] + content + "\n\n"
+    return unit["heading"] + content
+
+
+def _unit_error(unit, error):
+    if isinstance(error, BudgetExhausted):
+        if unit["kind"] == "section":
+            return f"## {unit['name']}\n[Skipped: request budget exhausted]\n"
+        return f"## Topic: {unit['name']}\n[Skipped: request budget exhausted]"
+    if unit["kind"] == "section":
+        return f"## {unit['name']}\n[Error: {error}]\n"
+    return f"## Topic: {unit['name']}\n[Error generating questions: {error}]"
+
+
+def generate_unit(client, unit):
+    """
+    Generates one unit. Returns (text, ok); failed units are rendered as markers
+    and are not cached.
+    """
+    try:
+        response = chat_completion(
+            client, "generate",
+            messages=[{"role": "user", "content": unit["prompt"]}],
+            temperature=0.7,
+            max_tokens=unit["max_tokens"]
+        )
+        return _unit_text(unit, response.choices[0].message.content), True
+    except Exception as e:
+        return _unit_error(unit, e), False
+
+
+async def generate_unit_async(client, unit):
+    try:
+        response = await chat_completion_async(
+            client, "generate",
+            messages=[{"role": "user", "content": unit["prompt"]}],
+            temperature=0.7,
+            max_tokens=unit["max_tokens"]
+        )
+        return _unit_text(unit, response.choices[0].message.content), True
+    except Exception as e:
+        return _unit_error(unit, e), False
+
+
+def _cached_unit(section_cache, unit):
+    if section_cache is None:
+        return None
+    cached = section_cache.get(unit["key"])
+    record_cache("draft_section", cached is not None)
+    return cached
+
+
+def _join_units(units, texts):
+    separator = "\n" if units and units[0]["kind"] == "section" else "\n\n"
+    return separator.join(texts)
+
+
+@timed("generation")
+def generate_paper_content(allocation, api_key, paper_pattern=None, priority_scores=None, section_allocation=None,
+                           section_cache=None):
+    """
+    Generates question paper.
+    If paper_pattern is provided, follows that structure.
+    Otherwise uses topic allocation.
+    section_allocation ({section: {topic: count}}) pins the topics of each section.
+    section_cache ({unit key: text}, e.g. a taken speculative draft) is reused for
+    every section whose inputs are unchanged and filled in with newly generated ones.
+    """
+    client = sync_client(api_key)
+    units = plan_paper(allocation, paper_pattern, priority_scores, section_allocation)
+    texts = []
+    for unit in units:
+        cached = _cached_unit(section_cache, unit)
+        if cached is not None:
+            texts.append(cached)
+            continue
+        text, ok = generate_unit(client, unit)
+        if ok and section_cache is not None:
+            section_cache[unit["key"]] = text
+        texts.append(text)
+    return _join_units(units, texts)
+
+
+@timed("generation")
+async def generate_paper_content_async(allocation, api_key, paper_pattern=None, priority_scores=None,
+                                       section_allocation=None, section_cache=None, concurrency=None):
+    """
+    generate_paper_content() for the ASGI app: all sections are generated
+    concurrently (at most `concurrency` calls in flight) on a shared AsyncGroq client.
+    """
+    client = async_client(api_key)
+    semaphore = asyncio.Semaphore(concurrency or LLM_CONCURRENCY)
+    units = plan_paper(allocation, paper_pattern, priority_scores, section_allocation)
+
+    async def generate(unit):
+        cached = _cached_unit(section_cache, unit)
+        if cached is not None:
+            return cached
+        async with semaphore:
+            text, ok = await generate_unit_async(client, unit)
+        if ok and section_cache is not None:
+            section_cache[unit["key"]] = text
+        return text
 
-            try:
-                response = client.chat.completions.create(
-                    model="llama-3.1-8b-instant",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=800
-                )
-                final_questions.append(f"## Topic: {topic}\n" + response.choices[0].message.content)
-            except Exception as e:
-                final_questions.append(f"## Topic: {topic}\n[Error generating questions: {e}]")
-
-    return "\n\n".join(final_questions)
+    return _join_units(units, await asyncio.gather(*(generate(unit) for unit in units)))
@@ -0,0 +1,98 @@
+"""
+Header image pipeline for pdf_maker.
+
+The logo uploaded by the frontend (base64 / data URL) is decoded once,
+downscaled to what a 40mm wide print needs at HEADER_IMAGE_DPI (default 300),
+flattened onto white (fpdf cannot embed alpha channels) and stored as a JPEG
+named by the content hash of the upload. Repeat renders with the same logo reuse
+the processed file, and fpdf registers it once per document (its image table is
+keyed by file name), however many pages repeat the header.
+
+Uses PyMuPDF, already a backend dependency, for decoding and scaling.
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from services.metrics import record_cache, span
+
+PRINT_WIDTH_MM = 40
+HEADER_IMAGE_DPI = int(os.getenv("HEADER_IMAGE_DPI", 300))
+CACHE_DIR = os.getenv("HEADER_IMAGE_DIR") or os.path.join(tempfile.gettempdir(), "qpg-header-images")
+MAX_CACHED_IMAGES = int(os.getenv("HEADER_IMAGE_CACHE_FILES", 256))
+
+
+def target_width(width_mm=PRINT_WIDTH_MM, dpi=HEADER_IMAGE_DPI):
+    return max(1, round(width_mm / 25.4 * dpi))
+
+
+def _payload(header_image_data):
+    # Remove header if present (e.g., "data:image/png;base64,")
+    return header_image_data.split(",", 1)[1] if "," in header_image_data else header_image_data
+
+
+def process_image(image_bytes, max_width=None):
+    """
+    Decodes any image PyMuPDF understands and returns JPEG bytes at most
+    `max_width` pixels wide, flattened onto a white background.
+    """
+    import fitz
+    import numpy as np
+
+    max_width = max_width or target_width()
+    pix = fitz.Pixmap(image_bytes)
+    if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    if pix.width > max_width:
+        pix = fitz.Pixmap(pix, max_width, max(1, round(pix.height * max_width / pix.width)), None)
+    if pix.alpha:
+        # MuPDF samples are premultiplied: over white, colour = sample + 255 * (1 - alpha)
+        pixels = np.frombuffer(pix.samples, dtype=np.uint8)
+        pixels = pixels.reshape(pix.height, pix.width, pix.n).astype(np.uint16)
+        flat = np.minimum(pixels[..., :-1] + (255 - pixels[..., -1:]), 255).astype(np.uint8)
+        pix = fitz.Pixmap(pix.colorspace, pix.width, pix.height, flat.tobytes(), 0)
+    return pix.tobytes("jpg", jpg_quality=90)
+
+
+def _prune(directory, keep):
+    files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".jpg")]
+    if len(files) <= keep:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def header_image_path(header_image_data, cache_dir=None):
+    """
+    Path of the processed header image for a base64 upload, processing it on first
+    use only. Returns None if the data cannot be decoded as an image.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    payload = _payload(header_image_data).strip()
+    path = os.path.join(cache_dir, hashlib.sha256(payload.encode("ascii", "ignore")).hexdigest()[:32] + ".jpg")
+    try:
+        os.utime(path)  # marks it recently used for _prune()
+    except OSError:
+        record_cache("header_image", False)  # not cached, or pruned by another request meanwhile
+    else:
+        record_cache("header_image", True)
+        return path
+
+    try:
+        with span("header_image"):
+            processed = process_image(base64.b64decode(payload))
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(processed)
+    os.replace(tmp_path, path)  # content-addressed: concurrent writers produce the same file
+    _prune(cache_dir, MAX_CACHED_IMAGES)
+    return path
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from services.budget import current_budget
+from services.metrics import record_llm_call, record_model_fallback
+from services.model_router import model_chain
+
+# Upper bound on concurrent LLM calls issued by one async service call
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 16))
+
+_async_clients = {}
+
+
+def sync_client(api_key):
+    """
+    Groq client for the synchronous services. The SDK is imported on first use, so
+    importing the services (and starting the app) does not pay for it.
+    """
+    from groq import Groq
+    return Groq(api_key=api_key)
+
+
+def async_client(api_key):
+    """
+    Shared AsyncGroq client per API key (and event loop), so concurrent requests
+    reuse one connection pool instead of opening a client per call.
+    """
+    key = (api_key, id(asyncio.get_running_loop()))
+    client = _async_clients.get(key)
+    if client is None:
+        from groq import AsyncGroq
+        if len(_async_clients) >= 256:
+            _async_clients.clear()
+        client = _async_clients[key] = AsyncGroq(api_key=api_key)
+    return client
+
+
+def estimate_tokens(call_kwargs):
+    """
+    Upper estimate of a call's total tokens: ~4 characters per prompt token plus
+    the completion limit.
+    """
+    prompt = sum(len(str(m.get("content") or "")) for m in call_kwargs.get("messages", []))
+    return prompt // 4 + (call_kwargs.get("max_tokens") or 0)
+
+
+def _attempts(task, kwargs):
+    """
+    Yields (model, call kwargs, next model or None, reservation) for each model to
+    try. With a request budget, every attempt first reserves a call and its
+    estimated tokens (raising BudgetExhausted if they do not fit); the reservation
+    is settled by _record_success() or dropped by _release().
+    """
+    models = [kwargs.pop("model")] if "model" in kwargs else model_chain(task)
+    budget = current_budget()
+    for attempt, model in enumerate(models):
+        call_kwargs = dict(kwargs, model=model)
+        reservation = None
+        if budget is not None:
+            reservation = (budget, budget.reserve(estimate_tokens(call_kwargs)))
+            remaining = budget.remaining_seconds()
+            if remaining is not None:
+                call_kwargs.setdefault("timeout", remaining)
+        next_model = models[attempt + 1] if attempt + 1 < len(models) else None
+        yield model, call_kwargs, next_model, reservation
+
+
+def _release(reservation):
+    if reservation is not None:
+        budget, tokens = reservation
+        budget.release(tokens)
+
+
+def _record_success(task, model, response, start, reservation=None):
+    record_llm_call(task, response, time.perf_counter() - start, model=model)
+    if reservation is not None:
+        budget, tokens = reservation
+        budget.settle(tokens, response)
+    return response
+
+
+def _record_failure(task, model, error, start, next_model, reservation=None):
+    """
+    Records a failed attempt; returns True if the call should fall back to `next_model`.
+    """
+    from groq import APITimeoutError, RateLimitError
+    _release(reservation)
+    record_llm_call(task, None, time.perf_counter() - start, ok=False, model=model)
+    if next_model is None or not isinstance(error, (APITimeoutError, RateLimitError)):
+        return False
+    print(f"{task}: {model} failed ({type(error).__name__}), falling back to {next_model}")
+    record_model_fallback(task, model, next_model)
+    return True
+
+
+def chat_completion(client, task, **kwargs):
+    """
+    Single entry point for Groq chat completions used by every backend service.
+    `task` names the pipeline step (e.g. "classify", "generate") for instrumentation
+    and, unless `model` is given, picks the model via services.model_router: on a
+    timeout or 429 the call falls back to the next (faster) tier.
+    Enforces the request budget, if any: raises BudgetExhausted instead of calling
+    (concurrent calls reserve their share first), and never lets a call run past the
+    budget deadline.
+    """
+    for model, call_kwargs, next_model, reservation in _attempts(task, kwargs):
+        # With a fallback available, fail fast instead of waiting out SDK retries
+        caller = client if next_model is None else client.with_options(max_retries=0)
+        start = time.perf_counter()
+        try:
+            response = caller.chat.completions.create(**call_kwargs)
+        except Exception as e:
+            if _record_failure(task, model, e, start, next_model, reservation):
+                continue
+            raise
+        except BaseException:
+            _release(reservation)  # cancelled or interrupted mid-call
+            raise
+        return _record_success(task, model, response, start, reservation)
+
+
+async def chat_completion_async(client, task, **kwargs):
+    """
+    chat_completion() for an AsyncGroq client, used by the ASGI app.
+    """
+    for model, call_kwargs, next_model, reservation in _attempts(task, kwargs):
+        caller = client if next_model is None else client.with_options(max_retries=0)
+        start = time.perf_counter()
+        try:
+            response = await caller.chat.completions.create(**call_kwargs)
+        except Exception as e:
+            if _record_failure(task, model, e, start, next_model, reservation):
+                continue
+            raise
+        except BaseException:
+            _release(reservation)  # cancelled or interrupted mid-call
+            raise
+        return _record_success(task, model, response, start, reservation)
@@ -0,0 +1,235 @@
+"""
+Lightweight in-process instrumentation for the backend.
+
+- Per-stage spans (PDF parsing, syllabus parsing, classification, ...), recorded
+  both per request (for the Server-Timing header) and in global histograms.
+- LLM call counts, latency and prompt/completion tokens from Groq `usage`.
+- Cache hit/miss counters.
+
+Everything is exported in Prometheus text format by render_prometheus().
+Set METRICS_ENABLED=0 to turn recording into no-ops, SERVER_TIMING=1 to emit
+the Server-Timing response header.
+"""
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_HELP = {
+    "qpg_stage_seconds": ("histogram", "Time spent in a pipeline stage."),
+    "qpg_http_request_seconds": ("histogram", "HTTP request duration by endpoint."),
+    "qpg_llm_seconds": ("histogram", "Groq chat completion latency by task and model."),
+    "qpg_llm_calls_total": ("counter", "Groq chat completion calls by task, model and outcome."),
+    "qpg_llm_tokens_total": ("counter", "Groq tokens by task and kind (prompt/completion)."),
+    "qpg_llm_fallbacks_total": ("counter", "Model tier fallbacks (timeout/429) by task."),
+    "qpg_cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)."),
+    "qpg_topic_resolution_total": ("counter", "Classification labels by resolution (exact/fuzzy/unresolved)."),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> float
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_request = contextvars.ContextVar("qpg_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Per-request accumulator: stage durations plus LLM call/token totals.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.llm_calls = 0
+        self.tokens = 0
+        self.lock = threading.Lock()  # stages may run concurrently (analysis task graph)
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_llm_call(self, tokens):
+        with self.lock:
+            self.llm_calls += 1
+            self.tokens += tokens
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+
+
+def start_request():
+    """
+    Starts collecting stage timings for the current request (context-local).
+    """
+    if not ENABLED:
+        return None
+    metrics = RequestMetrics()
+    _request.set(metrics)
+    return metrics
+
+
+def current_request():
+    return _request.get()
+
+
+def _record_span(name, start):
+    seconds = time.perf_counter() - start
+    observe("qpg_stage_seconds", seconds, stage=name)
+    request_metrics = _request.get()
+    if request_metrics is not None:
+        request_metrics.add_stage(name, seconds)
+
+
+@contextmanager
+def _span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, start)
+
+
+def span(name):
+    """
+    Context manager timing a pipeline stage: `with span("classification"): ...`
+    """
+    return _span(name) if ENABLED else nullcontext()
+
+
+def timed(name):
+    """
+    Decorator form of span() for plain and async functions; returns the function
+    untouched when metrics are disabled.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(task, response, seconds, ok=True, model=""):
+    """
+    Records one Groq call; token counts are read from `response.usage` when present.
+    """
+    if not ENABLED:
+        return
+    inc("qpg_llm_calls_total", task=task, model=model, status="ok" if ok else "error")
+    observe("qpg_llm_seconds", seconds, task=task, model=model)
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    if usage is not None:
+        inc("qpg_llm_tokens_total", prompt_tokens, task=task, kind="prompt")
+        inc("qpg_llm_tokens_total", completion_tokens, task=task, kind="completion")
+    request_metrics = _request.get()
+    if request_metrics is not None:
+        request_metrics.add_llm_call(prompt_tokens + completion_tokens)
+
+
+def record_model_fallback(task, from_model, to_model):
+    inc("qpg_llm_fallbacks_total", task=task, from_model=from_model, to_model=to_model)
+
+
+def record_cache(cache, hit):
+    inc("qpg_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def record_topic_resolution(stats):
+    for outcome in ("exact", "fuzzy", "unresolved"):
+        if stats.get(outcome):
+            inc("qpg_topic_resolution_total", stats[outcome], result=outcome)
+
+
+def server_timing_header(request_metrics):
+    """
+    Server-Timing value for a finished request, e.g.
+    'syllabus_parse;dur=3.1, classification;dur=812.0, llm;desc="calls=9 tokens=4100", total;dur=905.2'
+    """
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in request_metrics.stages.items()]
+    if request_metrics.llm_calls:
+        parts.append(f'llm;desc="calls={request_metrics.llm_calls} tokens={request_metrics.tokens}"')
+    parts.append(f"total;dur={request_metrics.elapsed() * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def render_prometheus():
+    """
+    All metrics in Prometheus text exposition format (version 0.0.4).
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines = []
+    for metric, (kind, help_text) in _HELP.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        if kind == "counter":
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{metric}{_format_labels(labels)} {value}")
+        else:
+            for (name, labels), hist in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(_BUCKETS, hist):
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist[-1]}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,74 @@
+"""
+Maps each LLM task to a model tier, so quality can be traded for latency per stage
+without code edits.
+
+Tiers name a Groq model and the tier to fall back to when it times out or is rate
+limited (429). Tasks default to DEFAULT_ROUTES (or a caller's own default tier) and
+can be re-routed with MODEL_ROUTES="generate=large,pattern=large"; tier models can be
+swapped with MODEL_TIER_FAST / MODEL_TIER_LARGE.
+
+Standard library only, so the Streamlit utilities and generate_paper.py can share it.
+"""
+import functools
+import os
+
+TIERS = {
+    "fast": {"model": "llama-3.1-8b-instant", "fallback": None},
+    "large": {"model": "llama-3.3-70b-versatile", "fallback": "fast"},
+}
+
+# The backend's own model for every task; larger tiers are opted into with MODEL_ROUTES
+DEFAULT_ROUTES = {
+    "syllabus_parse": "fast",
+    "classify": "fast",
+    "pattern": "fast",
+    "header": "fast",
+    "generate": "fast",
+    "chat": "fast",
+    "header_refine": "fast",
+}
+DEFAULT_TIER = "fast"
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_routes(spec):
+    routes = {}
+    for item in spec.split(","):
+        task, _, tier = item.partition("=")
+        task, tier = task.strip(), tier.strip()
+        if task and tier in TIERS:
+            routes[task] = tier
+        elif task:
+            print(f"Ignoring MODEL_ROUTES entry '{item.strip()}': unknown tier")
+    return routes
+
+
+def tier_for(task, default=None):
+    """
+    Tier name configured for a task: MODEL_ROUTES, else `default`, else DEFAULT_ROUTES.
+    """
+    return (_parse_routes(os.getenv("MODEL_ROUTES", "")).get(task) or default
+            or DEFAULT_ROUTES.get(task, DEFAULT_TIER))
+
+
+def tier_model(tier):
+    return os.getenv(f"MODEL_TIER_{tier.upper()}") or TIERS[tier]["model"]
+
+
+def model_for(task):
+    return tier_model(tier_for(task))
+
+
+def model_chain(task, default=None):
+    """
+    Models to try for a task, in order: the routed tier, then its fallbacks.
+    `default` is the caller's tier when MODEL_ROUTES does not route the task.
+    """
+    models = []
+    tier = tier_for(task, default)
+    while tier is not None and len(models) < len(TIERS):
+        model = tier_model(tier)
+        if model not in models:
+            models.append(model)
+        tier = TIERS[tier]["fallback"]
+    return models
@@ -0,0 +1,139 @@
+"""
+Markdown-ish structure of generated papers, parsed once before layout.
+
+parse_blocks() turns LLM output into a list of block dicts, rendered by pdf_maker:
+    {"type": "heading", "text"}
+    {"type": "subheading", "text"}                     # a line wrapped in **
+    {"type": "question", "lines", "options", "tail"}   # MCQ options split out
+    {"type": "table", "rows"}                          # list of cell lists
+    {"type": "bullets", "items"}
+    {"type": "paragraph", "lines"}
+    {"type": "rule"} / {"type": "gap"}
+Only the subset of markdown the generator actually produces is understood.
+"""
+import re
+
+HEADING = re.compile(r"^\s*#{1,6}\s*(.*)$")
+QUESTION = re.compile(r"^(?:\*\*)?(?:Q(?:uestion)?\s*\.?\s*\d+[.):]?|\d{1,3}\s*[.)])(?=\s|\*\*|$)", re.I)
+OPTION = re.compile(r"^\s*\(?([a-dA-D])[.)]\s+\S")
+OPTION_MARKER = re.compile(r"(?:^|\s)\(?([a-dA-D])[.)]\s+")
+BULLET = re.compile(r"^\s*[-*•]\s+(.*)$")
+RULE = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+TABLE_SEPARATOR = re.compile(r"^\|?(\s*:?-{2,}:?\s*\|)+\s*:?-{0,}:?\s*\|?$")
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def split_options(line):
+    """
+    Options of an MCQ line, splitting "a) x  b) y  c) z" written on one line.
+    Markers must run a, b, c... in order, so sub-question text is left alone.
+    """
+    markers = [m for m in OPTION_MARKER.finditer(line)]
+    expected = markers[0].group(1).lower() if markers else None
+    starts = []
+    for m in markers:
+        if m.group(1).lower() != expected:
+            continue
+        starts.append(m.start() if not line[m.start()].isspace() else m.start() + 1)
+        expected = chr(ord(expected) + 1)
+    if len(starts) < 2:
+        return [line.strip()]
+    return [line[a:b].strip() for a, b in zip(starts, starts[1:] + [len(line)])]
+
+
+def is_table_row(line):
+    stripped = line.strip()
+    return len(stripped) > 1 and stripped.startswith("|") and stripped.endswith("|")
+
+
+def is_bold_line(stripped):
+    return len(stripped) > 4 and stripped.startswith("**") and stripped.endswith("**")
+
+
+def table_cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def parse_blocks(text):
+    blocks = []
+    current = None  # block still accepting lines: paragraph, bullets, table or question
+    after_blank = False
+
+    def close():
+        nonlocal current
+        if current is not None:
+            blocks.append(current)
+            current = None
+
+    for line in text.split("\n"):
+        line = line.rstrip()
+        stripped = line.strip()
+
+        if not stripped:
+            after_blank = True
+            continue
+
+        # Options and indented sub-parts may follow a blank line inside a question;
+        # anything else after a blank line ends the block
+        continues_question = (current is not None and current["type"] == "question" and
+                              (not after_blank or OPTION.match(line) or line[0].isspace()))
+        if after_blank and not continues_question:
+            close()
+            if blocks:
+                blocks.append({"type": "gap"})
+        after_blank = False
+
+        if HEADING.match(line):
+            close()
+            blocks.append({"type": "heading", "text": HEADING.match(line).group(1).replace("*", "").strip()})
+        elif RULE.match(line):
+            close()
+            blocks.append({"type": "rule"})
+        elif is_table_row(line):
+            if current is None or current["type"] != "table":
+                close()
+                current = {"type": "table", "rows": []}
+            if not TABLE_SEPARATOR.match(stripped):
+                current["rows"].append(table_cells(line))
+        elif is_bold_line(stripped) and not QUESTION.match(line):
+            close()
+            blocks.append({"type": "subheading", "text": stripped.replace("*", "").strip()})
+        elif QUESTION.match(line):
+            # Only unindented numbers start a question; indented ones are sub-parts
+            close()
+            current = {"type": "question", "lines": [stripped], "options": [], "tail": []}
+        elif continues_question:
+            if OPTION.match(line) and not current["tail"]:
+                current["options"].extend(split_options(line))
+            elif current["options"]:
+                current["tail"].append(stripped)
+            else:
+                current["lines"].append(line)
+        elif BULLET.match(line) and not line.lstrip().startswith("**"):
+            if current is None or current["type"] != "bullets":
+                close()
+                current = {"type": "bullets", "items": []}
+            current["items"].append(BULLET.match(line).group(1))
+        else:
+            if current is None or current["type"] != "paragraph":
+                close()
+                current = {"type": "paragraph", "lines": []}
+            current["lines"].append(line)
+    close()
+    return blocks
+
+
+def bold_runs(line):
+    """
+    [(text, bold)] runs of a line with inline **bold** markup.
+    """
+    runs = []
+    position = 0
+    for m in BOLD.finditer(line):
+        if m.start() > position:
+            runs.append((line[position:m.start()], False))
+        runs.append((m.group(1), True))
+        position = m.end()
+    if position < len(line):
+        runs.append((line[position:], False))
+    return runs
@@ -0,0 +1,145 @@
+"""
+Render cache for /api/download-pdf.
+
+A rendered PDF is keyed by a hash of its inputs (paper text, college name, raw
+header text and header image bytes) and kept in memory, so repeat downloads are
+served without re-rendering or calling the LLM. Refined headers are memoized by
+their raw text, so the typesetting LLM call runs once per distinct header.
+
+PDF_CACHE_MAX_MB bounds the rendered PDFs kept in memory (default 64).
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from services.metrics import record_cache, span
+from services.header_image import header_image_path
+
+
+class LruCache:
+    """
+    Thread-safe LRU mapping bounded by entry count and/or total size (len of values).
+    """
+
+    def __init__(self, max_items=None, max_bytes=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            if self.max_bytes is not None and len(value) > self.max_bytes:
+                return
+            self.entries[key] = value
+            self.size += len(value)
+            while ((self.max_items is not None and len(self.entries) > self.max_items) or
+                   (self.max_bytes is not None and self.size > self.max_bytes)):
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def render_key(text, college_name, header_text_raw=None, header_image=None):
+    digest = hashlib.sha256()
+    for part in (text, college_name, header_text_raw or "", header_image or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class PdfRenderer:
+    def __init__(self, chat_agent, max_bytes=None, max_headers=512):
+        self.chat_agent = chat_agent
+        max_bytes = max_bytes or int(float(os.getenv("PDF_CACHE_MAX_MB", 64)) * 1024 * 1024)
+        self.pdfs = LruCache(max_bytes=max_bytes)
+        self.headers = LruCache(max_items=max_headers)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prerender")
+
+    def refined_header(self, header_text_raw, api_key):
+        """
+        Refined header for `header_text_raw`, calling the LLM only on first use.
+        """
+        polished = self.headers.get(header_text_raw)
+        record_cache("refined_header", polished is not None)
+        if polished is None:
+            polished = self.chat_agent.refine_header_text(header_text_raw, api_key)
+            if polished != header_text_raw:  # the raw text comes back when refinement failed
+                self.headers.put(header_text_raw, polished)
+        return polished
+
+    async def refined_header_async(self, header_text_raw, api_key):
+        polished = self.headers.get(header_text_raw)
+        record_cache("refined_header", polished is not None)
+        if polished is None:
+            polished = await self.chat_agent.refine_header_text_async(header_text_raw, api_key)
+            if polished != header_text_raw:
+                self.headers.put(header_text_raw, polished)
+        return polished
+
+    def render(self, text, college_name, header_text_raw=None, header_image=None, api_key=None):
+        """
+        PDF bytes for the given inputs, from the cache when they were rendered before.
+        `header_image` is the base64 (data URL) string sent by the frontend.
+        """
+        key = render_key(text, college_name, header_text_raw, header_image)
+        pdf_bytes = self.pdfs.get(key)
+        record_cache("pdf_render", pdf_bytes is not None)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+        # fpdf and the font setup are loaded with the first render, not at startup
+        from services.pdf_maker import create_pdf
+
+        polished_header = self.refined_header(header_text_raw, api_key) if header_text_raw else None
+        image_path = header_image_path(header_image) if header_image else None
+        pdf_bytes = create_pdf(text, college_name, header_image_path=image_path, header_text=polished_header)
+        self.pdfs.put(key, pdf_bytes)
+        return pdf_bytes
+
+    async def render_async(self, text, college_name, header_text_raw=None, header_image=None, api_key=None,
+                           executor=None):
+        """
+        render() for the ASGI app; the PDF itself is rendered in `executor` (a process pool).
+        """
+        key = render_key(text, college_name, header_text_raw, header_image)
+        pdf_bytes = self.pdfs.get(key)
+        record_cache("pdf_render", pdf_bytes is not None)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+        from services.pdf_maker import render_pdf
+
+        polished_header = await self.refined_header_async(header_text_raw, api_key) if header_text_raw else None
+        # Downscaled once per distinct logo; the file is shared with the render processes
+        image_path = header_image_path(header_image) if header_image else None
+        # One pdf_render span here, around the executor: render_pdf is the untimed create_pdf
+        with span("pdf_render"):
+            pdf_bytes = await asyncio.get_running_loop().run_in_executor(
+                executor, render_pdf, text, college_name, image_path, polished_header)
+        self.pdfs.put(key, pdf_bytes)
+        return pdf_bytes
+
+    def prerender(self, text, college_name, header_text_raw=None, api_key=None):
+        """
+        Renders (and refines the header) in the background so the first download is a
+        cache hit. Header images are not known yet at this point; with an image only
+        the refined header is reused.
+        """
+        def run():
+            try:
+                self.render(text, college_name, header_text_raw, None, api_key)
+            except Exception as e:
+                print(f"Pre-render failed: {e}")
+        return self.executor.submit(run)
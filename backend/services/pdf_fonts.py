@@ -0,0 +1,219 @@
+"""
+Unicode TrueType fonts for fpdf.
+
+Papers are rendered with an embedded TTF font (DejaVu Sans or similar) so math
+symbols, Greek letters and typographic quotes survive instead of turning into
+'?' under latin-1. fpdf embeds only the glyphs used (subsetting), so PDFs stay small.
+Lines the main font cannot draw (e.g. Devanagari) use a fallback font when one
+is available; fpdf 1.7 does not shape complex scripts, so conjuncts may render
+unjoined, but the characters are kept.
+
+Fonts are looked up in this order: PDF_FONT_REGULAR / PDF_FONT_BOLD /
+PDF_FONT_FALLBACK, backend/fonts/, then common system locations. Their metrics are
+parsed once per process and reused by every document. Without any font the
+callers fall back to the core latin-1 fonts.
+
+Only depends on fpdf, so the Streamlit apps can share it. It fills in fpdf's
+internal font tables directly, so fpdf is pinned to 1.7.2 in the requirements.
+"""
+import os
+import re
+import threading
+import types
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+FAMILY = "qpgsans"
+FALLBACK_FAMILY = "qpgfallback"
+
+_SYSTEM_DIRS = [
+    "/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/TTF", "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/truetype/noto", "/usr/share/fonts/noto", "/usr/share/fonts/truetype/lohit-devanagari",
+    "/Library/Fonts", "/System/Library/Fonts/Supplemental", "C:\\Windows\\Fonts",
+]
+_CANDIDATES = {
+    "regular": ("PDF_FONT_REGULAR", ["DejaVuSans.ttf", "NotoSans-Regular.ttf", "Arial Unicode.ttf", "arial.ttf"]),
+    "bold": ("PDF_FONT_BOLD", ["DejaVuSans-Bold.ttf", "NotoSans-Bold.ttf", "arialbd.ttf"]),
+    "fallback": ("PDF_FONT_FALLBACK", ["NotoSansDevanagari-Regular.ttf", "Lohit-Devanagari.ttf", "Nirmala.ttf",
+                                       "mangal.ttf"]),
+}
+
+MAX_CACHED_SUBSETS = int(os.getenv("PDF_FONT_SUBSET_CACHE", 64))
+
+_metrics = {}
+_fonts = None
+_subsets = {}
+_subsets_lock = threading.Lock()
+
+
+class GlyphSubset(list):
+    """
+    fpdf's per-font subset list, deduplicated with O(1) membership.
+    fpdf appends every character it draws (repeats included) and, when embedding,
+    tests `cid in subset` for each code point up to the highest one used: with a
+    plain list that is quadratic in the paper length.
+    """
+
+    def __init__(self, codes=()):
+        super().__init__()
+        self.members = set()
+        for code in codes:
+            self.append(code)
+
+    def append(self, code):
+        if code not in self.members:
+            self.members.add(code)
+            super().append(code)
+
+    def __contains__(self, code):
+        return code in self.members
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.members = set(self)
+
+
+def find_font(kind):
+    env_name, names = _CANDIDATES[kind]
+    if os.getenv(env_name) and os.path.exists(os.getenv(env_name)):
+        return os.getenv(env_name)
+    for directory in [FONT_DIR] + _SYSTEM_DIRS:
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def unicode_fonts():
+    """
+    {"regular", "bold", "fallback"} font paths (bold falls back to regular), or None
+    when no Unicode font is installed. Looked up once per process.
+    """
+    global _fonts
+    if _fonts is None:
+        regular = find_font("regular")
+        _fonts = {"regular": regular, "bold": find_font("bold") or regular,
+                  "fallback": find_font("fallback")} if regular else {}
+    return _fonts or None
+
+
+class SubsetCachingTTFontFile(TTFontFile):
+    """
+    TTFontFile whose makeSubset output (the embedded font program) is reused for
+    the same font and glyph set. Building a subset re-reads and checksums the
+    whole TTF in pure Python, which is most of the cost of a Unicode PDF; since
+    every subset includes printable ASCII, most papers share a handful of subsets.
+    """
+
+    def makeSubset(self, file, subset):
+        key = (file, tuple(sorted(set(subset))))
+        with _subsets_lock:
+            cached = _subsets.get(key)
+        if cached is None:
+            stream = super().makeSubset(file, subset)
+            cached = (stream, self.codeToGlyph, self.maxUni)
+            with _subsets_lock:
+                if len(_subsets) >= MAX_CACHED_SUBSETS:
+                    _subsets.pop(next(iter(_subsets)))
+                _subsets[key] = cached
+        stream, code_to_glyph, self.maxUni = cached
+        self.codeToGlyph = dict(code_to_glyph)
+        return stream
+
+
+def _with_subset_cache(method):
+    """
+    Copy of an fpdf method that builds subsets with SubsetCachingTTFontFile. fpdf
+    looks TTFontFile up in its module globals; only the copy's globals are swapped,
+    so other FPDF documents in the process are unaffected.
+    """
+    namespace = dict(method.__globals__, TTFontFile=SubsetCachingTTFontFile)
+    return types.FunctionType(method.__code__, namespace, method.__name__, method.__defaults__,
+                              method.__closure__)
+
+
+_putfonts = _with_subset_cache(FPDF._putfonts)
+
+
+def font_metrics(path):
+    """
+    Parsed metrics of a TTF file (what fpdf's add_font computes), cached per process.
+    """
+    metrics = _metrics.get(path)
+    if metrics is None:
+        ttf = TTFontFile()
+        ttf.getMetrics(path)
+        metrics = {
+            'name': re.sub('[ ()]', '', ttf.fullName),
+            'desc': {
+                'Ascent': int(round(ttf.ascent, 0)),
+                'Descent': int(round(ttf.descent, 0)),
+                'CapHeight': int(round(ttf.capHeight, 0)),
+                'Flags': ttf.flags,
+                'FontBBox': "[%s %s %s %s]" % tuple(int(round(b, 0)) for b in ttf.bbox),
+                'ItalicAngle': int(ttf.italicAngle),
+                'StemV': int(round(ttf.stemV, 0)),
+                'MissingWidth': int(round(ttf.defaultWidth, 0)),
+            },
+            'up': round(ttf.underlinePosition),
+            'ut': round(ttf.underlineThickness),
+            'cw': ttf.charWidths,
+            'originalsize': os.stat(path).st_size,
+        }
+        _metrics[path] = metrics
+    return metrics
+
+
+def register_font(pdf, family, style, path):
+    """
+    Equivalent of pdf.add_font(family, style, path, uni=True) using the cached metrics.
+    """
+    fontkey = family + style
+    if fontkey in pdf.fonts:
+        return
+    metrics = font_metrics(path)
+    # Always embeds printable ASCII: covers the digits substituted for the {nb}
+    # page-count alias, and keeps subsets (and their cache keys) stable across papers
+    subset = GlyphSubset(range(0, 127))
+    pdf.fonts[fontkey] = {
+        'i': len(pdf.fonts) + 1, 'type': 'TTF', 'name': metrics['name'], 'desc': metrics['desc'],
+        'up': metrics['up'], 'ut': metrics['ut'], 'cw': metrics['cw'], 'ttffile': path,
+        'fontkey': fontkey, 'subset': subset, 'unifilename': None,
+    }
+    pdf.font_files[fontkey] = {'length1': metrics['originalsize'], 'type': "TTF", 'ttffile': path}
+    pdf.font_files[path] = {'type': "TTF"}
+
+
+def setup_unicode_fonts(pdf):
+    """
+    Registers the Unicode font families on `pdf` (regular "" and bold "B") and makes
+    it reuse cached font subsets. Returns False, leaving `pdf` untouched, when no Unicode font is available.
+    """
+    fonts = unicode_fonts()
+    if not fonts:
+        return False
+    pdf._putfonts = types.MethodType(_putfonts, pdf)
+    register_font(pdf, FAMILY, "", fonts["regular"])
+    register_font(pdf, FAMILY, "B", fonts["bold"])
+    if fonts["fallback"]:
+        register_font(pdf, FALLBACK_FAMILY, "", fonts["fallback"])
+        register_font(pdf, FALLBACK_FAMILY, "B", fonts["fallback"])
+    return True
+
+
+def covers(path, text):
+    cw = font_metrics(path)['cw']
+    return all(ord(ch) < len(cw) and cw[ord(ch)] for ch in text if not ch.isspace())
+
+
+def family_for(text):
+    """
+    Font family to draw `text` with: the main Unicode family unless it is missing
+    glyphs that the fallback font has.
+    """
+    fonts = unicode_fonts()
+    if fonts and fonts["fallback"] and not covers(fonts["regular"], text) and covers(fonts["fallback"], text):
+        return FALLBACK_FAMILY
+    return FAMILY
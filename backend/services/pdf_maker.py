@@ -1,5 +1,27 @@
 from fpdf import FPDF
 import re
+from services.metrics import timed
+from services.pdf_fonts import family_for, setup_unicode_fonts
+from services.paper_layout import bold_runs, is_bold_line, parse_blocks
+
+LINE_HEIGHT = 6
+BULLET_INDENT = 6
+OPTION_INDENT = 8
+
+# Only needed for the core (latin-1) fonts, used when no Unicode font is installed
+LATIN1_REPLACEMENTS = {
+    '\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'",
+    '\u201c': '"', '\u201d': '"', '\u2022': '*'
+}
+
+
+def to_latin1(text):
+    if text.isascii():
+        return text
+    for k, v in LATIN1_REPLACEMENTS.items():
+        text = text.replace(k, v)
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
 
 class PDF(FPDF):
     def __init__(self, college_name="COLLEGE OF ENGINEERING", header_image_path=None, header_text=None):
@@ -7,6 +29,22 @@ class PDF(FPDF):
         self.college_name = college_name
         self.header_image_path = header_image_path
         self.header_text = header_text
+        # Embedded Unicode fonts (subset on output); core Arial + latin-1 without them
+        self.unicode_text = setup_unicode_fonts(self)
+        self.word_widths = {}
+        self.wrapped = {}
+
+    def use_font(self, style='', size=11, text=""):
+        """
+        Selects the body font for `text`: the Unicode family (or its fallback for
+        scripts it lacks), else Arial. Returns the text as it can be drawn.
+        """
+        if self.unicode_text:
+            # The Unicode families have no italic; regular is used instead
+            self.set_font(family_for(text), style.replace('I', ''), size)
+            return text
+        self.set_font('Arial', style, size)
+        return to_latin1(text)
 
     def header(self):
         # Render Header Image if provided
@@ -25,72 +63,289 @@ class PDF(FPDF):
             lines = self.header_text.split('\n')
             for i, line in enumerate(lines):
                 if i == 0:
-                    self.set_font('Arial', 'B', 16) # Primary Title
-                    self.cell(0, 8, line.strip(), 0, 1, 'C')
+                    line = self.use_font('B', 16, line.strip()) # Primary Title
+                    self.cell(0, 8, line, 0, 1, 'C')
                 elif i == 1:
-                    self.set_font('Arial', 'B', 14) # Secondary Title
-                    self.cell(0, 7, line.strip(), 0, 1, 'C')
+                    line = self.use_font('B', 14, line.strip()) # Secondary Title
+                    self.cell(0, 7, line, 0, 1, 'C')
                 else:
-                    self.set_font('Arial', 'B', 12) # Details
-                    self.cell(0, 6, line.strip(), 0, 1, 'C')
+                    line = self.use_font('B', 12, line.strip()) # Details
+                    self.cell(0, 6, line, 0, 1, 'C')
         else:
             # Fallback to old simple header
-            self.set_font('Arial', 'B', 16)
-            self.cell(0, 10, self.college_name.upper(), 0, 1, 'C')
-            self.set_font('Arial', 'B', 12)
+            college = self.use_font('B', 16, self.college_name.upper())
+            self.cell(0, 10, college, 0, 1, 'C')
+            self.use_font('B', 12)
             self.cell(0, 8, "EXAMINATION - 202X", 0, 1, 'C')
         
         # Line break
         self.set_line_width(0.5)
         self.line(10, self.get_y()+5, 200, self.get_y()+5) # Dynamic Line position
         self.ln(8)
+        self.body_top = self.get_y()
 
     def footer(self):
         # Position at 1.5 cm from bottom
         self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
+        self.use_font('I', 8)
         # Page number
         self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
 
-def create_pdf(text, college_name="COLLEGE OF ENGINEERING", header_image_path=None, header_text=None):
+    # --- Layout of parsed paper blocks (services/paper_layout.py) ---
+
+    def text_width(self):
+        return self.w - self.r_margin - self.l_margin
+
+    def word_width(self, word):
+        key = (self.font_family, self.font_style, self.font_size_pt, word)
+        width = self.word_widths.get(key)
+        if width is None:
+            width = self.word_widths[key] = self.get_string_width(word)
+        return width
+
+    def wrap(self, text, width):
+        """
+        Lines `text` wraps into at `width` in the current font, computed once per
+        document. Word widths are memoized, so measuring a block for page breaks
+        and drawing it cost one pass, not fpdf's per-character multi_cell loop.
+        """
+        key = (self.font_family, self.font_style, self.font_size_pt, width, text)
+        lines = self.wrapped.get(key)
+        if lines is not None:
+            return lines
+        width -= 2 * self.c_margin
+        space = self.word_width(' ')
+        lines = []
+        for paragraph in text.split('\n'):
+            line, used = [], 0
+            for word in paragraph.split(' '):
+                word_width = self.word_width(word)
+                if line and used + space + word_width > width:
+                    lines.append(' '.join(line))
+                    line, used = [], 0
+                while word_width > width and len(word) > 1:
+                    # A word wider than the line is broken, as multi_cell does
+                    cut = len(word) - 1
+                    while cut > 1 and self.get_string_width(word[:cut]) > width:
+                        cut -= 1
+                    lines.append(word[:cut])
+                    word = word[cut:]
+                    word_width = self.word_width(word)
+                used += (space if line else 0) + word_width
+                line.append(word)
+            lines.append(' '.join(line))
+        self.wrapped[key] = lines
+        return lines
+
+    def draw_lines(self, text, width, align='L'):
+        """
+        Draws `text` wrapped at `width` from the current position, one cell per line.
+        """
+        for line in self.wrap(text, width):
+            self.cell(width, LINE_HEIGHT, line, 0, 2, align)
+        self.set_x(self.l_margin)
+
+    def lines_height(self, lines, indent=0, style='', size=11):
+        height = 0
+        for line in lines:
+            bold = is_bold_line(line.strip())
+            if '**' in line and not bold:
+                # Written run by run (write_runs); measured as if set in bold
+                text = self.use_font('B', size, line.replace('**', ''))
+            else:
+                text = self.use_font('B' if bold else style, size, line.replace('*', '') if bold else line)
+            height += len(self.wrap(text, self.text_width() - indent)) * LINE_HEIGHT
+        return height
+
+    def write_lines(self, lines, indent=0, style='', size=11):
+        """
+        Writes text lines at `indent`. Consecutive plain lines are wrapped and drawn
+        as one run; lines with **bold** markup are written run by run.
+        """
+        batch = []
+        width = self.text_width() - indent
+
+        def flush():
+            if batch:
+                self.set_x(self.l_margin + indent)
+                self.draw_lines(self.use_font(style, size, '\n'.join(batch)), width)
+                batch.clear()
+
+        for line in lines:
+            if is_bold_line(line.strip()):
+                flush()
+                self.set_x(self.l_margin + indent)
+                self.draw_lines(self.use_font('B', size, line.replace('*', '').strip()), width)
+            elif '**' in line:
+                flush()
+                self.write_runs(line, indent, style, size)
+            else:
+                batch.append(line)
+        flush()
+
+    def write_runs(self, line, indent=0, style='', size=11):
+        # write() wraps to the left margin, so the indent is applied as a margin
+        margin = self.l_margin
+        self.set_left_margin(margin + indent)
+        self.set_x(margin + indent)
+        for text, bold in bold_runs(line):
+            self.write(LINE_HEIGHT, self.use_font('B' if bold else style, size, text))
+        self.set_left_margin(margin)
+        self.ln(LINE_HEIGHT)
+
+    def option_columns(self, options):
+        """
+        Columns for MCQ options: 4 or 2 when every option fits its column on one line.
+        """
+        if len(options) < 2:
+            return 1
+        widest = max(self.get_string_width(self.use_font('', 11, option.replace('**', ''))) for option in options)
+        for columns in (4, 2):
+            if len(options) % columns == 0 or columns == 2:
+                if widest + 2 * self.c_margin + 2 <= (self.text_width() - OPTION_INDENT) / columns:
+                    return columns
+        return 1
+
+    def table_widths(self, rows):
+        columns = max(len(row) for row in rows)
+        natural = [0] * columns
+        for i, row in enumerate(rows):
+            for c, cell in enumerate(row):
+                natural[c] = max(natural[c], self.get_string_width(self.use_font('B' if i == 0 else '', 10, cell))
+                                 + 2 * self.c_margin + 1)
+        total = sum(natural)
+        if total <= self.text_width():
+            return natural
+        return [self.text_width() * n / total for n in natural]
+
+    def table_row_height(self, row, widths, bold):
+        return max(len(self.wrap(self.use_font('B' if bold else '', 10, cell), widths[c]))
+                   for c, cell in enumerate(row)) * LINE_HEIGHT
+
+    def block_height(self, block):
+        # Measured once per render: headings look ahead at the next block
+        if 'height' not in block:
+            block['height'] = self.measure_block(block)
+        return block['height']
+
+    def measure_block(self, block):
+        kind = block['type']
+        if kind == 'heading':
+            return 10
+        if kind == 'subheading':
+            return self.lines_height([block['text']], style='B')
+        if kind == 'paragraph':
+            return self.lines_height(block['lines']) + 1
+        if kind == 'bullets':
+            return self.lines_height(block['items'], BULLET_INDENT) + 1
+        if kind == 'question':
+            height = self.lines_height(block['lines']) + self.lines_height(block['tail'], OPTION_INDENT) + 2
+            columns = self.option_columns(block['options'])
+            if columns == 1:
+                return height + self.lines_height(block['options'], OPTION_INDENT)
+            return height + -(-len(block['options']) // columns) * LINE_HEIGHT
+        if kind == 'table':
+            widths = self.table_widths(block['rows'])
+            return sum(self.table_row_height(row, widths, i == 0) for i, row in enumerate(block['rows'])) + 2
+        if kind == 'rule':
+            return 4
+        return 2
+
+    def keep_together(self, height):
+        """
+        Starts a new page when `height` does not fit on this one but fits on an empty page.
+        """
+        if self.get_y() + height > self.page_break_trigger and height <= self.page_break_trigger - self.body_top:
+            self.add_page()
+
+    def render_question(self, block):
+        self.write_lines(block['lines'])
+        columns = self.option_columns(block['options'])
+        if columns == 1:
+            self.write_lines(block['options'], OPTION_INDENT)
+        else:
+            column_width = (self.text_width() - OPTION_INDENT) / columns
+            for i, option in enumerate(block['options']):
+                if i % columns == 0:
+                    self.set_x(self.l_margin + OPTION_INDENT)
+                last = i % columns == columns - 1 or i == len(block['options']) - 1
+                self.cell(column_width, LINE_HEIGHT, self.use_font('', 11, option.replace('**', '')), 0, 1 if last else 0)
+        self.write_lines(block['tail'], OPTION_INDENT)
+        self.ln(2)
+
+    def render_table(self, block):
+        rows = block['rows']
+        widths = self.table_widths(rows)
+        self.set_line_width(0.2)
+        for i, row in enumerate(rows):
+            height = self.table_row_height(row, widths, i == 0)
+            if self.get_y() + height > self.page_break_trigger:
+                self.add_page()
+                if i > 0:  # repeat the header row
+                    self.render_table_row(rows[0], widths, self.table_row_height(rows[0], widths, True), True)
+            self.render_table_row(row, widths, height, i == 0)
+        self.ln(2)
+
+    def render_table_row(self, row, widths, height, bold):
+        x, y = self.l_margin, self.get_y()
+        for c, width in enumerate(widths):
+            self.rect(x, y, width, height)
+            self.set_xy(x, y)
+            self.draw_lines(self.use_font('B' if bold else '', 10, row[c] if c < len(row) else ''), width)
+            x += width
+        self.set_xy(self.l_margin, y + height)
+
+    def render_blocks(self, blocks):
+        for i, block in enumerate(blocks):
+            kind = block['type']
+            if kind in ('heading', 'subheading') and i + 1 < len(blocks):
+                # Keep headings with what follows (all of it when it fits on a page)
+                following = self.block_height(blocks[i + 1])
+                if following > self.page_break_trigger - self.body_top:
+                    following = 2 * LINE_HEIGHT
+                self.keep_together(self.block_height(block) + following)
+            elif kind in ('question', 'table'):
+                self.keep_together(self.block_height(block))
+
+            if kind == 'heading':
+                self.cell(0, 10, self.use_font('B', 13, block['text']), 0, 1, 'L')
+            elif kind == 'subheading':
+                self.write_lines([block['text']], style='B')
+            elif kind == 'paragraph':
+                self.write_lines(block['lines'])
+                self.ln(1)
+            elif kind == 'bullets':
+                for item in block['items']:
+                    self.set_x(self.l_margin)
+                    self.cell(BULLET_INDENT, LINE_HEIGHT, self.use_font('', 11, '\u2022'), 0, 0, 'C')
+                    self.write_lines([item], BULLET_INDENT)
+                self.ln(1)
+            elif kind == 'question':
+                self.render_question(block)
+            elif kind == 'table':
+                self.render_table(block)
+            elif kind == 'rule':
+                self.set_line_width(0.2)
+                self.line(self.l_margin, self.get_y() + 2, self.w - self.r_margin, self.get_y() + 2)
+                self.ln(4)
+            else:
+                self.ln(2)
+
+def render_pdf(text, college_name="COLLEGE OF ENGINEERING", header_image_path=None, header_text=None):
+    """
+    The paper as PDF bytes. Not timed itself: create_pdf() is the timed entry point,
+    and callers rendering in an executor time the whole hand-off instead.
+    """
     pdf = PDF(college_name=college_name, header_image_path=header_image_path, header_text=header_text)
     pdf.alias_nb_pages()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
     
-    # Body Font
-    pdf.set_font("Arial", size=11)
-    
-    # Improve text wrapping and encoding
-    # FPDF has trouble with some utf-8 characters if not using a unicode font.
-    # We'll use latin-1 encoding for simplicity or a replacement logic.
-    
-    # Simple cleanup to fix common encoding issues
-    replacements = {
-        '\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"', '\u2022': '*'
-    }
-    for k, v in replacements.items():
-        text = text.replace(k, v)
-    
-    normalized_text = text.encode('latin-1', 'replace').decode('latin-1')
-    
-    # Processing Markdown-like headers for bolding
-    # e.g. ## Section A
-    
-    lines = normalized_text.split("\n")
-    for line in lines:
-        if line.startswith("##"):
-            pdf.set_font("Arial", "B", 13)
-            pdf.cell(0, 10, line.replace("#", "").strip(), 0, 1, 'L')
-            pdf.set_font("Arial", size=11)
-        elif line.startswith("**") and line.endswith("**"):
-             # Bold line
-            pdf.set_font("Arial", "B", 11)
-            pdf.multi_cell(0, 6, line.replace("*", "").strip())
-            pdf.set_font("Arial", size=11)
-        else:
-            pdf.multi_cell(0, 6, line)
-            pdf.ln(1) # Extra spacing
+    # The paper is parsed once into blocks (headings, questions with MCQ options,
+    # tables, lists) and laid out block by block
+    pdf.render_blocks(parse_blocks(text))
         
     return pdf.output(dest="S").encode("latin-1")
+
+
+create_pdf = timed("pdf_render")(render_pdf)
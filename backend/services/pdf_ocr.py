@@ -0,0 +1,195 @@
+"""
+OCR fallback for scanned PDFs (older PYQs are often photocopies with no text layer).
+
+Pages are read with PyMuPDF first. A page is sent to OCR only when it is
+image-only: fewer than OCR_MIN_DENSITY text characters per square inch while
+images cover at least OCR_MIN_IMAGE_COVERAGE of it (blank pages are skipped).
+Such pages are rasterized in grayscale at OCR_DPI (300 by default, the
+resolution Tesseract is trained for; lower is faster but loses small print) and
+read by a local `tesseract` binary, one page per task in a process pool of
+OCR_WORKERS processes. Results are cached on disk by a hash of the page's
+content and image streams, so re-uploading a paper costs no OCR at all.
+
+Only depends on PyMuPDF and the tesseract executable (TESSERACT_CMD), so the
+Streamlit apps can share it. Without tesseract, pages keep their (empty) text.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+OCR_DPI = int(os.getenv("OCR_DPI", 300))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", 4200))  # longest side of the raster
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_MIN_DENSITY = float(os.getenv("OCR_MIN_DENSITY", 2.0))
+OCR_MIN_IMAGE_COVERAGE = float(os.getenv("OCR_MIN_IMAGE_COVERAGE", 0.3))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 120))
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+CACHE_DIR = os.getenv("OCR_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "qpg-ocr-cache")
+MAX_CACHED_PAGES = int(os.getenv("OCR_CACHE_PAGES", 2000))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def tesseract_available():
+    return shutil.which(TESSERACT_CMD) is not None
+
+
+def _pool_executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _pool
+
+
+def text_density(page, text):
+    """
+    Non-whitespace characters per square inch of the page.
+    """
+    area = (page.rect.width / 72.0) * (page.rect.height / 72.0)
+    return sum(1 for ch in text if not ch.isspace()) / area if area else 0.0
+
+
+def image_coverage(page):
+    """
+    Fraction of the page covered by images (overlaps counted once per image, capped at 1).
+    """
+    page_area = abs(page.rect)
+    covered = sum(abs(page.rect & info["bbox"]) for info in page.get_image_info())
+    return min(covered / page_area, 1.0) if page_area else 0.0
+
+
+def needs_ocr(page, text):
+    if text_density(page, text) >= OCR_MIN_DENSITY:
+        return False
+    return image_coverage(page) >= OCR_MIN_IMAGE_COVERAGE
+
+
+def page_key(doc, page, dpi=OCR_DPI, lang=OCR_LANG):
+    """
+    Hash of what OCR would see on a page: its content streams, its images' encoded
+    data and geometry, plus the OCR settings. No rendering needed.
+    """
+    digest = hashlib.sha256(f"{dpi}:{lang}:{tuple(page.rect)}:{page.rotation}".encode("ascii"))
+    for xref in page.get_contents():
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    for image in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()[:32]
+
+
+def run_tesseract(image, lang=OCR_LANG):
+    """
+    Text of an encoded image (PNG bytes) read by the tesseract CLI.
+    """
+    # One thread per tesseract: the pool already runs a process per core
+    result = subprocess.run([TESSERACT_CMD, "stdin", "stdout", "-l", lang, "--psm", "3"], input=image,
+                            capture_output=True, timeout=OCR_TIMEOUT, env=dict(os.environ, OMP_THREAD_LIMIT="1"))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace").strip()[-300:])
+    return result.stdout.decode("utf-8", "replace")
+
+
+def _ocr_page(path, page_number, dpi, lang):
+    # Runs in a pool process: rasterizing is CPU-bound too, so it happens here
+    import fitz
+
+    with fitz.open(path) as doc:
+        page = doc[page_number]
+        longest = max(page.rect.width, page.rect.height) / 72.0
+        dpi = max(72, min(dpi, int(OCR_MAX_PIXELS / longest))) if longest else dpi
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        return run_tesseract(pix.tobytes("png"), lang)
+
+
+def _cached(key):
+    path = os.path.join(CACHE_DIR, key + ".txt")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store(key, text):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, os.path.join(CACHE_DIR, key + ".txt"))
+    files = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith(".txt")]
+    if len(files) > MAX_CACHED_PAGES:
+        files.sort(key=os.path.getmtime)
+        for old in files[:len(files) - MAX_CACHED_PAGES]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def page_texts(source, ocr=True, dpi=OCR_DPI, lang=OCR_LANG):
+    """
+    Text of each page of a PDF (path or bytes), with image-only pages OCRed when
+    `ocr` is set. Returns (texts, stats); stats counts pages, pages that needed OCR,
+    cache hits, pages OCRed now and OCR failures.
+    """
+    import fitz
+
+    stats = {"pages": 0, "needs_ocr": 0, "cached": 0, "ocr": 0, "failed": 0}
+    doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, (bytes, bytearray)) else fitz.open(source)
+    with doc:
+        texts = [page.get_text() for page in doc]
+        stats["pages"] = len(texts)
+        if not ocr:
+            return texts, stats
+
+        pending = {}  # page number -> cache key
+        for number, page in enumerate(doc):
+            if not needs_ocr(page, texts[number]):
+                continue
+            stats["needs_ocr"] += 1
+            key = page_key(doc, page, dpi, lang)
+            cached = _cached(key)
+            if cached is not None:
+                texts[number] = cached
+                stats["cached"] += 1
+            else:
+                pending[number] = key
+
+    if not pending:
+        return texts, stats
+    if not tesseract_available():
+        print(f"{len(pending)} scanned page(s) left unread: '{TESSERACT_CMD}' not found (install Tesseract "
+              f"or set TESSERACT_CMD).")
+        stats["failed"] += len(pending)
+        return texts, stats
+
+    # Pool workers open the PDF themselves; uploads are passed through a temp file
+    path, tmp_path = source, None
+    if isinstance(source, (bytes, bytearray)):
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        path = tmp_path
+    try:
+        pool = _pool_executor()
+        futures = {number: pool.submit(_ocr_page, path, number, dpi, lang) for number in pending}
+        for number, future in futures.items():
+            try:
+                texts[number] = future.result()
+            except Exception as e:
+                print(f"OCR failed on page {number + 1}: {e}")
+                stats["failed"] += 1
+                continue
+            stats["ocr"] += 1
+            _store(pending[number], texts[number])
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+    return texts, stats
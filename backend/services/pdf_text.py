@@ -0,0 +1,68 @@
+"""
+Text extraction for uploaded PDFs (PYQs, reference papers, unrecognised syllabi).
+
+PDF_TEXT_BACKEND picks the extractor:
+  - "pymupdf" (default): MuPDF's text layer, several times faster than pypdf;
+  - "pypdf": exactly the text LangChain's PyPDFLoader produced, without LangChain
+    and its per-page Document objects;
+  - "langchain": PyPDFLoader itself, only for comparison (langchain-community is
+    not a backend requirement any more).
+Pages come back as plain strings. If the configured library is not installed the
+next one in that order is used.
+"""
+import os
+
+PDF_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "pymupdf").lower()
+BACKENDS = ("pymupdf", "pypdf", "langchain")
+BACKEND_MODULES = {"pymupdf": "fitz", "pypdf": "pypdf", "langchain": "langchain_community.document_loaders.pdf"}
+
+_unavailable = set()
+
+
+def _pymupdf_pages(path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def _pypdf_pages(path):
+    from pypdf import PdfReader
+
+    # PyPDFLoader's extraction: plain mode, stripped per page
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+
+def _langchain_pages(path):
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return [doc.page_content for doc in PyPDFLoader(path).load()]
+
+
+_EXTRACTORS = {"pymupdf": _pymupdf_pages, "pypdf": _pypdf_pages, "langchain": _langchain_pages}
+
+
+def backend_order(backend=None):
+    backend = backend or PDF_TEXT_BACKEND
+    if backend not in _EXTRACTORS:
+        raise ValueError(f"Unknown PDF_TEXT_BACKEND {backend!r}; use one of {', '.join(BACKENDS)}")
+    return [backend] + [b for b in BACKENDS if b != backend]
+
+
+def page_texts(path, backend=None):
+    """
+    Text of each page of the PDF at `path`.
+    """
+    for name in backend_order(backend):
+        if name in _unavailable:
+            continue
+        try:
+            return _EXTRACTORS[name](path)
+        except ImportError as e:
+            print(f"PDF text backend {name} unavailable ({e}); trying the next one.")
+            _unavailable.add(name)
+    raise ImportError("No PDF text backend installed (pymupdf, pypdf or langchain-community)")
+
+
+def extract_text(path, backend=None):
+    return "\n".join(page_texts(path, backend))
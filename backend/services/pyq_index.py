@@ -0,0 +1,147 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from services.storage import data_path, file_lock, file_version, load_json, save_json_atomic
+
+DEFAULT_INDEX_PATH = os.getenv("PYQ_INDEX_PATH", data_path("pyq_index.json"))
+
+_YEAR_RE = re.compile(r"\b(19[89]\d|20\d{2})\b")
+
+
+def file_hash(path):
+    """
+    SHA-256 of a file's bytes, used to recognise a PYQ that was already indexed.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def detect_year(name, text=""):
+    """
+    Exam year from the file name (e.g. "2023-Dec QA.pdf"), else from the first page text.
+    """
+    match = _YEAR_RE.search(name or "") or _YEAR_RE.search((text or "")[:2000])
+    return match.group(1) if match else "unknown"
+
+
+def course_key(entry):
+    """
+    Index key of a syllabus registry entry: course code and version, shared by every
+    way of resolving that syllabus (uploaded PDF, pasted text, known-syllabus pick).
+    Entries without a versioned course code are keyed by their registry id.
+    """
+    if entry.get("course_code") and entry.get("version"):
+        return f"{entry['course_code']}@v{entry['version']}"
+    return entry.get("id")
+
+
+class PyqIndex:
+    """
+    Per-course PYQ frequency tables, built once offline and updated incrementally.
+
+    A course is keyed by course_key() of its syllabus entry (topic names are fixed
+    per syllabus version). Each course keeps the per-paper topic counts plus running
+    totals and per-year breakdowns, so a request reads frequencies in O(topics)
+    and only classifies papers whose hash is not indexed yet.
+    Several processes may share the file: writes re-read it under a file lock and
+    reads pick up changes made by other processes.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self._version = file_version(self.path)
+        self._data = load_json(self.path, {})
+        self._data.setdefault("courses", {})
+
+    def _refresh(self):
+        if file_version(self.path) != self._version:
+            self._load()
+
+    def _course(self, course_key, course_code=None):
+        course = self._data["courses"].setdefault(course_key, {
+            "course_code": course_code, "papers": {}, "totals": {}, "by_year": {},
+        })
+        if course_code and not course.get("course_code"):
+            course["course_code"] = course_code
+        return course
+
+    def has_paper(self, course_key, paper_hash):
+        with self._lock:
+            self._refresh()
+            course = self._data["courses"].get(course_key)
+            return bool(course and paper_hash in course["papers"])
+
+    def paper_frequency(self, course_key, paper_hash):
+        """
+        Stored topic counts of one indexed paper, or None.
+        """
+        with self._lock:
+            self._refresh()
+            paper = self._data["courses"].get(course_key, {}).get("papers", {}).get(paper_hash)
+            return dict(paper["frequency"]) if paper else None
+
+    def add_paper(self, course_key, paper_hash, frequency, name=None, year="unknown", questions=0, course_code=None):
+        """
+        Records the topic counts of one classified paper (no-op if already indexed).
+        Returns True when the paper was new.
+        """
+        with self._lock, file_lock(self.path):
+            self._load()  # merge with papers other processes indexed since
+            course = self._course(course_key, course_code)
+            if paper_hash in course["papers"]:
+                return False
+            frequency = {t: int(n) for t, n in frequency.items() if n}
+            course["papers"][paper_hash] = {
+                "name": name, "year": year, "questions": questions,
+                "frequency": frequency, "indexed_at": int(time.time()),
+            }
+            year_table = course["by_year"].setdefault(year, {})
+            for topic, count in frequency.items():
+                course["totals"][topic] = course["totals"].get(topic, 0) + count
+                year_table[topic] = year_table.get(topic, 0) + count
+            save_json_atomic(self.path, self._data)
+            self._version = file_version(self.path)
+            return True
+
+    def frequencies(self, course_key, years=None):
+        """
+        Topic frequency totals for a course, optionally restricted to some years.
+        """
+        with self._lock:
+            self._refresh()
+            course = self._data["courses"].get(course_key)
+            if not course:
+                return {}
+            if not years:
+                return dict(course["totals"])
+            totals = {}
+            for year in years:
+                for topic, count in course["by_year"].get(str(year), {}).items():
+                    totals[topic] = totals.get(topic, 0) + count
+            return totals
+
+    def stats(self, course_key):
+        """
+        Summary for a course: paper count, per-year tables and totals.
+        """
+        with self._lock:
+            self._refresh()
+            course = self._data["courses"].get(course_key)
+            if not course:
+                return None
+            return {
+                "course_code": course.get("course_code"),
+                "papers": [{"id": h, "name": p["name"], "year": p["year"], "questions": p["questions"]}
+                           for h, p in course["papers"].items()],
+                "by_year": {y: dict(t) for y, t in course["by_year"].items()},
+                "totals": dict(course["totals"]),
+            }
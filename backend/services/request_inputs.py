@@ -0,0 +1,99 @@
+"""
+Request input handling shared by the Flask app (app.py) and the ASGI app (asgi_app.py):
+syllabus resolution and uploaded files. Only synchronous FileStorage methods
+(`filename`, `read`) are used so both frameworks' uploads work.
+"""
+import os
+import shutil
+import tempfile
+from werkzeug.utils import secure_filename
+from services.syllabus_parser import DEFAULT_MIN_CONFIDENCE, parse_syllabus_pdf, parse_syllabus_text
+from services.syllabus_registry import syllabus_fingerprint
+
+
+def topics_as_text(syllabus_topics):
+    return "\n".join(f"{t} {h} Hrs" for t, h in syllabus_topics.items())
+
+
+def resolve_syllabus(form, syllabus_file, registry):
+    """
+    Resolves the syllabus of an /api/analyze request.
+    Returns (syllabus_text, syllabus_topics, syllabus_info, syllabus_bytes); topics and
+    info are None when the text still has to be parsed, and syllabus_bytes is set
+    when an unrecognised syllabus PDF has to be read as plain text.
+    Raises LookupError for an unknown syllabus id, course code or version.
+    """
+    syllabus_text = form.get('syllabus_text')
+
+    # 1. Known syllabus picked in the UI: no parsing at all
+    if form.get('syllabus_id') or (form.get('course_code') and not syllabus_text and not syllabus_file):
+        if not str(form.get('syllabus_version') or 0).isdigit():
+            raise LookupError("Unknown syllabus version")
+        syllabus_info = registry.lookup(fingerprint=form.get('syllabus_id'), course_code=form.get('course_code'),
+                                        version=form.get('syllabus_version'))
+        if not syllabus_info:
+            raise LookupError("Unknown syllabus")
+        return syllabus_text or topics_as_text(syllabus_info["topics"]), syllabus_info["topics"], syllabus_info, None
+
+    # 2. Layout-aware parse of an uploaded syllabus PDF (memoized by file hash);
+    # the LLM parser is only used on the extracted text when the layout is not recognised
+    if syllabus_file and syllabus_file.filename:
+        syllabus_bytes = syllabus_file.read()
+        pdf_key = f"{syllabus_fingerprint(syllabus_bytes)}:{(form.get('course_code') or '').upper()}"
+        syllabus_info = registry.lookup(fingerprint=pdf_key)
+        if not syllabus_info:
+            parsed = parse_syllabus_pdf(syllabus_bytes, form.get('course_code'))
+            if parsed["topics"] and parsed["confidence"] >= DEFAULT_MIN_CONFIDENCE:
+                syllabus_info = registry.register(None, parsed["topics"], parsed["course_code"],
+                                                  parsed["course_title"], fingerprint=pdf_key)
+        if syllabus_info:
+            return syllabus_text or topics_as_text(syllabus_info["topics"]), syllabus_info["topics"], syllabus_info, None
+        if not syllabus_text:
+            return None, None, None, syllabus_bytes
+
+    # 3. Pasted text with a course code: only that course's tables are parsed, so a
+    # multi-course syllabus does not resolve to whichever course scores best
+    course_code = form.get('course_code')
+    if syllabus_text and course_code:
+        text_key = f"{syllabus_fingerprint(syllabus_text)}:{course_code.upper()}"
+        syllabus_info = registry.lookup(fingerprint=text_key)
+        if not syllabus_info:
+            parsed = parse_syllabus_text(syllabus_text, course_code)
+            if parsed["topics"] and parsed["confidence"] >= DEFAULT_MIN_CONFIDENCE:
+                syllabus_info = registry.register(None, parsed["topics"], parsed["course_code"],
+                                                  parsed["course_title"], fingerprint=text_key)
+        if syllabus_info:
+            return syllabus_text, syllabus_info["topics"], syllabus_info, None
+
+    return syllabus_text, None, None, None
+
+
+def request_dir():
+    """
+    Private temp directory for one request's uploads (safe under concurrency).
+    """
+    return tempfile.mkdtemp(prefix="qpg-")
+
+
+def remove_dir(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def write_upload(directory, filename, data):
+    path = os.path.join(directory, secure_filename(filename) or "upload.pdf")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def save_uploads(files, directory):
+    """
+    Writes uploaded files into `directory`; returns their paths.
+    """
+    return [write_upload(directory, file.filename, file.read()) for file in files if file and file.filename]
+
+
+def is_enabled(value, default=False):
+    if value is None:
+        return default
+    return str(value).lower() in ("1", "true", "yes")
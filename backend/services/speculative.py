@@ -0,0 +1,99 @@
+"""
+Speculative paper drafts.
+
+Right after /api/analyze, a draft paper for the default allocation and detected
+pattern is generated in the background and kept under a draft id. /api/generate
+passes the draft id back: sections whose inputs are unchanged come straight from
+the draft, edited ones are regenerated. A draft is used once — later generates
+get fresh questions — and is never written to by the request that takes it.
+
+Drafts live in memory for SPECULATIVE_TTL_SECONDS; at most SPECULATIVE_MAX_DRAFTS
+are kept and SPECULATIVE_WORKERS are generated at once.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from services.budget import Budget, budget_scope
+from services.generator import generate_unit, plan_paper
+from services.llm import sync_client
+
+
+class DraftStore:
+    def __init__(self, workers=None, ttl_seconds=None, max_drafts=None):
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SPECULATIVE_TTL_SECONDS", 1800))
+        self.max_drafts = max_drafts or int(os.getenv("SPECULATIVE_MAX_DRAFTS", 64))
+        self.executor = ThreadPoolExecutor(max_workers=workers or int(os.getenv("SPECULATIVE_WORKERS", 2)),
+                                           thread_name_prefix="draft")
+        self.lock = threading.Lock()
+        self.drafts = {}
+
+    def _stop(self, draft):
+        with draft["cond"]:
+            draft["claimed"] = True
+        draft["future"].cancel()
+
+    def _evict(self):
+        now = time.monotonic()
+        for draft_id, draft in list(self.drafts.items()):
+            if now - draft["created"] > self.ttl_seconds:
+                self._stop(self.drafts.pop(draft_id))
+        while len(self.drafts) >= self.max_drafts:
+            oldest = min(self.drafts, key=lambda k: self.drafts[k]["created"])
+            self._stop(self.drafts.pop(oldest))
+
+    def start(self, api_key, allocation, paper_pattern=None, priority_scores=None, section_allocation=None):
+        """
+        Starts generating a draft in the background; returns its id.
+        """
+        draft = {"created": time.monotonic(), "sections": {}, "pending": set(), "claimed": False,
+                 "cond": threading.Condition()}
+
+        def run():
+            client = sync_client(api_key)
+            # Own budget: the analyze request that started the draft has already returned
+            with budget_scope(Budget.from_request()):
+                for unit in plan_paper(allocation, paper_pattern, priority_scores, section_allocation):
+                    with draft["cond"]:
+                        if draft["claimed"]:
+                            return  # taken by a request, which generates the rest itself
+                        draft["pending"].add(unit["key"])
+                    text, ok = generate_unit(client, unit)
+                    with draft["cond"]:
+                        draft["pending"].discard(unit["key"])
+                        if ok:
+                            draft["sections"][unit["key"]] = text
+                        draft["cond"].notify_all()
+
+        draft_id = uuid.uuid4().hex
+        with self.lock:
+            self._evict()
+            draft["future"] = self.executor.submit(run)
+            self.drafts[draft_id] = draft
+        return draft_id
+
+    def take(self, draft_id, wait_seconds=60):
+        """
+        Claims a draft and returns a copy of its sections ({unit key: text}),
+        waiting up to `wait_seconds` in all for it to finish. Returns None for
+        unknown, expired or already taken drafts. If the draft is still running, it
+        stops starting new sections and the caller generates every section that is
+        not finished by then.
+        """
+        deadline = time.monotonic() + wait_seconds
+        with self.lock:
+            draft = self.drafts.pop(draft_id, None)
+        if draft is None or time.monotonic() - draft["created"] > self.ttl_seconds:
+            return None
+        try:
+            draft["future"].result(timeout=wait_seconds)
+        except FutureTimeout:
+            print(f"Draft {draft_id} still running after {wait_seconds}s, generating the rest directly")
+        except Exception as e:
+            print(f"Draft {draft_id} failed: {e}")
+        with draft["cond"]:
+            draft["claimed"] = True
+            # Sections in flight may still land within what is left of the same deadline
+            draft["cond"].wait_for(lambda: not draft["pending"], timeout=max(0, deadline - time.monotonic()))
+            return dict(draft["sections"])
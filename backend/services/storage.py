@@ -0,0 +1,70 @@
+import contextlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores are only locked within one process
+    fcntl = None
+
+
+def load_json(path, default):
+    """
+    Reads a JSON store, returning `default` when the file is missing or unreadable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"Store {path} unreadable ({e}); starting empty.")
+        return default
+
+
+def save_json_atomic(path, data):
+    """
+    Writes a JSON store through a temp file + rename so readers never see a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def file_version(path):
+    """
+    Identity of the file currently at `path` (inode, mtime, size), or None if missing.
+    Changes whenever another process replaces the store.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on a JSON store across processes (gunicorn workers, ingest_pyqs.py),
+    held on a sidecar `.lock` file for a whole read-merge-save.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def data_path(filename):
+    """
+    Default location of backend data files (backend/data/, overridable with DATA_DIR).
+    """
+    base = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+    return os.path.join(base, filename)
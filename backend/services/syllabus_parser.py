@@ -0,0 +1,367 @@
+"""
+Deterministic syllabus parser.
+
+Extracts {module title: teaching hours} from syllabus tables without an LLM call,
+either from PDF span geometry (PyMuPDF) or from plain extracted/pasted text.
+Every result carries a confidence score in [0, 1] so callers can decide whether
+an LLM pass is still needed.
+
+This module only depends on the standard library (PyMuPDF is imported lazily),
+so it can be shared by the backend and the Streamlit apps.
+"""
+import re
+
+# Accepted teaching hours for a single module (shared by every parser in the repo)
+MIN_HOURS = 2
+MAX_HOURS = 20
+
+# Results at or above this confidence skip the LLM parser
+DEFAULT_MIN_CONFIDENCE = 0.75
+# Ceiling for a result picked among several courses without a requested course code
+AMBIGUOUS_CONFIDENCE = 0.5
+
+_INT_RE = re.compile(r"^\d{1,2}$")
+_SUBSECTION_RE = re.compile(r"^\d+\.\d+")
+_MODULE_HEADER_RE = re.compile(r"^(module|unit|sr\.?\s*no\.?|chapter)$", re.IGNORECASE)
+_HOURS_HEADER_RE = re.compile(r"^(hrs?\.?|hours|lectures|periods)$", re.IGNORECASE)
+_COURSE_CODE_RE = re.compile(r"\b([A-Z]{2,5}\s?[A-Z]?\d{3,4}[A-Z]?)\b")
+_INLINE_RE = re.compile(
+    r"^(?:(?:module|unit|chapter)\s*)?(?:(\d{1,2})\s*[:.)\-]?\s+)?(.+?)\s*[\(\[]?\s*(\d{1,2})\s*(?:hours|hrs?)\.?\s*[\)\]]?\s*$",
+    re.IGNORECASE,
+)
+_TRIVIAL_TITLES = ("reference", "outcome", "objective", "textbook", "text book", "prerequisite", "total")
+_TABLE_END_RE = re.compile(r"^(text\s?books?|references?|assessment|useful links|total)\b", re.IGNORECASE)
+
+
+def _empty_result(method="none"):
+    return {"topics": {}, "confidence": 0.0, "method": method, "course_code": None, "course_title": None}
+
+
+def _valid_title(title):
+    title = title.strip()
+    if len(title) <= 3 or len(title) > 120:
+        return False
+    lowered = title.lower()
+    return not any(word in lowered for word in _TRIVIAL_TITLES)
+
+
+def _valid_hours(hours):
+    return MIN_HOURS <= hours <= MAX_HOURS
+
+
+def score_modules(modules, structure, skipped=0, misplaced=0):
+    """
+    Confidence heuristic for a list of (module_number, title, hours) tuples.
+
+    structure: "table" (geometry), "sequence" (numbered text lines) or "inline".
+    Rewards a recognised table layout, module numbering 1..n without gaps and
+    a plausible number of modules; penalises duplicates, overly long titles,
+    numbered rows the chain had to jump over or that repeat a number (`skipped`)
+    and rows whose "hours" are really the next row's module number (`misplaced`).
+    """
+    if not modules:
+        return 0.0
+    base = {"table": 0.5, "sequence": 0.4, "inline": 0.4}.get(structure, 0.2)
+    score = base + 0.3 * min(len(modules), 6) / 6
+    numbers = [m[0] for m in modules]
+    if numbers == list(range(1, len(modules) + 1)):
+        score += 0.2
+    titles = [m[1].lower() for m in modules]
+    if len(set(titles)) != len(titles):
+        score -= 0.15
+    if any(len(t) > 80 for t in titles):
+        score -= 0.1
+    score -= 0.1 * min(skipped, 3)
+    score -= 0.4 * misplaced / len(modules)
+    return round(max(0.0, min(score, 1.0)), 3)
+
+
+def _chains(candidates, boundaries=()):
+    """
+    Runs of candidates numbered 1, 2, 3, ... in document order.
+    candidates: list of (position, module_number, title, hours), sorted by position.
+    A run ends at a course boundary (position of a "Course Code" line) or where the
+    numbering restarts at 1; other out-of-sequence rows are jumped over and counted.
+    Yields (chain, skipped).
+    """
+    for start, cand in enumerate(candidates):
+        if cand[1] != 1:
+            continue
+        end = min((b for b in boundaries if b > cand[0]), default=None)
+        chain, skipped, pending = [cand], 0, 0
+        for nxt in candidates[start + 1:]:
+            if (end is not None and nxt[0] >= end) or nxt[1] == 1:
+                break
+            if nxt[1] == chain[-1][1] + 1:
+                chain.append(nxt)
+                skipped, pending = skipped + pending, 0
+            else:
+                pending += 1  # only counts if the chain continues past it
+        yield chain, skipped
+
+
+def _misplaced_hours(chain):
+    """
+    Rows whose hours line is the next row's number line (rubric and list tables).
+    """
+    return sum(1 for a, b in zip(chain, chain[1:]) if b[0] == a[0] + 2)
+
+
+def _best_chain(candidates, structure, boundaries=()):
+    """
+    The highest-scoring chain (longer, then earlier, on ties) and its score.
+    """
+    best, best_key = [], (0.0, 0)
+    for chain, skipped in _chains(candidates, boundaries):
+        score = score_modules([c[1:] for c in chain], structure, skipped, _misplaced_hours(chain))
+        if (score, len(chain)) > best_key:
+            best, best_key = chain, (score, len(chain))
+    return best, best_key[0]
+
+
+def _to_result(modules, structure, course_code=None, course_title=None, confidence=None):
+    result = _empty_result(structure)
+    result["topics"] = {title: hours for _, title, hours in modules}
+    result["confidence"] = score_modules(modules, structure) if confidence is None else confidence
+    result["course_code"] = course_code
+    result["course_title"] = course_title
+    return result
+
+
+def _course_section(raw_text, course_code):
+    """
+    The part of a syllabus text under `course_code`'s "Course Code" labels; the whole
+    text if it has no such labels, None if the course is not in it.
+    """
+    lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
+    boundaries = [i for i, line in enumerate(lines) if line.startswith("Course Code")]
+    if not boundaries:
+        return raw_text
+    wanted = course_code.replace(" ", "").upper()
+    section = []
+    for start, end in zip(boundaries, boundaries[1:] + [len(lines)]):
+        if (detect_course_code("\n".join(lines[start:start + 5])) or "").upper() == wanted:
+            section.extend(lines[start:end])
+    return "\n".join(section) if section else None
+
+
+def parse_syllabus_text(raw_text, course_code=None):
+    """
+    Parses plain syllabus text (pasted or extracted from a PDF).
+
+    Understands the "number / title / hours" line layout produced by table
+    extraction as well as inline forms such as "Module 1: Title (10 Hours)".
+    Module tables never span a "Course Code" line. When the text holds several
+    courses, only `course_code`'s tables are read; without it the best-scoring table
+    wins, but its confidence is capped at AMBIGUOUS_CONFIDENCE (the course is a guess).
+    Returns {"topics", "confidence", "method", "course_code", "course_title"}.
+    """
+    if not raw_text:
+        return _empty_result()
+    if course_code:
+        section = _course_section(raw_text, course_code)
+        if section is None:
+            return _empty_result()
+        result = parse_syllabus_text(section)
+        result["course_code"] = result["course_code"] or course_code.replace(" ", "").upper()
+        return result
+    lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
+    boundaries = [i for i, line in enumerate(lines) if line.startswith("Course Code")]
+
+    # 1. Three-line table layout: module number, title, hours
+    sequence = []
+    for i in range(len(lines) - 2):
+        if _INT_RE.match(lines[i]) and _INT_RE.match(lines[i + 2]):
+            title, hours = lines[i + 1], int(lines[i + 2])
+            if _valid_hours(hours) and _valid_title(title) and not title.endswith("."):
+                sequence.append((i, int(lines[i]), title, hours))
+    chain, chain_score = _best_chain(sequence, "sequence", boundaries)
+
+    # 2. Inline layout: "1. Title 10 Hrs" / "Module 2: Title (8 Hours)"
+    inline = []
+    for i, line in enumerate(lines):
+        match = _INLINE_RE.match(line)
+        if match:
+            title, hours = match.group(2).strip(" :-"), int(match.group(3))
+            if _valid_hours(hours) and _valid_title(title):
+                inline.append((i, int(match.group(1) or 0), title, hours))
+    inline_chain, inline_score = _best_chain(inline, "inline", boundaries)
+    if not inline_chain and inline:
+        inline_chain, inline_score = inline, None
+
+    def course_of(rows):
+        # Code of the last "Course Code" line above the table, else of the whole text
+        above = [b for b in boundaries if rows and b < rows[0][0]]
+        return detect_course_code("\n".join(lines[above[-1]:above[-1] + 5])) if above else detect_course_code(raw_text)
+
+    sequence_result = _to_result([c[1:] for c in chain], "sequence", course_of(chain), confidence=chain_score)
+    inline_result = _to_result([c[1:] for c in inline_chain], "inline", course_of(inline_chain),
+                               confidence=inline_score)
+    result = max(sequence_result, inline_result, key=lambda r: r["confidence"])
+    if len(detect_course_codes(raw_text)) > 1:
+        result["confidence"] = min(result["confidence"], AMBIGUOUS_CONFIDENCE)
+    return result
+
+
+def detect_course_codes(text):
+    """
+    Distinct course codes following "Course Code" labels, in document order.
+    """
+    codes = []
+    for match in re.finditer("Course Code", text or ""):
+        code = detect_course_code(text[match.start():])
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def detect_course_code(text):
+    """
+    Returns the course code following the first "Course Code" label (e.g. "CSC604"), or None.
+    """
+    idx = (text or "").find("Course Code")
+    if idx < 0:
+        return None
+    window = text[idx + len("Course Code"):idx + 200]
+    match = _COURSE_CODE_RE.search(window)
+    return match.group(1).replace(" ", "") if match else None
+
+
+def _page_rows(page, tolerance=3.0):
+    """
+    Groups the non-empty spans of a page into visual rows by vertical centre.
+    Each row is a list of (x0, x1, text, is_bold) sorted left to right.
+    """
+    spans = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                text = span["text"].strip()
+                if text:
+                    x0, y0, x1, y1 = span["bbox"]
+                    spans.append(((y0 + y1) / 2, x0, x1, text, bool(span["flags"] & 16)))
+    spans.sort()
+    rows, current, current_y = [], [], None
+    for y, x0, x1, text, bold in spans:
+        if current and abs(y - current_y) > tolerance:
+            rows.append(sorted(current))
+            current = []
+        if not current:
+            current_y = y
+        current.append((x0, x1, text, bold))
+    if current:
+        rows.append(sorted(current))
+    return rows
+
+
+def parse_syllabus_courses(source):
+    """
+    Parses every module/hours table in a syllabus PDF using span geometry.
+
+    A table starts at a header row with a "Module" and an "Hrs"/"Hours" column;
+    module rows are rows with an integer in the module column and in the hours
+    column, the title being the text between them. Tables are attributed to the
+    most recent "Course Code" seen in the document.
+
+    source: file path, bytes, or a file-like object.
+    Returns a list of result dicts (see parse_syllabus_text), one per course.
+    """
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        print("PyMuPDF not installed; layout-aware syllabus parsing disabled.")
+        return []
+
+    if hasattr(source, "read"):
+        source.seek(0)
+        source = source.read()
+    try:
+        doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, (bytes, bytearray)) else fitz.open(source)
+    except Exception as e:
+        print(f"Could not open syllabus PDF: {e}")
+        return []
+
+    courses = []
+    course = {"code": None, "title": None, "modules": []}
+    columns = None  # (module column right edge, hours column centre)
+    continuing = False  # last row was a module row whose title may wrap
+
+    def flush():
+        if course["modules"]:
+            courses.append(_to_result(course["modules"], "table", course["code"], course["title"]))
+
+    with doc:
+        for page in doc:
+            rows = _page_rows(page)
+            for r, row in enumerate(rows):
+                texts = [cell[2] for cell in row]
+
+                if any(t.startswith("Course Code") for t in texts):
+                    flush()
+                    course = {"code": None, "title": None, "modules": []}
+                    columns = None
+                    # The code usually sits on the same row or within the next two rows
+                    for nearby in rows[r:r + 3]:
+                        joined = " ".join(cell[2] for cell in nearby)
+                        match = _COURSE_CODE_RE.search(joined.replace("Course Code", ""))
+                        if match:
+                            course["code"] = match.group(1).replace(" ", "")
+                            tail = joined[match.end():].strip(" :")
+                            course["title"] = re.sub(r"\s+\d+$", "", tail) or None
+                            break
+                    continue
+
+                module_cells = [c for c in row if _MODULE_HEADER_RE.match(c[2])]
+                hours_cells = [c for c in row if _HOURS_HEADER_RE.match(c[2])]
+                if module_cells and hours_cells:
+                    columns = (module_cells[0][1] + 30, (hours_cells[-1][0] + hours_cells[-1][1]) / 2)
+                    continue
+                if columns is None:
+                    continue
+
+                if _TABLE_END_RE.match(texts[0]):
+                    columns, continuing = None, False
+                    continue
+
+                module_edge, hours_centre = columns
+                first, last = row[0], row[-1]
+                has_module = _INT_RE.match(first[2]) and first[1] <= module_edge
+                has_hours = (len(row) > 1 and _INT_RE.match(last[2])
+                             and abs((last[0] + last[1]) / 2 - hours_centre) < 25)
+                if has_module and has_hours:
+                    hours = int(last[2])
+                    # Module numbers must run 1, 2, 3, ... within a course
+                    continuing = _valid_hours(hours) and int(first[2]) == len(course["modules"]) + 1
+                    if continuing:
+                        title = " ".join(c[2] for c in row[1:-1]).strip()
+                        course["modules"].append((int(first[2]), title, hours))
+                elif continuing and first[3] and first[0] > module_edge and not _SUBSECTION_RE.match(first[2]):
+                    # Bold title wrapped onto the row right below the module row
+                    number, title, hours = course["modules"][-1]
+                    joined = " ".join(c[2] for c in row)
+                    course["modules"][-1] = (number, f"{title} {joined}".strip(), hours)
+                else:
+                    continuing = False
+        flush()
+
+    for result in courses:
+        result["topics"] = {t: h for t, h in result["topics"].items() if _valid_title(t)}
+    return courses
+
+
+def parse_syllabus_pdf(source, course_code=None):
+    """
+    Layout-aware parse of a syllabus PDF.
+    Returns the result for `course_code` if given, otherwise the most confident course;
+    when that is one of several courses, its confidence is capped at AMBIGUOUS_CONFIDENCE.
+    """
+    courses = parse_syllabus_courses(source)
+    if course_code:
+        wanted = course_code.replace(" ", "").upper()
+        courses = [c for c in courses if (c["course_code"] or "").upper() == wanted]
+    if not courses:
+        return _empty_result("table")
+    result = dict(max(courses, key=lambda c: (c["confidence"], len(c["topics"]))))
+    if not course_code and len({c["course_code"] for c in courses}) > 1:
+        result["confidence"] = min(result["confidence"], AMBIGUOUS_CONFIDENCE)
+    return result
@@ -0,0 +1,202 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from services.storage import data_path, file_lock, file_version, load_json, save_json_atomic
+
+DEFAULT_REGISTRY_PATH = os.getenv("SYLLABUS_REGISTRY_PATH", data_path("syllabus_registry.json"))
+
+
+def syllabus_fingerprint(text):
+    """
+    Content fingerprint that ignores case, whitespace and punctuation differences,
+    so the same syllabus pasted or extracted twice maps to the same key.
+    Raw bytes (an uploaded PDF) are hashed as-is.
+    """
+    if isinstance(text, (bytes, bytearray)):
+        return hashlib.sha256(text).hexdigest()[:32]
+    normalized = re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+class SyllabusRegistry:
+    """
+    Persistent store of parsed syllabus topic maps.
+
+    - Entries are keyed by content fingerprint and grouped by course code.
+    - A new fingerprint for a known course code becomes the next version, except
+      that parser-sourced entries never supersede an existing version unless the
+      caller is an operator (`supersede=True`); they are kept for lookups by content,
+      as an alias of the version they duplicate if their topics are identical.
+    - An admin override on a course code replaces the parsed topics of every version.
+    The store is a single JSON file, rewritten atomically on every change. Changes
+    re-read it under a file lock first, so processes sharing it (gunicorn workers,
+    ingest_pyqs.py) do not drop each other's entries.
+    """
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self._version = file_version(self.path)
+        self._data = load_json(self.path, {})
+        self._data.setdefault("entries", {})
+        self._data.setdefault("courses", {})
+
+    def _refresh(self):
+        if file_version(self.path) != self._version:
+            self._load()
+
+    def _save(self):
+        save_json_atomic(self.path, self._data)
+        self._version = file_version(self.path)
+
+    def _resolve(self, entry):
+        """
+        Returns a copy of an entry with the admin override applied, if any.
+        """
+        entry = dict(entry)
+        course = self._data["courses"].get(entry.get("course_code") or "")
+        if course and course.get("override"):
+            entry["topics"] = dict(course["override"]["topics"])
+            entry["source"] = "admin"
+        return entry
+
+    def lookup(self, text=None, fingerprint=None, course_code=None, version=None):
+        """
+        Finds a known syllabus by content (text or fingerprint) or by course code.
+        For a course code, the latest version is returned unless `version` is given.
+        Returns the entry dict or None.
+        """
+        with self._lock:
+            self._refresh()
+            if text is not None and fingerprint is None:
+                fingerprint = syllabus_fingerprint(text)
+            if fingerprint:
+                entry = self._data["entries"].get(fingerprint)
+                return self._resolve(entry) if entry else None
+            if course_code:
+                course = self._data["courses"].get(course_code.upper())
+                if not course or not course["versions"]:
+                    return None
+                versions = course["versions"]
+                if version is not None:
+                    if not 1 <= int(version) <= len(versions):
+                        return None
+                    key = versions[int(version) - 1]
+                else:
+                    key = versions[-1]
+                return self._resolve(self._data["entries"][key])
+            return None
+
+    def _add_version(self, course_code, fingerprint):
+        course = self._data["courses"].setdefault(course_code, {"versions": [], "override": None})
+        course["versions"].append(fingerprint)
+        return len(course["versions"])
+
+    def _version_for(self, course_code, fingerprint, topics, source, supersede):
+        """
+        Version number of a new entry: the next one for a new course, an operator
+        (`supersede`) or a non-parser source; for another parser entry of a known
+        course, the version it duplicates (same topics, e.g. the PDF and the pasted
+        text of one syllabus) or None. Entries without a course code are version 1.
+        """
+        if not course_code:
+            return 1
+        versions = self._data["courses"].get(course_code, {}).get("versions")
+        if not versions or source != "parser" or supersede:
+            return self._add_version(course_code, fingerprint)
+        for number, key in enumerate(versions, 1):
+            if self._data["entries"][key]["topics"] == dict(topics):
+                return number
+        return None
+
+    def register(self, text, topics, course_code=None, course_title=None, source="parser", fingerprint=None,
+                 supersede=False):
+        """
+        Stores the topic map parsed from `text` (or under an explicit `fingerprint`).
+        Re-registering the same content only refreshes it; new content for a known
+        course code adds a version, unless it comes from the parser and `supersede`
+        is not set (then it is stored unversioned and the course keeps its latest).
+        Returns the stored entry.
+        """
+        fingerprint = fingerprint or syllabus_fingerprint(text)
+        course_code = course_code.upper() if course_code else None
+        now = int(time.time())
+        with self._lock, file_lock(self.path):
+            self._load()  # merge with entries other processes registered since
+            entries = self._data["entries"]
+            entry = entries.get(fingerprint)
+            if entry is not None:
+                entry["updated_at"] = now
+                if course_code and not (entry.get("course_code") and entry.get("version")):
+                    entry["course_code"] = course_code
+                    entry["version"] = self._version_for(course_code, fingerprint, entry["topics"], source, supersede)
+            else:
+                if course_code and not course_title:
+                    previous = self._data["courses"].get(course_code, {}).get("versions") or []
+                    course_title = entries[previous[-1]].get("course_title") if previous else None
+                entry = {
+                    "id": fingerprint,
+                    "course_code": course_code,
+                    "course_title": course_title,
+                    "version": self._version_for(course_code, fingerprint, topics, source, supersede),
+                    "topics": dict(topics),
+                    "source": source,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                entries[fingerprint] = entry
+            self._save()
+            return self._resolve(entry)
+
+    def set_override(self, course_code, topics):
+        """
+        Admin override: pins the topic map used for every version of a course.
+        """
+        course_code = course_code.upper()
+        with self._lock, file_lock(self.path):
+            self._load()
+            course = self._data["courses"].setdefault(course_code, {"versions": [], "override": None})
+            course["override"] = {"topics": dict(topics), "updated_at": int(time.time())}
+            self._save()
+            return course["override"]
+
+    def clear_override(self, course_code):
+        with self._lock, file_lock(self.path):
+            self._load()
+            course = self._data["courses"].get(course_code.upper())
+            if not course or not course.get("override"):
+                return False
+            course["override"] = None
+            self._save()
+            return True
+
+    def list_known(self):
+        """
+        Summary of known syllabi for the "pick a known syllabus" UI:
+        latest version per course code plus entries without a course code.
+        """
+        with self._lock:
+            self._refresh()
+            latest = {}
+            for code, course in self._data["courses"].items():
+                if course["versions"]:
+                    latest[course["versions"][-1]] = course
+            known = []
+            for key, entry in self._data["entries"].items():
+                if entry.get("course_code") and key not in latest:
+                    continue
+                resolved = self._resolve(entry)
+                known.append({
+                    "id": key,
+                    "course_code": resolved.get("course_code"),
+                    "course_title": resolved.get("course_title"),
+                    "version": resolved.get("version"),
+                    "source": resolved.get("source"),
+                    "topic_count": len(resolved["topics"]),
+                })
+            return sorted(known, key=lambda k: (k["course_code"] or "~", k["id"]))
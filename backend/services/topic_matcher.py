@@ -0,0 +1,189 @@
+"""
+Resolves LLM classification labels back to syllabus topic names.
+
+A TopicMatcher is built once per analysis from the syllabus topics:
+  - exact: the normalised label equals a normalised topic, or contains one as
+    whole words (an Aho-Corasick automaton over all topics finds them in a single
+    pass over the label; the longest, i.e. most specific, topic wins);
+  - fuzzy: otherwise label tokens are matched to topic tokens within one edit
+    (typos, plurals) through a deletion index, and the topic with the best token
+    coverage wins if it covers at least FUZZY_MIN_COVERAGE of its tokens;
+  - unresolved: anything else. Counts per outcome (and a few unresolved labels)
+    are kept in `stats`, so dropped classifications are visible.
+
+Stdlib only, so the Streamlit apps can share it.
+"""
+import re
+import threading
+import unicodedata
+from collections import deque
+
+FUZZY_MIN_COVERAGE = 0.6
+MAX_UNRESOLVED_SAMPLES = 10
+
+_ENUMERATOR = re.compile(r"^(?:module|unit|chapter|topic)\s*(?:\d+|[ivx]+\b)\s*")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    """
+    Lowercase ASCII words separated by single spaces; "&" reads as "and" and
+    leading "Module 3:" style enumerators are dropped.
+    """
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    text = _NON_WORD.sub(" ", text.replace("&", " and ")).strip()
+    return _ENUMERATOR.sub("", text).strip() or text
+
+
+def _deletes(token):
+    """
+    The token and every variant with one character deleted.
+    """
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class TopicMatcher:
+    def __init__(self, topics):
+        self.topics = list(topics)
+        self.exact = {}
+        self.topic_tokens = {}
+        for topic in self.topics:
+            key = normalize(topic)
+            if key and key not in self.exact:
+                self.exact[key] = topic
+                self.topic_tokens[topic] = set(key.split())
+        self._build_automaton()
+        self._build_fuzzy_index()
+        self.lock = threading.Lock()
+        self.stats = {"exact": 0, "fuzzy": 0, "unresolved": 0, "unresolved_labels": []}
+
+    def _build_automaton(self):
+        # Patterns are padded with spaces so they only match whole words
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]  # longest topic (key, length) ending at each state
+        for key, topic in self.exact.items():
+            pattern = f" {key} "
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state] = (topic, len(pattern))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                inherited = self.output[self.fail[child]]
+                if inherited and (self.output[child] is None or inherited[1] > self.output[child][1]):
+                    self.output[child] = inherited
+
+    def _build_fuzzy_index(self):
+        self.fuzzy = {}         # deletion variant -> vocabulary tokens
+        self.token_topics = {}  # vocabulary token -> topics using it
+        for topic, tokens in self.topic_tokens.items():
+            for token in tokens:
+                self.token_topics.setdefault(token, []).append(topic)
+                variants = _deletes(token) if len(token) > 3 else {token}
+                for variant in variants:
+                    self.fuzzy.setdefault(variant, set()).add(token)
+
+    def _contained(self, label):
+        best = None
+        state = 0
+        for ch in f" {label} ":
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            found = self.output[state]
+            if found and (best is None or found[1] > best[1]):
+                best = found
+        return best[0] if best else None
+
+    def _similar_tokens(self, token):
+        if len(token) <= 3:
+            return self.fuzzy.get(token, set())
+        matches = set()
+        for variant in _deletes(token):
+            for candidate in self.fuzzy.get(variant, ()):
+                if abs(len(candidate) - len(token)) <= 1 and _within_one_edit(token, candidate):
+                    matches.add(candidate)
+        return matches
+
+    def _fuzzy(self, label):
+        matched = set()
+        for token in label.split():
+            matched |= self._similar_tokens(token)
+        candidates = dict.fromkeys(topic for token in matched for topic in self.token_topics[token])
+        best, best_score = None, 0
+        for topic in candidates:
+            tokens = self.topic_tokens[topic]
+            coverage = len(tokens & matched) / len(tokens)
+            if coverage >= FUZZY_MIN_COVERAGE and coverage > best_score:
+                best, best_score = topic, coverage
+        return best
+
+    def match(self, label):
+        """
+        (topic or None, "exact" | "fuzzy" | "unresolved") for an LLM label.
+        """
+        key = normalize(label)
+        topic = self.exact.get(key) or (self._contained(key) if key else None)
+        outcome = "exact"
+        if topic is None and key:
+            topic = self._fuzzy(key)
+            outcome = "fuzzy"
+        if topic is None:
+            outcome = "unresolved"
+        return topic, outcome
+
+    def resolve(self, label):
+        """
+        Topic for `label` (or None), counted in `stats`.
+        """
+        topic, outcome = self.match(label)
+        self._count(outcome, label)
+        return topic
+
+    def resolve_id(self, value):
+        """
+        Topic for a 1-based number into `topics` (indexed classification answers),
+        counted in `stats`. Answers that are not numbers are resolved as labels.
+        """
+        if isinstance(value, str) and not value.strip().isdigit():
+            return self.resolve(value)
+        index = value if isinstance(value, int) and not isinstance(value, bool) else None
+        if isinstance(value, str):
+            index = int(value)
+        topic = self.topics[index - 1] if index is not None and 1 <= index <= len(self.topics) else None
+        self._count("exact" if topic else "unresolved", str(value))
+        return topic
+
+    def _count(self, outcome, label):
+        with self.lock:
+            self.stats[outcome] += 1
+            samples = self.stats["unresolved_labels"]
+            if outcome == "unresolved" and len(samples) < MAX_UNRESOLVED_SAMPLES and label not in samples:
+                samples.append(label)
+
+
+def _within_one_edit(a, b):
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
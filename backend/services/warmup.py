@@ -0,0 +1,70 @@
+"""
+Cold-start support.
+
+The services import their heavy dependencies (the PDF text backend, the Groq SDK,
+fpdf, NumPy, PyMuPDF) on first use, so the app starts serving quickly. warm_up()
+loads them ahead of the first real request instead: in a background thread at
+startup when WARMUP=1, or when a client hits /api/warmup (the frontend does so as
+the upload page opens).
+"""
+import importlib
+import os
+import threading
+import time
+from services.pdf_text import BACKEND_MODULES, PDF_TEXT_BACKEND
+
+WARMUP = os.getenv("WARMUP", "0").lower() in ("1", "true", "yes")
+
+# Loaded in this order; each costs tens to hundreds of milliseconds on first import
+HEAVY_MODULES = list(dict.fromkeys([
+    BACKEND_MODULES.get(PDF_TEXT_BACKEND, "fitz"),
+    "groq",
+    "services.allocator",
+    "services.pdf_maker",
+    "fitz",
+]))
+
+_lock = threading.Lock()
+_thread = None
+_timings = {}
+
+
+def warm_up():
+    """
+    Imports the heavy modules and parses the PDF font metrics.
+    Returns {step: seconds}.
+    """
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Warm-up could not import {name}: {e}")
+            continue
+        _timings[name] = round(time.perf_counter() - start, 4)
+
+    from services.pdf_fonts import font_metrics, unicode_fonts
+
+    start = time.perf_counter()
+    for path in set((unicode_fonts() or {}).values()):
+        if path:
+            font_metrics(path)
+    _timings["font_metrics"] = round(time.perf_counter() - start, 4)
+    return dict(_timings)
+
+
+def start_warmup():
+    """
+    Runs warm_up() once per process in a daemon thread; later calls are no-ops.
+    """
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def warmup_status():
+    return {"started": _thread is not None, "done": bool(_thread and not _thread.is_alive()),
+            "timings": dict(_timings)}
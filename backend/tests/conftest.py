@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Services import each other as `services.x`, so tests run with backend/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
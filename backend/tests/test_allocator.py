@@ -0,0 +1,48 @@
+from services.allocator import allocate_sections, allocate_topics, apportion
+
+
+def test_apportion_is_proportional_and_exact():
+    assert apportion([3, 1], 8).tolist() == [6, 2]
+    assert apportion([1, 1, 1], 10).sum() == 10
+
+
+def test_apportion_fills_zero_weight_bins_when_bounds_require():
+    assert apportion([1, 0, 0], 5, 0, [2, 2, 2]).tolist() == [2, 2, 1]
+
+
+def test_apportion_respects_bounds():
+    seats = apportion([10, 1, 1], 9, 1, 4)
+    assert seats.sum() == 9
+    assert seats.min() >= 1 and seats.max() <= 4
+
+
+def test_apportion_infeasible_upper_bounds_fill_to_maximum():
+    assert apportion([1, 1], 10, 0, [2, 3]).tolist() == [2, 3]
+
+
+def test_apportion_infeasible_minimums_favour_heavy_bins():
+    seats = apportion([5, 3, 1], 4, 2)
+    assert seats.sum() == 4
+    assert seats.tolist()[:2] == [2, 2]
+
+
+def test_apportion_degenerate_inputs():
+    assert apportion([], 5).tolist() == []
+    assert apportion([1, 2], 0).tolist() == [0, 0]
+    assert apportion([0, 0], 4).tolist() == [2, 2]
+
+
+def test_allocate_topics_sums_to_total():
+    counts = allocate_topics({"A": 0.5, "B": 0.3, "C": 0.2}, 7, min_per_topic=1)
+    assert sum(counts.values()) == 7
+    assert min(counts.values()) >= 1
+
+
+def test_allocate_sections_section_totals_are_exact():
+    pattern = {
+        "Section A": {"total_questions": 10, "marks_per_question": 1},
+        "Section B": {"total_questions": 4, "marks_per_question": 5},
+    }
+    result = allocate_sections({"A": 3, "B": 1}, pattern)
+    assert sum(result["Section A"].values()) == 10
+    assert sum(result["Section B"].values()) == 4
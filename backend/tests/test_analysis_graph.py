@@ -0,0 +1,68 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("groq")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_groq import start_server  # noqa: E402
+from services import metrics  # noqa: E402
+from services.analyzer import analyze_syllabus_and_pyqs, analyze_syllabus_and_pyqs_async  # noqa: E402
+
+TOPICS = {"Regression": 8, "Sampling": 6, "Hypothesis Testing": 6}
+LATENCY_S = 0.15
+
+
+@pytest.fixture
+def mock_groq(monkeypatch):
+    server, state, base_url = start_server(latency_ms=LATENCY_S * 1000, jitter_ms=0, seed=0)
+    monkeypatch.setenv("GROQ_BASE_URL", base_url)
+    yield state
+    server.shutdown()
+
+
+@pytest.fixture
+def pyq_paths(tmp_path):
+    paths = []
+    for year in (2022, 2023):
+        doc = fitz.open()
+        page = doc.new_page()
+        page.insert_text((50, 60), f"University of Mumbai, May {year} examination")
+        for i in range(4):
+            page.insert_text((50, 100 + 20 * i), f"Q{i + 1}. Explain the role of question {i} in the analysis?")
+        path = tmp_path / f"{year}-May QA.pdf"
+        doc.save(str(path))
+        paths.append(str(path))
+    return paths
+
+
+def check(result, state):
+    assert result["syllabus_topics"] == TOPICS
+    assert sum(result["frequency"].values()) == 8
+    assert result["paper_pattern"] and result["extracted_header"]
+    assert sum(result["default_allocation"].values()) > 0
+    assert state.snapshot()["by_kind"] == {"pattern": 1, "header": 1, "classify_batch": 2}
+
+
+def test_branches_overlap(mock_groq, pyq_paths):
+    request = metrics.start_request()
+    start = time.perf_counter()
+    result = analyze_syllabus_and_pyqs("syllabus", pyq_paths, "mock", reference_text="Structure/Pattern sample",
+                                       syllabus_topics=TOPICS)
+    elapsed = time.perf_counter() - start
+    check(result, mock_groq)
+    # Run one after another, the LLM-bound branches would take at least the sum of their times
+    branches = ("pattern_extraction", "header_extraction", "classification")
+    assert elapsed < 0.75 * sum(request.stages[name] for name in branches)
+
+
+def test_async_graph(mock_groq, pyq_paths):
+    result = asyncio.run(analyze_syllabus_and_pyqs_async("syllabus", pyq_paths, "mock",
+                                                         reference_text="Structure/Pattern sample",
+                                                         syllabus_topics=TOPICS))
+    check(result, mock_groq)
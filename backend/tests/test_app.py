@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+import app  # noqa: E402
+from services.syllabus_registry import SyllabusRegistry  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    registry = SyllabusRegistry(str(tmp_path / "registry.json"))
+    registry.register("syllabus v1", {"Introduction": 6, "Sorting": 8}, "CSC604")
+    monkeypatch.setattr(app, "syllabus_registry", registry)
+    return app.app.test_client()
+
+
+def test_syllabus_versions(client):
+    assert client.get("/api/syllabi/csc604?version=1").get_json()["version"] == 1
+    assert client.get("/api/syllabi/CSC604?version=2").status_code == 404
+    assert client.get("/api/syllabi/CSC604?version=abc").status_code == 400
+
+
+def test_analyze_rejects_a_malformed_syllabus_version(client):
+    response = client.post("/api/analyze", data={"course_code": "CSC604", "syllabus_version": "abc"})
+    assert response.status_code == 404
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("quart_cors")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import asgi_app  # noqa: E402
+from mock_groq import start_server  # noqa: E402
+
+
+@pytest.fixture
+def mock_groq(monkeypatch):
+    server, state, base_url = start_server(latency_ms=0, jitter_ms=0, seed=0)
+    monkeypatch.setenv("GROQ_BASE_URL", base_url)
+    yield state
+    server.shutdown()
+
+
+def test_generate_runs_topic_sections_concurrently(mock_groq):
+    async def run():
+        async with asgi_app.app.test_app() as test_app:
+            client = test_app.test_client()
+            response = await client.post("/api/generate", json={
+                "api_key": "mock", "allocation": {"Regression": 2, "Sampling": 1, "Unused": 0}})
+            return response.status_code, await response.get_json()
+
+    status, data = asyncio.run(run())
+    assert status == 200 and not data["budget_exhausted"]
+    assert "## Topic: Regression" in data["paper_text"] and "## Topic: Sampling" in data["paper_text"]
+    assert "Unused" not in data["paper_text"]
+    assert mock_groq.snapshot()["by_kind"] == {"generate": 2}
+
+
+def test_generate_respects_the_request_budget(mock_groq):
+    async def run():
+        async with asgi_app.app.test_app() as test_app:
+            response = await test_app.test_client().post("/api/generate", json={
+                "api_key": "mock", "allocation": {"Regression": 2, "Sampling": 1}, "max_calls": 1})
+            return await response.get_json()
+
+    data = asyncio.run(run())
+    assert data["budget_exhausted"] and "[Skipped: request budget exhausted]" in data["paper_text"]
+    assert mock_groq.snapshot()["calls"] == 1
+
+
+def test_metrics_and_unknown_analysis():
+    async def run():
+        async with asgi_app.app.test_app() as test_app:
+            client = test_app.test_client()
+            metrics = await client.get("/api/metrics")
+            progress = await client.get("/api/analyze/0123456789abcdef")
+            return metrics.status_code, await metrics.get_data(as_text=True), progress.status_code
+
+    status, text, progress_status = asyncio.run(run())
+    assert status == 200 and "# TYPE qpg_stage_seconds histogram" in text
+    assert progress_status == 404
+
+
+def test_syllabus_routes(tmp_path, monkeypatch):
+    from services.syllabus_registry import SyllabusRegistry
+
+    registry = SyllabusRegistry(str(tmp_path / "registry.json"))
+    registry.register("syllabus v1", {"Introduction": 6, "Sorting": 8}, "CSC604")
+    monkeypatch.setattr(asgi_app, "syllabus_registry", registry)
+    monkeypatch.setattr(asgi_app, "ADMIN_TOKEN", "secret")
+
+    async def run():
+        async with asgi_app.app.test_app() as test_app:
+            client = test_app.test_client()
+            known = await (await client.get("/api/syllabi")).get_json()
+            statuses = [(await client.get(f"/api/syllabi/CSC604?version={v}")).status_code for v in ("1", "2", "abc")]
+            denied = await client.put("/api/syllabi/CSC604/override", json={"topics": {"Pinned": 10}})
+            pinned = await client.put("/api/syllabi/CSC604/override", json={"topics": {"Pinned": 10}},
+                                      headers={"X-Admin-Token": "secret"})
+            entry = await (await client.get("/api/syllabi/csc604")).get_json()
+            return known, statuses, denied.status_code, pinned.status_code, entry
+
+    known, statuses, denied, pinned, entry = asyncio.run(run())
+    assert [k["course_code"] for k in known["syllabi"]] == ["CSC604"]
+    assert statuses == [200, 404, 400]
+    assert (denied, pinned) == (403, 200)
+    assert entry["topics"] == {"Pinned": 10} and entry["source"] == "admin"
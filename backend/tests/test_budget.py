@@ -0,0 +1,108 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.budget import Budget, BudgetExhausted, budget_scope, stratified_sample
+from services.llm import chat_completion, estimate_tokens
+
+
+class FakeClient:
+    """
+    Groq-shaped client whose calls block until released, to overlap them.
+    """
+
+    def __init__(self, total_tokens=50, gate=None):
+        self.total_tokens = total_tokens
+        self.gate = gate
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=self.total_tokens), choices=[])
+
+
+def call(client, budget, results):
+    with budget_scope(budget):
+        try:
+            chat_completion(client, "classify", model="m", messages=[{"role": "user", "content": "x" * 40}],
+                            max_tokens=10)
+            results.append("ok")
+        except BudgetExhausted:
+            results.append("stopped")
+
+
+def test_concurrent_calls_do_not_overshoot_max_calls():
+    gate = threading.Event()
+    client, budget, results = FakeClient(gate=gate), Budget(max_calls=3), []
+    threads = [threading.Thread(target=call, args=(client, budget, results)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 3
+    assert results.count("ok") == 3 and budget.calls == 3
+    assert budget.reserved_calls == 0 and budget.reserved_tokens == 0
+    assert budget.reason == "max_calls"
+
+
+def test_reservation_counts_estimated_tokens_then_settles_to_usage():
+    budget = Budget(max_tokens=100)
+    assert estimate_tokens({"messages": [{"content": "x" * 40}], "max_tokens": 10}) == 20
+    reserved = budget.reserve(60)
+    with pytest.raises(BudgetExhausted):
+        budget.reserve(60)  # 120 would not fit next to the call in flight
+    budget.settle(reserved, SimpleNamespace(usage=SimpleNamespace(total_tokens=30)))
+    assert (budget.calls, budget.tokens, budget.reserved_tokens) == (1, 30, 0)
+    budget.release(budget.reserve(60))
+    assert (budget.calls, budget.tokens) == (1, 30)
+
+
+def test_failed_call_releases_its_reservation():
+    class Failing(FakeClient):
+        def create(self, **kwargs):
+            raise ValueError("boom")
+
+    budget = Budget(max_calls=1)
+    with budget_scope(budget), pytest.raises(ValueError):
+        chat_completion(Failing(), "classify", model="m", messages=[])
+    assert (budget.calls, budget.reserved_calls) == (0, 0)
+    budget.check()
+
+
+def test_deadline_and_allowance():
+    budget = Budget(deadline_seconds=0.01)
+    assert budget.allowance() is None
+    time.sleep(0.02)
+    with pytest.raises(BudgetExhausted):
+        budget.check()
+    assert budget.reason == "deadline"
+    budget = Budget(max_calls=10, max_tokens=1000)
+    budget.reserve(200)
+    assert budget.allowance(tokens_per_call=100, reserve_calls=1) == 7
+
+
+def test_from_request_only_tightens(monkeypatch):
+    monkeypatch.setenv("BUDGET_MAX_CALLS", "5")
+    assert Budget.from_request(max_calls=50).max_calls == 5
+    assert Budget.from_request(max_calls="2").max_calls == 2
+    assert Budget.from_request(max_tokens="junk").max_tokens is None
+
+
+def test_stratified_sample_spreads_across_groups():
+    groups = [list(range(10)), list(range(100, 102)), []]
+    sampled = stratified_sample(groups, 6)
+    assert [len(g) for g in sampled] == [4, 2, 0]
+    assert sampled[0] == [0, 2, 5, 7]
+    assert stratified_sample(groups, None) == groups
@@ -0,0 +1,80 @@
+import json
+
+from services import checkpoints
+from services.checkpoints import CheckpointStore, analysis_key, valid_id
+
+TOPICS = {"Regression": 8, "Sampling": 6}
+QUESTIONS = [f"Question number {i} about regression and sampling" for i in range(50)]
+
+
+def counting_saves(monkeypatch):
+    saves = []
+    real_save = checkpoints.save_json_atomic
+
+    def save(path, data):
+        saves.append(path)
+        real_save(path, data)
+
+    monkeypatch.setattr(checkpoints, "save_json_atomic", save)
+    return saves
+
+
+def test_analysis_key_prefers_valid_client_ids(tmp_path):
+    paper = tmp_path / "p.pdf"
+    paper.write_bytes(b"paper")
+    assert valid_id("0123abcd") and not valid_id("XYZ") and not valid_id("abc")
+    assert analysis_key("syllabus", [str(paper)], "0123abcd") == "0123abcd"
+    assert analysis_key("syllabus", [str(paper)], "bad") == analysis_key("syllabus", [str(paper)])
+
+
+def test_records_are_batched_and_flushed_per_paper(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_FLUSH_SECONDS", 3600)
+    saves = counting_saves(monkeypatch)
+    store = CheckpointStore(str(tmp_path))
+    run = store.open("a" * 32)
+    run.start(TOPICS, [("p1", "p1.pdf", QUESTIONS)])
+    paper = run.paper("p1")
+    for q in QUESTIONS:
+        paper.record([(q, "Regression")])
+    assert len(saves) == 1  # start() only
+    assert run.progress()["frequency"] == {"Regression": 50}
+    paper.flush()
+    paper.flush()
+    assert len(saves) == 2
+    data = json.loads((tmp_path / f"{'a' * 32}.json").read_text())
+    assert len(data["papers"]["p1"]["labels"]) == 50
+
+
+def test_records_are_saved_once_the_interval_passes(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_FLUSH_SECONDS", 0)
+    saves = counting_saves(monkeypatch)
+    run = CheckpointStore(str(tmp_path)).open("b" * 32)
+    run.start(TOPICS, [("p1", "p1.pdf", QUESTIONS[:3])])
+    run.paper("p1").record([(QUESTIONS[0], "Sampling")])
+    assert len(saves) == 2
+
+
+def test_shared_run_stays_open_until_last_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_FLUSH_SECONDS", 3600)
+    store = CheckpointStore(str(tmp_path))
+    first = store.open("c" * 32)
+    second = store.open("c" * 32)
+    assert first is second
+    first.start(TOPICS, [("p1", "p1.pdf", QUESTIONS[:2])])
+    store.close(first)
+    assert store.open("c" * 32) is second
+    store.close(second)
+    second.paper("p1").record([(QUESTIONS[0], "Sampling")])
+    store.close(second)
+    # Closed by everyone: progress now comes from disk, with the flushed label
+    assert "c" * 32 not in store._runs
+    assert store.progress("c" * 32)["frequency"] == {"Sampling": 1}
+
+
+def test_labels_reset_for_a_new_topic_list(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    run = store.open("d" * 32)
+    run.start(TOPICS, [("p1", "p1.pdf", QUESTIONS[:2])])
+    run.paper("p1").record([(QUESTIONS[0], "Sampling")])
+    assert run.start(TOPICS, [("p1", "p1.pdf", QUESTIONS[:2])]) == 1
+    assert run.start({"Other": 1}, [("p1", "p1.pdf", QUESTIONS[:2])]) == 0
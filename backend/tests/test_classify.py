@@ -0,0 +1,85 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from services.analyzer import _batch_labels, _batch_max_tokens, classify_questions, classify_questions_async
+
+TOPICS = {"Regression": 8, "Sampling": 6}
+QUESTIONS = [f"Explain the regression model number {i} in detail with an example" for i in range(6)] + \
+            [f"Describe stratified sampling scheme number {i} with a neat example" for i in range(6)]
+
+
+def reply(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                           usage=SimpleNamespace(total_tokens=10))
+
+
+def answer(kwargs, truncate):
+    """
+    Batch prompts get a cut-off JSON answer when `truncate`; single-question
+    prompts are answered with the topic name.
+    """
+    prompt = kwargs["messages"][0]["content"]
+    if "Respond with JSON only" in prompt:
+        count = prompt.count("\nQ")
+        labels = json.dumps({"labels": [1] * count})
+        return reply(labels[:len(labels) // 2] if truncate else labels)
+    return reply("Regression" if "regression" in prompt.split("Question:")[1] else "Sampling")
+
+
+class FakeClient:
+    def __init__(self, truncate=False):
+        self.truncate = truncate
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, **kwargs):
+        self.prompts.append(kwargs)
+        return answer(kwargs, self.truncate)
+
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, **kwargs):
+        self.prompts.append(kwargs)
+        return answer(kwargs, self.truncate)
+
+
+def test_batch_max_tokens_fits_wide_ids_with_headroom():
+    labels = json.dumps({"labels": [123] * 10})
+    # Worst case of one token per character still fits
+    assert _batch_max_tokens(10, 150) >= len(labels)
+    assert _batch_max_tokens(10, 150) > _batch_max_tokens(10, 9)
+
+
+def test_batch_labels_rejects_cut_off_and_non_object_answers():
+    assert _batch_labels('{"labels": [1, 2]}', 3) == [1, 2, None]
+    for content in ('{"labels": [1, 2', '[1, 2]', '{"topics": [1]}'):
+        try:
+            _batch_labels(content, 2)
+        except ValueError:
+            continue
+        raise AssertionError(content)
+
+
+def test_unreadable_batch_falls_back_to_single_questions():
+    client = FakeClient(truncate=True)
+    frequency, classified = classify_questions(client, QUESTIONS, TOPICS)
+    assert classified == len(QUESTIONS)
+    assert frequency == {"Regression": 6, "Sampling": 6}
+
+
+def test_unreadable_batch_falls_back_async():
+    client = FakeAsyncClient(truncate=True)
+    frequency, classified = asyncio.run(classify_questions_async(client, QUESTIONS, TOPICS))
+    assert classified == len(QUESTIONS)
+    assert frequency == {"Regression": 6, "Sampling": 6}
+
+
+def test_readable_batches_make_one_call_each():
+    client = FakeClient()
+    frequency, classified = classify_questions(client, QUESTIONS, TOPICS)
+    assert classified == len(QUESTIONS) and frequency == {"Regression": 12}
+    assert len(client.prompts) == 2
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+for module in ("gradio", "huggingface_hub", "langchain_community", "langchain_text_splitters", "fastembed", "faiss"):
+    pytest.importorskip(module)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import code_sample  # noqa: E402
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_upload_digest_ignores_names_and_order(tmp_path):
+    a, b = write(tmp_path, "a.pdf", b"first"), write(tmp_path, "b.pdf", b"second")
+    renamed = write(tmp_path, "renamed.pdf", b"first")
+    assert code_sample.upload_digest([a, b]) == code_sample.upload_digest([b, renamed])
+    assert code_sample.upload_digest([a]) != code_sample.upload_digest([b])
+
+
+def test_knowledge_bases_are_built_once_and_evicted_lru(tmp_path, monkeypatch):
+    built = []
+    monkeypatch.setattr(code_sample, "build_knowledge_base", lambda paths: built.append(paths) or {"paths": paths})
+    monkeypatch.setattr(code_sample, "VECTOR_CACHE_SIZE", 2)
+    monkeypatch.setattr(code_sample, "_knowledge_bases", code_sample.OrderedDict())
+    uploads = [[write(tmp_path, f"{i}.pdf", bytes([i]))] for i in range(3)]
+
+    assert code_sample.get_knowledge_base(uploads[0])[1] is False
+    assert code_sample.get_knowledge_base(uploads[0]) == ({"paths": uploads[0]}, True)
+    code_sample.get_knowledge_base(uploads[1])
+    code_sample.get_knowledge_base(uploads[0])  # most recently used again
+    code_sample.get_knowledge_base(uploads[2])  # evicts uploads[1]
+    assert code_sample.get_knowledge_base(uploads[1])[1] is False
+    assert len(built) == 4
+
+
+def test_combine_sets():
+    assert code_sample.combine_sets(["A", "B"]) == "\n\n" + "=" * 80 + "A\n\nB"
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("langchain_groq")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+QA_DIR = os.path.join(REPO_DIR, "QA")
+sys.path.insert(0, REPO_DIR)
+
+import generate_paper  # noqa: E402
+
+
+class FakeResponse:
+    content = "Q1. Explain regression."
+    response_metadata = {"token_usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+
+
+class FakeChain:
+    async def ainvoke(self, inputs):
+        return FakeResponse()
+
+
+def test_batch_records_per_subject_extraction_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_paper, "build_chain", lambda api_key: FakeChain())
+    subjects = [
+        {"name": "small", "files": [os.path.join(QA_DIR, "2023-May QA.pdf")]},
+        {"name": "large", "files": [os.path.join(QA_DIR, "computer-engineering-syllabus-sem-vi-mumbai-university.pdf"),
+                                    os.path.join(QA_DIR, "2023-Dec QA.pdf")]},
+    ]
+    records, extract_wall = asyncio.run(generate_paper.run_batch(subjects, str(tmp_path), "key", workers=2,
+                                                                 rate_per_minute=0))
+    seconds = {r["name"]: r["extract_seconds"] for r in records}
+    assert all(r["status"] == "done" for r in records)
+    assert 0 < seconds["small"] < seconds["large"]
+    _, summary = generate_paper.write_summary(records, str(tmp_path), 1.0, extract_wall)
+    assert summary["extract_wall_seconds"] == extract_wall > 0
+
+
+def test_load_subjects_from_manifest(tmp_path):
+    manifest = tmp_path / "subjects.json"
+    manifest.write_text('{"Maths": ["maths/syllabus.pdf"]}', encoding="utf-8")
+    assert generate_paper.load_subjects(str(manifest)) == [
+        {"name": "Maths", "files": [os.path.join(str(tmp_path), "maths/syllabus.pdf")]}]
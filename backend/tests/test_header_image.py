@@ -0,0 +1,51 @@
+import base64
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from services.header_image import header_image_path, process_image, target_width  # noqa: E402
+
+
+def png(width, height, alpha=False):
+    """
+    Black image, or a fully transparent one with `alpha`.
+    """
+    n = 4 if alpha else 3
+    return fitz.Pixmap(fitz.csRGB, width, height, bytes(width * height * n), alpha).tobytes("png")
+
+
+def test_target_width():
+    assert target_width(25.4, 300) == 300
+
+
+def test_process_image_downscales_and_flattens_alpha():
+    jpeg = process_image(png(2000, 400, alpha=True), max_width=500)
+    pix = fitz.Pixmap(jpeg)
+    assert (pix.width, pix.height, pix.alpha) == (500, 100, 0)
+    # Fully transparent pixels become white
+    assert min(pix.pixel(0, 0)) > 245
+
+
+def test_header_image_path_is_cached_by_content(tmp_path):
+    data = "data:image/png;base64," + base64.b64encode(png(100, 50)).decode("ascii")
+    first = header_image_path(data, cache_dir=str(tmp_path))
+    mtime = os.path.getmtime(first)
+    assert first.endswith(".jpg") and header_image_path(data, cache_dir=str(tmp_path)) == first
+    assert os.path.getmtime(first) >= mtime
+    assert len(os.listdir(tmp_path)) == 1
+    assert header_image_path("not an image", cache_dir=str(tmp_path)) is None
+
+
+def test_header_image_pruned_during_lookup_is_encoded_again(tmp_path, monkeypatch):
+    data = base64.b64encode(png(100, 50)).decode("ascii")
+    path = header_image_path(data, cache_dir=str(tmp_path))
+
+    def pruned(target, *args, **kwargs):
+        os.remove(target)  # another request's _prune() wins the race
+        raise FileNotFoundError(target)
+
+    monkeypatch.setattr(os, "utime", pruned)
+    assert header_image_path(data, cache_dir=str(tmp_path)) == path
+    assert os.path.exists(path)
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+from services import metrics
+from services.metrics import (record_cache, record_llm_call, render_prometheus, server_timing_header, span,
+                              start_request, timed)
+
+
+def test_spans_are_recorded_per_request_and_globally():
+    request = start_request()
+    with span("test_stage"):
+        pass
+
+    @timed("test_stage")
+    def work():
+        return 1
+
+    @timed("test_async_stage")
+    async def async_work():
+        return 2
+
+    assert work() == 1 and asyncio.run(async_work()) == 2
+    assert set(request.stages) == {"test_stage", "test_async_stage"}
+    hist = metrics._histograms[("qpg_stage_seconds", (("stage", "test_stage"),))]
+    assert hist[-1] >= 2
+
+
+def test_llm_calls_and_server_timing():
+    request = start_request()
+    usage = SimpleNamespace(prompt_tokens=30, completion_tokens=12, total_tokens=42)
+    record_llm_call("test_task", SimpleNamespace(usage=usage), 0.2, model="m")
+    record_llm_call("test_task", None, 0.1, ok=False, model="m")
+    assert (request.llm_calls, request.tokens) == (2, 42)
+    header = server_timing_header(request)
+    assert 'llm;desc="calls=2 tokens=42"' in header and header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_prometheus_exposition():
+    record_cache("test_cache", True)
+    record_cache("test_cache", False)
+    record_llm_call("test_prom", SimpleNamespace(usage=None), 0.3, model='quoted"model')
+    text = render_prometheus()
+    assert 'qpg_cache_requests_total{cache="test_cache",result="hit"} 1' in text
+    assert 'qpg_llm_seconds_bucket{model="quoted\\"model",task="test_prom",le="0.5"} 1' in text
+    assert 'qpg_llm_seconds_count{model="quoted\\"model",task="test_prom"} 1' in text
@@ -0,0 +1,53 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from mock_groq import canned_reply, start_server  # noqa: E402
+
+
+def test_canned_reply_kinds():
+    rng = random.Random(0)
+    batch = "Classify each numbered question into one of the numbered syllabus topics.\n1. A\n2. B\n" \
+            "Questions:\nQ1: x\nQ2: y\nQ3: z"
+    kind, content = canned_reply([{"content": batch}], rng=rng)
+    assert kind == "classify_batch" and len(json.loads(content)["labels"]) == 3
+    kind, content = canned_reply([{"content": "Classify the following question into one of these topics:\n"
+                                               "        Regression, Sampling\n"}], rng=rng)
+    assert kind == "classify" and content in ("Regression", "Sampling")
+    assert canned_reply([{"content": "Generate 2 new exam questions"}])[1].count("\n") == 1
+    assert canned_reply([{"content": "anything"}], canned={"any": "fixed"}) == ("canned", "fixed")
+
+
+def test_groq_client_against_mock():
+    groq = pytest.importorskip("groq")
+    server, state, base_url = start_server(latency_ms=0, jitter_ms=0, seed=0)
+    try:
+        client = groq.Groq(api_key="mock", base_url=base_url, max_retries=0)
+        response = client.chat.completions.create(model="m", messages=[{"role": "user", "content": "Generate 3 x"}])
+        assert response.choices[0].message.content.startswith("Q1.")
+        assert response.usage.total_tokens > 0
+        stats = state.snapshot()
+        assert stats["calls"] == 1 and stats["by_kind"] == {"generate": 1}
+    finally:
+        server.shutdown()
+
+
+def test_rate_limit_injection():
+    groq = pytest.importorskip("groq")
+    server, state, base_url = start_server(latency_ms=0, jitter_ms=0, rate_429=1.0, seed=0)
+    try:
+        client = groq.Groq(api_key="mock", base_url=base_url, max_retries=0)
+        try:
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+        except groq.RateLimitError:
+            pass
+        else:
+            raise AssertionError("expected a 429")
+        assert state.snapshot()["errors_429"] == 1
+    finally:
+        server.shutdown()
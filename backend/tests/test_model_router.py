@@ -0,0 +1,31 @@
+from services.model_router import TIERS, model_chain, model_for, tier_for
+
+
+def test_default_routes_and_fallback_chain(monkeypatch):
+    monkeypatch.delenv("MODEL_ROUTES", raising=False)
+    monkeypatch.delenv("MODEL_TIER_FAST", raising=False)
+    monkeypatch.delenv("MODEL_TIER_LARGE", raising=False)
+    # Every task keeps its original fast model unless routed elsewhere
+    assert tier_for("classify") == "fast" and tier_for("generate") == "fast"
+    assert tier_for("unknown-task") == "fast"
+    assert model_chain("generate") == [TIERS["fast"]["model"]]
+    assert model_chain("classify") == [TIERS["fast"]["model"]]
+    # A caller whose own baseline is the large model
+    assert model_chain("generate", default="large") == [TIERS["large"]["model"], TIERS["fast"]["model"]]
+
+
+def test_routes_and_tier_models_from_environment(monkeypatch):
+    monkeypatch.setenv("MODEL_ROUTES", "generate=large, classify=large, pattern=bogus")
+    monkeypatch.setenv("MODEL_TIER_LARGE", "custom-large")
+    assert tier_for("generate") == "large"
+    assert tier_for("pattern") == "fast"  # unknown tier ignored, default kept
+    assert model_for("classify") == "custom-large"
+    assert model_chain("classify") == ["custom-large", TIERS["fast"]["model"]]
+    monkeypatch.setenv("MODEL_ROUTES", "generate=fast")
+    assert tier_for("generate", default="large") == "fast"
+
+
+def test_chain_skips_duplicate_models(monkeypatch):
+    monkeypatch.setenv("MODEL_ROUTES", "generate=large")
+    monkeypatch.setenv("MODEL_TIER_LARGE", TIERS["fast"]["model"])
+    assert model_chain("generate") == [TIERS["fast"]["model"]]
@@ -0,0 +1,50 @@
+from services.paper_layout import bold_runs, parse_blocks, split_options
+
+PAPER = """# Question Paper
+
+**Section A**
+
+Q1. Which measure is robust to outliers? [1 Mark]
+a) Mean  b) Median  c) Mode  d) Range
+
+Q2. Explain regression.
+   (i) Define the model.
+   (ii) State its assumptions.
+
+| Module | Marks |
+|--------|-------|
+| Regression | 10 |
+
+- Attempt all questions
+- Figures to the right indicate marks
+
+---
+Best of luck."""
+
+
+def test_split_options_needs_markers_in_order():
+    assert split_options("a) Mean  b) Median  c) Mode") == ["a) Mean", "b) Median", "c) Mode"]
+    assert split_options("(a) yes (b) no") == ["(a) yes", "(b) no"]
+    assert split_options("Explain b) then a) in detail") == ["Explain b) then a) in detail"]
+
+
+def test_parse_blocks_structure():
+    blocks = parse_blocks(PAPER)
+    types = [b["type"] for b in blocks if b["type"] != "gap"]
+    assert types == ["heading", "subheading", "question", "question", "table", "bullets", "rule", "paragraph"]
+    mcq, long_answer = [b for b in blocks if b["type"] == "question"]
+    assert mcq["options"] == ["a) Mean", "b) Median", "c) Mode", "d) Range"]
+    assert long_answer["lines"][1:] == ["   (i) Define the model.", "   (ii) State its assumptions."]
+    table = next(b for b in blocks if b["type"] == "table")
+    assert table["rows"] == [["Module", "Marks"], ["Regression", "10"]]
+
+
+def test_options_after_a_blank_line_stay_in_the_question():
+    blocks = parse_blocks("Q1. Pick one.\n\na) x\nb) y\n\nNext paragraph")
+    assert blocks[0]["options"] == ["a) x", "b) y"]
+    assert [b["type"] for b in blocks[1:]] == ["gap", "paragraph"]
+
+
+def test_bold_runs():
+    assert bold_runs("Q1. **Define** sampling") == [("Q1. ", False), ("Define", True), (" sampling", False)]
+    assert bold_runs("plain") == [("plain", False)]
@@ -0,0 +1,84 @@
+import asyncio
+
+from services import metrics
+from services.pdf_cache import LruCache, PdfRenderer, render_key
+
+PAPER = "# Question Paper\n\nQ1. Explain regression. [5 Marks]\nQ2. Define sampling. [5 Marks]"
+
+
+def test_lru_cache_bounds():
+    cache = LruCache(max_items=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1"
+
+    sized = LruCache(max_bytes=4)
+    sized.put("a", b"12")
+    sized.put("b", b"345")
+    assert sized.get("a") is None and sized.size == 3
+    sized.put("c", b"too large")
+    assert sized.get("c") is None
+
+
+def test_render_key_covers_every_input():
+    assert render_key("t", "c") != render_key("t", "c", "header")
+    assert render_key("t", "c", None, "img") != render_key("t", "c")
+
+
+def test_render_async_records_pdf_render_once():
+    request = metrics.start_request()
+    renderer = PdfRenderer(chat_agent=None)
+    pdf = asyncio.run(renderer.render_async(PAPER, "COLLEGE OF ENGINEERING"))
+    assert pdf.startswith(b"%PDF")
+    assert list(request.stages) == ["pdf_render"]
+    # A cache hit renders nothing
+    asyncio.run(renderer.render_async(PAPER, "COLLEGE OF ENGINEERING"))
+    assert renderer.render(PAPER, "COLLEGE OF ENGINEERING") == pdf
+
+
+def test_render_records_one_histogram_sample():
+    def count():
+        return (metrics._histograms.get(("qpg_stage_seconds", (("stage", "pdf_render"),))) or [0])[-1]
+
+    before = count()
+    asyncio.run(PdfRenderer(chat_agent=None).render_async(PAPER + "\nQ3. New.", "COLLEGE"))
+    assert count() == before + 1
+    PdfRenderer(chat_agent=None).render(PAPER + "\nQ4. Other.", "COLLEGE")
+    assert count() == before + 2
+
+
+class FakeChatAgent:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def refine_header_text(self, text, api_key):
+        self.calls += 1
+        return text if self.fail else text.upper()
+
+
+def test_refined_header_is_cached_unless_refinement_failed():
+    agent = FakeChatAgent()
+    renderer = PdfRenderer(agent)
+    assert renderer.refined_header("mumbai university", "key") == "MUMBAI UNIVERSITY"
+    assert renderer.refined_header("mumbai university", "key") == "MUMBAI UNIVERSITY"
+    assert agent.calls == 1
+
+    failing = FakeChatAgent(fail=True)
+    renderer = PdfRenderer(failing)
+    renderer.refined_header("raw header", "key")
+    renderer.refined_header("raw header", "key")
+    assert failing.calls == 2
+
+
+def test_prerender_makes_the_download_a_cache_hit():
+    agent = FakeChatAgent()
+    renderer = PdfRenderer(agent)
+    renderer.prerender(PAPER + "\nQ5. Prerendered.", "COLLEGE", "mumbai university", "key").result(timeout=60)
+    key = render_key(PAPER + "\nQ5. Prerendered.", "COLLEGE", "mumbai university")
+    pdf = renderer.pdfs.get(key)
+    assert pdf is not None and pdf.startswith(b"%PDF")
+    assert renderer.render(PAPER + "\nQ5. Prerendered.", "COLLEGE", "mumbai university", api_key="key") is pdf
+    assert agent.calls == 1
@@ -0,0 +1,39 @@
+import fpdf.fpdf
+import pytest
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+from services import pdf_fonts
+from services.pdf_fonts import FAMILY, GlyphSubset, setup_unicode_fonts, unicode_fonts
+
+
+def test_glyph_subset_dedupes_with_set_membership():
+    subset = GlyphSubset([65, 66])
+    subset.append(65)
+    subset.append(0x3b1)
+    assert list(subset) == [65, 66, 0x3b1] and 0x3b1 in subset
+    del subset[0]
+    assert 65 not in subset and list(subset) == [66, 0x3b1]
+
+
+def test_fpdf_module_is_not_patched():
+    assert fpdf.fpdf.TTFontFile is TTFontFile
+
+
+def render(text):
+    pdf = FPDF()
+    assert setup_unicode_fonts(pdf)
+    pdf.add_page()
+    pdf.set_font(FAMILY, "", 12)
+    pdf.cell(0, 10, text)
+    return pdf.output(dest="S")
+
+
+@pytest.mark.skipif(not unicode_fonts(), reason="no Unicode TTF font installed")
+def test_unicode_documents_share_cached_subsets():
+    pdf_fonts._subsets.clear()
+    render("Mean μ ≤ σ²")
+    cached = len(pdf_fonts._subsets)
+    assert cached >= 1
+    assert render("Mean σ² ≤ μ").startswith("%PDF")
+    assert len(pdf_fonts._subsets) == cached
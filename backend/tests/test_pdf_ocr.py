@@ -0,0 +1,46 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from services import pdf_ocr  # noqa: E402
+from services.pdf_ocr import needs_ocr, page_key, page_texts  # noqa: E402
+
+
+def scanned_pdf(text_page=True):
+    """
+    PDF bytes with a page that is one full-page image and, optionally, a text page.
+    """
+    doc = fitz.open()
+    page = doc.new_page()
+    image = fitz.Pixmap(fitz.csGRAY, 100, 140, bytes(100 * 140), False).tobytes("png")
+    page.insert_image(page.rect, stream=image)
+    if text_page:
+        doc.new_page().insert_text((72, 72), "Q1. Explain regression with an example. " * 10)
+    return doc.tobytes()
+
+
+def test_only_image_pages_need_ocr():
+    with fitz.open(stream=scanned_pdf(), filetype="pdf") as doc:
+        assert needs_ocr(doc[0], doc[0].get_text())
+        assert not needs_ocr(doc[1], doc[1].get_text())
+        blank = doc.new_page()
+        assert not needs_ocr(blank, "")
+
+
+def test_cached_pages_skip_ocr(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_ocr, "CACHE_DIR", str(tmp_path))
+    source = scanned_pdf()
+    with fitz.open(stream=source, filetype="pdf") as doc:
+        key = page_key(doc, doc[0])
+    pdf_ocr._store(key, "Q2. Scanned question")
+    texts, stats = page_texts(source)
+    assert texts[0] == "Q2. Scanned question" and "regression" in texts[1]
+    assert stats == {"pages": 2, "needs_ocr": 1, "cached": 1, "ocr": 0, "failed": 0}
+
+
+def test_without_tesseract_pages_stay_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_ocr, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(pdf_ocr, "TESSERACT_CMD", "no-such-tesseract")
+    texts, stats = page_texts(scanned_pdf(text_page=False))
+    assert texts == [""] and stats["failed"] == 1
+    assert page_texts(scanned_pdf(text_page=False), ocr=False)[1]["needs_ocr"] == 0
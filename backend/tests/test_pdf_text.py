@@ -0,0 +1,40 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from services import pdf_text  # noqa: E402
+from services.pdf_text import backend_order, extract_text, page_texts  # noqa: E402
+
+
+def write_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_backend_order():
+    assert backend_order("pypdf") == ["pypdf", "pymupdf", "langchain"]
+    with pytest.raises(ValueError):
+        backend_order("pdfminer")
+
+
+def test_backends_agree_on_simple_pages(tmp_path):
+    pytest.importorskip("pypdf")
+    path = write_pdf(tmp_path / "p.pdf", ["Q1. Explain regression.", "Q2. Define sampling."])
+    assert page_texts(path, "pymupdf") == ["Q1. Explain regression.", "Q2. Define sampling."]
+    assert page_texts(path, "pypdf") == page_texts(path, "pymupdf")
+    assert extract_text(path) == "Q1. Explain regression.\nQ2. Define sampling."
+
+
+def test_missing_backend_falls_through(tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "p.pdf", ["Only page"])
+
+    def missing(path):
+        raise ImportError("not installed")
+
+    monkeypatch.setattr(pdf_text, "_unavailable", set())
+    monkeypatch.setitem(pdf_text._EXTRACTORS, "langchain", missing)
+    assert page_texts(path, "langchain") == ["Only page"]
+    assert "langchain" in pdf_text._unavailable
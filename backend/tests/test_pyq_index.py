@@ -0,0 +1,69 @@
+from services.analyzer import _indexed_papers
+from services.pyq_index import PyqIndex, course_key, detect_year, file_hash
+from services.syllabus_registry import SyllabusRegistry
+
+TOPICS = {"Regression": 8, "Sampling": 6}
+
+
+def write_paper(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_detect_year():
+    assert detect_year("2023-Dec QA.pdf") == "2023"
+    assert detect_year("paper.pdf", "University of Mumbai, May 2019 examination") == "2019"
+    assert detect_year("paper.pdf") == "unknown"
+
+
+def test_course_key_shares_pdf_and_text_entries(tmp_path):
+    registry = SyllabusRegistry(str(tmp_path / "registry.json"))
+    from_pdf = registry.register(None, TOPICS, "CSDLO6013", fingerprint="pdfhash:CSDLO6013")
+    from_text = registry.register("pasted syllabus text", TOPICS, "CSDLO6013")
+    assert course_key(from_pdf) == course_key(from_text) == "CSDLO6013@v1"
+    assert course_key({"id": "abc", "course_code": None, "version": 1}) == "abc"
+
+
+def test_index_totals_and_years(tmp_path):
+    index = PyqIndex(str(tmp_path / "index.json"))
+    assert index.add_paper("C@v1", "p1", {"Regression": 3, "Sampling": 0}, year="2022")
+    assert not index.add_paper("C@v1", "p1", {"Regression": 3}, year="2022")
+    index.add_paper("C@v1", "p2", {"Sampling": 2}, year="2023")
+    assert index.frequencies("C@v1") == {"Regression": 3, "Sampling": 2}
+    assert index.frequencies("C@v1", years=[2023]) == {"Sampling": 2}
+    assert index.paper_frequency("C@v1", "p1") == {"Regression": 3}
+    assert PyqIndex(str(tmp_path / "index.json")).has_paper("C@v1", "p2")
+
+
+def test_processes_sharing_the_index_keep_each_others_papers(tmp_path):
+    path = str(tmp_path / "index.json")
+    server, ingest = PyqIndex(path), PyqIndex(path)
+    ingest.add_paper("C@v1", "h1", {"Regression": 2}, year="2022")
+    assert server.has_paper("C@v1", "h1")
+    server.add_paper("C@v1", "upload", {"Sampling": 1}, year="2023")
+    assert sorted(p["id"] for p in PyqIndex(path).stats("C@v1")["papers"]) == ["h1", "upload"]
+    assert ingest.frequencies("C@v1") == {"Regression": 2, "Sampling": 1}
+
+
+def test_indexed_papers_count_only_uploads_by_default(tmp_path):
+    index = PyqIndex(str(tmp_path / "index.json"))
+    uploaded = write_paper(tmp_path, "2023.pdf", b"uploaded paper")
+    new = write_paper(tmp_path, "2024.pdf", b"new paper")
+    index.add_paper("CSDLO6013@v1", file_hash(uploaded), {"Regression": 4})
+    index.add_paper("CSDLO6013@v1", "unrelated", {"Sampling": 9, "Not a topic": 3})
+    info = {"id": "x", "course_code": "CSDLO6013", "version": 1}
+
+    key, frequency, papers = _indexed_papers(TOPICS, info, index, [uploaded, new])
+    assert key == "CSDLO6013@v1"
+    assert dict(frequency) == {"Regression": 4}
+    assert [path for path, _ in papers] == [new]
+
+    _, frequency, papers = _indexed_papers(TOPICS, info, index, [uploaded, new], include_indexed=True)
+    assert dict(frequency) == {"Regression": 4, "Sampling": 9}
+    assert [path for path, _ in papers] == [new]
+
+
+def test_indexed_papers_without_index(tmp_path):
+    paper = write_paper(tmp_path, "a.pdf", b"a")
+    assert _indexed_papers(TOPICS, None, None, [paper]) == (None, {}, [(paper, None)])
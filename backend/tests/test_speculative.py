@@ -0,0 +1,71 @@
+import threading
+import time
+
+from services import speculative
+from services.generator import generate_paper_content, plan_paper
+from services.speculative import DraftStore
+
+ALLOCATION = {"Regression": 2, "Sampling": 1, "Hypothesis Testing": 1}
+
+
+def fake_units(monkeypatch, gate=None):
+    """
+    Replaces the LLM call with one that records its units and, given `gate`,
+    blocks until it is set.
+    """
+    calls = []
+    lock = threading.Lock()
+
+    def generate_unit(client, unit):
+        with lock:
+            calls.append(unit["name"])
+        if gate is not None:
+            gate.wait(5)
+        return unit["heading"] + f"draft {unit['name']}", True
+
+    monkeypatch.setattr(speculative, "generate_unit", generate_unit)
+    monkeypatch.setattr(speculative, "sync_client", lambda api_key: None)
+    return calls
+
+
+def test_draft_is_taken_once_as_a_copy(monkeypatch):
+    calls = fake_units(monkeypatch)
+    store = DraftStore(workers=1)
+    draft_id = store.start("key", ALLOCATION)
+    sections = store.take(draft_id, wait_seconds=5)
+    assert len(sections) == 3 and len(calls) == 3
+    sections.clear()
+    assert store.take(draft_id, wait_seconds=5) is None
+    assert store.take("unknown") is None
+
+
+def test_taking_a_running_draft_stops_it_within_the_wait(monkeypatch):
+    gate = threading.Event()
+    calls = fake_units(monkeypatch, gate)
+    store = DraftStore(workers=1)
+    draft_id = store.start("key", ALLOCATION)
+    threading.Timer(0.4, gate.set).start()
+    start = time.monotonic()
+    sections = store.take(draft_id, wait_seconds=0.2)
+    assert time.monotonic() - start < 0.35  # one deadline for the draft and its in-flight section
+    store.executor.shutdown(wait=True)
+    # The first section was still in flight and is left to the caller; the draft started no others
+    assert calls == ["Regression"] and sections == {}
+
+
+def test_generate_reuses_unchanged_draft_sections(monkeypatch):
+    from services import generator
+
+    generated = []
+
+    def generate_unit(client, unit):
+        generated.append(unit["name"])
+        return unit["heading"] + "fresh", True
+
+    monkeypatch.setattr(generator, "generate_unit", generate_unit)
+    monkeypatch.setattr(generator, "sync_client", lambda api_key: None)
+    units = plan_paper(ALLOCATION)
+    cache = {units[0]["key"]: units[0]["heading"] + "from draft"}
+    paper = generate_paper_content(ALLOCATION, "key", section_cache=cache)
+    assert "from draft" in paper
+    assert generated == ["Sampling", "Hypothesis Testing"]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from services.syllabus_parser import (DEFAULT_MIN_CONFIDENCE, detect_course_code, detect_course_codes,
+                                      parse_syllabus_courses, parse_syllabus_pdf, parse_syllabus_text)
+
+SYLLABUS_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "QA",
+                            "computer-engineering-syllabus-sem-vi-mumbai-university.pdf")
+
+
+def test_inline_layout():
+    result = parse_syllabus_text("Module 1: Introduction (6 Hours)\nModule 2: Sorting Algorithms (8 Hours)\n"
+                                 "Module 3: Graph Theory (10 Hrs)")
+    assert result["topics"] == {"Introduction": 6, "Sorting Algorithms": 8, "Graph Theory": 10}
+    assert result["method"] == "inline"
+
+
+def test_three_line_table_layout():
+    result = parse_syllabus_text("Course Code: CSC604 Artificial Intelligence\n1\nIntroduction\n6\n"
+                                 "2\nIntelligent Agents\n8\n3\nProblem Solving\n10")
+    assert result["topics"] == {"Introduction": 6, "Intelligent Agents": 8, "Problem Solving": 10}
+    assert result["course_code"] == "CSC604"
+
+
+def test_chain_stops_at_course_boundary():
+    text = ("Course Code: CSC601\n1\nSystem Software\n4\n2\nAssemblers\n8\n"
+            "Course Code: CSC602\n3\nHash Functions\n6\n4\nSignatures\n5")
+    result = parse_syllabus_text(text)
+    assert result["topics"] == {"System Software": 4, "Assemblers": 8}
+    assert result["course_code"] == "CSC601"
+    # Picked among two courses: never confident enough to skip the LLM
+    assert result["confidence"] < DEFAULT_MIN_CONFIDENCE
+
+
+def test_course_code_selects_its_table():
+    text = ("Course Code: CSC601\n1\nSystem Software\n4\n2\nAssemblers\n8\n"
+            "Course Code: CSC602\n1\nHash Functions\n6\n2\nSignatures\n5\n3\nKey Exchange\n7")
+    result = parse_syllabus_text(text, course_code="csc602")
+    assert result["topics"] == {"Hash Functions": 6, "Signatures": 5, "Key Exchange": 7}
+    assert result["course_code"] == "CSC602" and result["confidence"] >= DEFAULT_MIN_CONFIDENCE
+    assert parse_syllabus_text(text, course_code="CSC699")["topics"] == {}
+
+
+def test_rubric_rows_score_low():
+    # Numbered rows where the "hours" column is the next row's number
+    text = "\n".join(f"{i}\nCriterion number {i} for review\n" for i in range(1, 7)) + "7"
+    assert parse_syllabus_text(text)["confidence"] < DEFAULT_MIN_CONFIDENCE
+
+
+def test_jumped_rows_are_penalised():
+    clean = parse_syllabus_text("1\nIntroduction\n6\n2\nBasic Sorting\n8\n3\nGraph search\n10")
+    noisy = parse_syllabus_text("1\nIntroduction\n6\n5\nRecommended Book One\n4\n2\nBasic Sorting\n8\n"
+                                "9\nSome other numbered row\n3\n3\nGraph search\n10")
+    assert noisy["topics"] == clean["topics"]
+    assert noisy["confidence"] < clean["confidence"]
+
+
+def test_detect_course_codes():
+    text = "Course Code: CSC601 System Programming\n...\nCourse Code: CSDLO6013 Quantitative Analysis"
+    assert detect_course_code(text) == "CSC601"
+    assert detect_course_codes(text) == ["CSC601", "CSDLO6013"]
+
+
+def test_multi_course_syllabus_text():
+    pytest.importorskip("fitz")
+    from services.pdf_text import extract_text
+
+    courses = {c["course_code"]: c for c in parse_syllabus_courses(SYLLABUS_PDF)}
+    assert len(courses) == 6 and all(c["confidence"] == 1.0 for c in courses.values())
+
+    # Without a course code the result for the whole semester is a guess
+    assert parse_syllabus_pdf(SYLLABUS_PDF)["confidence"] < DEFAULT_MIN_CONFIDENCE
+    text = extract_text(SYLLABUS_PDF, "pymupdf")
+    result = parse_syllabus_text(text)
+    for junk in ("Test", "Planning Programming", "Clarity in written and oral communication"):
+        assert junk not in result["topics"]
+    assert result["confidence"] < DEFAULT_MIN_CONFIDENCE
+
+    for code in ("CSC601", "CSDLO6013"):
+        result = parse_syllabus_text(text, course_code=code)
+        assert result["course_code"] == code and result["confidence"] >= DEFAULT_MIN_CONFIDENCE
+        assert list(result["topics"].values()) == list(courses[code]["topics"].values())
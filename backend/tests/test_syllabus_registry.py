@@ -0,0 +1,95 @@
+import pytest
+
+from services.analyzer import _register_syllabus
+from services.syllabus_registry import SyllabusRegistry, syllabus_fingerprint
+
+TOPICS_V1 = {"Introduction": 6, "Sorting": 8}
+TOPICS_V2 = {"Introduction": 4, "Graphs": 10}
+
+
+def make_registry(tmp_path):
+    return SyllabusRegistry(str(tmp_path / "registry.json"))
+
+
+def test_fingerprint_ignores_formatting():
+    assert syllabus_fingerprint("Module 1: Intro") == syllabus_fingerprint("  module 1 - INTRO ")
+
+
+def test_register_and_lookup_persist(tmp_path):
+    registry = make_registry(tmp_path)
+    entry = registry.register("syllabus v1", TOPICS_V1, "csc604")
+    assert entry["course_code"] == "CSC604" and entry["version"] == 1
+    reloaded = make_registry(tmp_path)
+    assert reloaded.lookup(text="syllabus v1")["topics"] == TOPICS_V1
+    assert reloaded.lookup(course_code="CSC604")["id"] == entry["id"]
+
+
+def test_parser_entries_do_not_supersede(tmp_path):
+    registry = make_registry(tmp_path)
+    first = registry.register("syllabus v1", TOPICS_V1, "CSC604")
+    second = registry.register("syllabus v2", TOPICS_V2, "CSC604")
+    assert second["version"] is None
+    assert registry.lookup(course_code="CSC604")["id"] == first["id"]
+    assert registry.lookup(text="syllabus v2")["topics"] == TOPICS_V2
+    assert [k["id"] for k in registry.list_known()] == [first["id"]]
+
+
+def test_supersede_and_admin_sources_add_versions(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.register("syllabus v1", TOPICS_V1, "CSC604")
+    second = registry.register("syllabus v2", TOPICS_V2, "CSC604", supersede=True)
+    assert second["version"] == 2
+    assert registry.lookup(course_code="CSC604")["topics"] == TOPICS_V2
+    assert registry.lookup(course_code="CSC604", version=1)["topics"] == TOPICS_V1
+
+
+def test_override_applies_to_every_version(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.register("syllabus v1", TOPICS_V1, "CSC604")
+    registry.set_override("csc604", {"Pinned": 10})
+    assert registry.lookup(text="syllabus v1")["topics"] == {"Pinned": 10}
+    assert registry.clear_override("CSC604")
+    assert registry.lookup(text="syllabus v1")["topics"] == TOPICS_V1
+
+
+def test_processes_sharing_the_file_keep_each_others_entries(tmp_path):
+    server, ingest = make_registry(tmp_path), make_registry(tmp_path)
+    ingest.register("syllabus v1", TOPICS_V1, "CSC604")
+    server.register("other syllabus", TOPICS_V2, "CSC601")
+    assert server.lookup(course_code="CSC604")["topics"] == TOPICS_V1
+    assert {k["course_code"] for k in make_registry(tmp_path).list_known()} == {"CSC601", "CSC604"}
+
+
+SINGLE_COURSE = "Course Code: CSC604 Artificial Intelligence\n1\nIntroduction\n6\n2\nIntelligent Agents\n8\n3\nProblem Solving\n10"
+TOPICS = {"Introduction": 6, "Intelligent Agents": 8, "Problem Solving": 10}
+
+
+def test_register_syllabus_files_single_course_text(tmp_path):
+    registry = make_registry(tmp_path)
+    entry = _register_syllabus(SINGLE_COURSE, TOPICS, registry, None)
+    assert entry["course_code"] == "CSC604" and entry["version"] == 1
+
+
+def test_register_syllabus_skips_multi_course_text(tmp_path):
+    registry = make_registry(tmp_path)
+    text = SINGLE_COURSE + "\nCourse Code: CSC601 System Programming\n1\nAssemblers\n8"
+    assert _register_syllabus(text, TOPICS, registry, None) is None
+    assert registry.lookup(course_code="CSC604") is None
+
+
+def test_register_syllabus_skips_llm_topics(tmp_path):
+    registry = make_registry(tmp_path)
+    assert _register_syllabus(SINGLE_COURSE, {"Something the LLM found": 5}, registry, None) is None
+    assert registry.list_known() == []
+
+
+def test_pasted_multi_course_text_resolves_the_requested_course(tmp_path):
+    pytest.importorskip("werkzeug")
+    from services.request_inputs import resolve_syllabus
+
+    registry = make_registry(tmp_path)
+    text = "Course Code: CSC601 System Programming\n1\nAssemblers\n8\n2\nMacros\n6\n" + SINGLE_COURSE
+    _, topics, info, _ = resolve_syllabus({"syllabus_text": text, "course_code": "csc604"}, None, registry)
+    assert topics == TOPICS and info["course_code"] == "CSC604"
+    # Without a course code the text is left to the analyzer's parser
+    assert resolve_syllabus({"syllabus_text": text}, None, registry)[1] is None
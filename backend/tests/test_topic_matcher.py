@@ -0,0 +1,39 @@
+from services.topic_matcher import TopicMatcher, normalize
+
+TOPICS = ["Linear Regression", "Regression", "Sampling & Estimation", "Hypothesis Testing", "Time Series Analysis"]
+
+
+def test_normalize():
+    assert normalize("Module 3: Sampling & Estimation") == "sampling and estimation"
+    assert normalize("  Régression!! ") == "regression"
+    assert normalize("Unit IV Time-Series") == "time series"
+
+
+def test_exact_and_contained_labels_prefer_the_longest_topic():
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.match("linear regression") == ("Linear Regression", "exact")
+    assert matcher.match("The topic is Linear Regression.") == ("Linear Regression", "exact")
+    assert matcher.match("Topic: regression") == ("Regression", "exact")
+    # Whole words only: "progression" does not contain the topic "regression"
+    assert matcher.match("progression") == (None, "unresolved")
+
+
+def test_fuzzy_labels_within_one_edit():
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.match("Hypotheses Testing") == ("Hypothesis Testing", "fuzzy")
+    assert matcher.match("Hypothesys Testing") == ("Hypothesis Testing", "fuzzy")
+    assert matcher.match("Time Serie Analysis") == ("Time Series Analysis", "fuzzy")
+
+
+def test_resolve_and_resolve_id_count_outcomes():
+    matcher = TopicMatcher(TOPICS)
+    assert matcher.resolve("Sampling and Estimation") == "Sampling & Estimation"
+    assert matcher.resolve_id(2) == "Regression"
+    assert matcher.resolve_id("4") == "Hypothesis Testing"
+    assert matcher.resolve_id(0) is None and matcher.resolve_id(99) is None
+    assert matcher.resolve_id(True) is None
+    assert matcher.resolve_id("Linear Regression") == "Linear Regression"
+    assert matcher.resolve("Quantum Chromodynamics") is None
+    assert matcher.stats["exact"] == 4
+    assert matcher.stats["unresolved"] == 4
+    assert "Quantum Chromodynamics" in matcher.stats["unresolved_labels"]
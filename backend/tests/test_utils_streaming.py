@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("langchain_groq")
+fake_chat_models = pytest.importorskip("langchain_core.language_models.fake_chat_models")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import utils  # noqa: E402
+
+PAPER = "Q1. Explain regression.\nQ2. Define sampling."
+
+
+def test_stream_yields_the_paper_in_chunks():
+    llm = fake_chat_models.FakeListChatModel(responses=[PAPER])
+    chunks = list(utils.stream_question_paper("10 MCQs", {"Regression": 0.6}, "syllabus", "key", llm=llm))
+    assert len(chunks) > 1 and "".join(chunks) == PAPER
+
+
+def test_stream_reports_errors_as_text():
+    assert list(utils.stream_question_paper("p", {}, "s", "")) == ["Error: API Key missing."]
+
+    class Broken(fake_chat_models.FakeListChatModel):
+        def _stream(self, *args, **kwargs):
+            raise RuntimeError("rate limited")
+
+    chunks = list(utils.stream_question_paper("p", {"A": 1.0}, "s", "key", llm=Broken(responses=[PAPER])))
+    assert chunks[-1].endswith("Error generating paper: rate limited")
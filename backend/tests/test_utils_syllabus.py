@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("langchain_groq")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import utils  # noqa: E402
+
+UNSTRUCTURED = "Course outline: some notes about statistics without a module table."
+
+
+class FailingLLM:
+    def __or__(self, other):
+        return self
+
+    def __ror__(self, other):
+        return self
+
+    def invoke(self, inputs):
+        raise RuntimeError("invalid api key")
+
+
+def test_low_confidence_parse_falls_back_by_default():
+    assert utils.parse_syllabus_modules(UNSTRUCTURED) == utils.parse_syllabus_text(UNSTRUCTURED)["topics"]
+
+
+def test_low_confidence_parse_raises_without_fallback():
+    with pytest.raises(RuntimeError):
+        utils.parse_syllabus_modules(UNSTRUCTURED, fallback=False)
+    with pytest.raises(RuntimeError):
+        utils.parse_syllabus_modules(UNSTRUCTURED, "bad-key", llm=FailingLLM(), fallback=False)
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import warmup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("groq", "fitz", "fpdf", "numpy", "pypdf", "services.pdf_maker", "services.allocator")
+
+
+@pytest.mark.parametrize("module", ["app", "asgi_app"])
+def test_app_import_defers_heavy_modules(module):
+    pytest.importorskip("flask" if module == "app" else "quart")
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=BACKEND_DIR, capture_output=True,
+                            text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip() == ""
+
+
+def test_warm_up_loads_modules_and_reports_timings():
+    pytest.importorskip("fitz")
+    timings = warmup.warm_up()
+    assert "services.pdf_maker" in timings and "font_metrics" in timings
+    thread = warmup.start_warmup()
+    assert warmup.start_warmup() is thread
+    thread.join(30)
+    status = warmup.warmup_status()
+    assert status["started"] and status["done"]
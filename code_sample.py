@@ -1,23 +1,129 @@
 import gradio as gr
+import asyncio
+import hashlib
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 from langchain_community.vectorstores import FAISS
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
 from langchain_core.prompts import ChatPromptTemplate
 
 # --- 1. Model Setup using HF Inference Client ---
 HF_TOKEN = os.environ.get("HF_TOKEN", "")
+HF_BASE_URL = os.environ.get("HF_BASE_URL") or None  # dedicated endpoint (or backend/benchmarks/mock_groq.py)
+MODEL_ID = "meta-llama/Llama-3.2-3B-Instruct"
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", 300))
+
+# Queue tuning: requests mostly wait on HF inference, which is async, so many can
+# run at once; the CPU-bound part (PDF parsing, embeddings) is capped by CPU_WORKERS
+GRADIO_CONCURRENCY = int(os.environ.get("GRADIO_CONCURRENCY", 16))
+GRADIO_QUEUE_SIZE = int(os.environ.get("GRADIO_QUEUE_SIZE", 64))
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS", min(4, os.cpu_count() or 1)))
+VECTOR_CACHE_SIZE = int(os.environ.get("VECTOR_CACHE_SIZE", 32))  # uploads kept embedded; 0 disables
 
 if not HF_TOKEN:
     print("⚠️ Warning: HF_TOKEN not set. The app may not work properly.")
 
-# Use InferenceClient directly instead of LangChain wrapper
-client = InferenceClient(token=HF_TOKEN)
+# Async InferenceClient: waiting on the model does not hold a worker thread
+client = AsyncInferenceClient(token=HF_TOKEN, base_url=HF_BASE_URL)
+
+# --- 1b. Shared Pipeline (one per process) ---
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="pipeline")
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+_knowledge_bases = OrderedDict()  # upload digest -> {"store", "pages", "chunks"}, least recently used first
+_build_locks = {}
+_cache_lock = threading.Lock()
+
+def get_embeddings():
+    """
+    The FastEmbed model, loaded once and shared by every request.
+    """
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            _embeddings = FastEmbedEmbeddings()
+        return _embeddings
+
+def upload_digest(paths):
+    """
+    SHA-256 over the uploaded files' contents, independent of their names and order.
+    """
+    digests = []
+    for path in paths:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digests.append(digest.hexdigest())
+    return hashlib.sha256("".join(sorted(digests)).encode("ascii")).hexdigest()
+
+def build_knowledge_base(paths):
+    """
+    Loads, splits and embeds the PDFs into a FAISS store.
+    """
+    all_pages = []
+    for path in paths:
+        pages = PyPDFLoader(path).load()
+        if not pages:
+            raise ValueError(f"Could not extract text from {path}. Please ensure it's a valid PDF with text content.")
+        all_pages.extend(pages)
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=100
+    )
+    chunks = text_splitter.split_documents(all_pages)
+    store = FAISS.from_documents(chunks, get_embeddings())
+    return {"store": store, "pages": len(all_pages), "chunks": len(chunks)}
+
+def get_knowledge_base(paths):
+    """
+    The knowledge base for an upload, from the cache when the same files were seen
+    before. Concurrent requests for the same files build it once.
+    Returns (knowledge_base, cached).
+    """
+    key = upload_digest(paths)
+    with _cache_lock:
+        if key in _knowledge_bases:
+            _knowledge_bases.move_to_end(key)
+            return _knowledge_bases[key], True
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _cache_lock:
+            if key in _knowledge_bases:
+                return _knowledge_bases[key], True
+        knowledge_base = None
+        try:
+            knowledge_base = build_knowledge_base(paths)
+        finally:
+            with _cache_lock:
+                if knowledge_base is not None and VECTOR_CACHE_SIZE > 0:
+                    _knowledge_bases[key] = knowledge_base
+                    while len(_knowledge_bases) > VECTOR_CACHE_SIZE:
+                        _knowledge_bases.popitem(last=False)
+                _build_locks.pop(key, None)
+    return knowledge_base, False
+
+def retrieve_context(knowledge_base):
+    retriever = knowledge_base["store"].as_retriever(search_kwargs={"k": min(10, knowledge_base["chunks"])})
+    return retriever.invoke("Key concepts, definitions, and important topics")
 
 # --- 2. The Core Logic ---
-def generate_question_paper(
+def combine_sets(outputs):
+    """
+    The generated sets as one Markdown document (the last one may still be streaming).
+    """
+    return "\n\n" + "="*80 + "\n\n".join(outputs)
+
+async def generate_question_paper(
     pdf_files, 
     mcq_difficulty, mcq_count,
     short_difficulty, short_count,
@@ -30,57 +136,39 @@ def generate_question_paper(
     start_time = time.time()
     
     if not pdf_files or len(pdf_files) == 0:
-        return "❌ Please upload at least one PDF file."
+        yield "❌ Please upload at least one PDF file."
+        return
     
     if len(pdf_files) > 5:
-        return "❌ Error: Maximum 5 PDF files allowed."
+        yield "❌ Error: Maximum 5 PDF files allowed."
+        return
     
     if not HF_TOKEN:
-        return "❌ Error: HF_TOKEN not configured. Please add your Hugging Face token in Space Settings > Repository secrets."
+        yield "❌ Error: HF_TOKEN not configured. Please add your Hugging Face token in Space Settings > Repository secrets."
+        return
     
     total_questions = mcq_count + short_count + long_count
     if total_questions == 0:
-        return "❌ Please specify at least one question."
+        yield "❌ Please specify at least one question."
+        return
     
     try:
-        # A. Load all PDFs
-        progress(0, desc=f"📄 PDF file(s) uploaded, accessing {len(pdf_files)} file(s)...")
-        all_pages = []
-        
-        for idx, pdf_file in enumerate(pdf_files):
-            current_progress = 0.05 + (idx * 0.1 / len(pdf_files))
-            progress(current_progress, 
-                    desc=f"📂 Accessing PDF {idx + 1}/{len(pdf_files)}: {pdf_file.name.split('/')[-1][:30]}...")
-            loader = PyPDFLoader(pdf_file.name)
-            pages = loader.load()
-            
-            if not pages:
-                return f"❌ Error: Could not extract text from {pdf_file.name}. Please ensure it's a valid PDF with text content."
-            
-            all_pages.extend(pages)
-        
-        progress(0.15, desc=f"✅ PDF loaded successfully! Extracted {len(all_pages)} pages from {len(pdf_files)} file(s)")
-        
-        # B. Split Text
-        progress(0.20, desc="📝 Extracting text content from PDFs...")
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=100
-        )
-        chunks = text_splitter.split_documents(all_pages)
-        progress(0.30, desc=f"✅ Text extracted successfully! Created {len(chunks)} text chunks, preparing embeddings...")
-        
-        # C. Vector Store (FAISS)
-        progress(0.35, desc="🧠 Generating embeddings for content understanding...")
-        embeddings = FastEmbedEmbeddings()
-        progress(0.40, desc="🧠 Creating knowledge base from embeddings...")
-        vector_store = FAISS.from_documents(chunks, embeddings)
-        progress(0.50, desc="✅ Knowledge base created successfully! Analyzing content for key concepts...")
+        loop = asyncio.get_running_loop()
+
+        # A-C. Load, split and embed the PDFs (or reuse the knowledge base for these files)
+        progress(0.05, desc=f"📂 PDF file(s) uploaded, building knowledge base from {len(pdf_files)} file(s)...")
+        try:
+            knowledge_base, cached = await loop.run_in_executor(
+                cpu_pool, get_knowledge_base, [pdf_file.name for pdf_file in pdf_files])
+        except ValueError as e:
+            yield f"❌ Error: {str(e)}"
+            return
+        progress(0.50, desc=f"✅ Knowledge base {'reused' if cached else 'created'}! {knowledge_base['pages']} pages, "
+                            f"{knowledge_base['chunks']} text chunks. Analyzing content for key concepts...")
         
         # D. Retrieve Context (more chunks for multiple PDFs)
         progress(0.55, desc="🔍 Identifying key concepts and topics from content...")
-        retriever = vector_store.as_retriever(search_kwargs={"k": min(10, len(chunks))})
-        context_docs = retriever.invoke("Key concepts, definitions, and important topics")
+        context_docs = await loop.run_in_executor(cpu_pool, retrieve_context, knowledge_base)
         context_text = "\n\n".join([doc.page_content for doc in context_docs])
         progress(0.60, desc=f"✅ Analysis complete! Found {len(context_docs)} key sections. Activating AI model...")
         
@@ -146,39 +234,33 @@ Do not output conversational text. Output ONLY the exam paper in a well-formatte
             last_update_time = time.time()
             
             try:
-                for message in client.chat_completion(
+                stream = await client.chat_completion(
                     messages=messages,
-                    model="meta-llama/Llama-3.2-3B-Instruct",
+                    model=MODEL_ID,
                     max_tokens=max_tokens,
                     temperature=0.7,
                     stream=True,
-                ):
+                )
+                async for message in stream:
                     # Check total timeout
-                    if time.time() - start_time > 300:  # 5 minute total timeout
-                        return f"⏱️ Request timeout. Please try with:\n- Fewer PDF files\n- Fewer questions\n- Fewer sets\n\nPartial output:\n{response}"
+                    if time.time() - start_time > REQUEST_TIMEOUT:
+                        yield f"⏱️ Request timeout. Please try with:\n- Fewer PDF files\n- Fewer questions\n- Fewer sets\n\nPartial output:\n{response}"
+                        return
                     
                     if hasattr(message, 'choices') and len(message.choices) > 0:
                         if hasattr(message.choices[0], 'delta') and hasattr(message.choices[0].delta, 'content'):
                             response += message.choices[0].delta.content or ""
                             token_count += 1
                             
-                            # Update progress every 50 tokens to reduce overhead
-                            if token_count % 50 == 0 or time.time() - last_update_time > 2:
-                                # Calculate progress within this set (70-95% range divided by number of sets)
-                                set_start = 0.70 + (set_num - 1) * 0.30 / num_sets
-                                set_range = 0.25 / num_sets  # 25% of total progress for generation
-                                generation_progress = min((token_count / max_tokens), 1.0)
-                                current_progress = set_start + (generation_progress * set_range)
-                                percentage = int(generation_progress * 100)
-                                
-                                # Update with dynamic percentage
-                                progress(current_progress, 
-                                        desc=f"✍️ Generating Question Paper Set {set_num}/{num_sets}... {percentage}%")
+                            # Repaint the paper on the first token, then at most every 0.1s
+                            if token_count == 1 or time.time() - last_update_time > 0.1:
+                                yield combine_sets(all_outputs + [response])
                                 last_update_time = time.time()
             
             except Exception as e:
                 if response:
-                    return f"⚠️ Generation interrupted: {str(e)}\n\nPartial output for Set {set_num}:\n{response}"
+                    yield f"⚠️ Generation interrupted: {str(e)}\n\nPartial output for Set {set_num}:\n{response}"
+                    return
                 else:
                     raise e
             
@@ -189,12 +271,10 @@ Do not output conversational text. Output ONLY the exam paper in a well-formatte
         
         progress(1.0, desc=f"✅ All {num_sets} Question Paper(s) Generated Successfully! 🎉")
         
-        # Combine all sets
-        final_output = "\n\n" + "="*80 + "\n\n".join(all_outputs)
-        return final_output
+        yield combine_sets(all_outputs)
 
     except Exception as e:
-        return f"❌ Error: {str(e)}\n\nPlease check:\n1. PDFs are valid and contain text\n2. HF_TOKEN is correctly set in Space secrets\n3. Try again or contact support"
+        yield f"❌ Error: {str(e)}\n\nPlease check:\n1. PDFs are valid and contain text\n2. HF_TOKEN is correctly set in Space secrets\n3. Try again or contact support"
 
 # --- 3. The UI ---
 with gr.Blocks(title="AI Question Paper Generator") as demo:
@@ -303,8 +383,8 @@ with gr.Blocks(title="AI Question Paper Generator") as demo:
 
 if __name__ == "__main__":
     demo.queue(
-        max_size=20,  # Maximum queue size
-        default_concurrency_limit=2  # Allow 2 concurrent users
+        max_size=GRADIO_QUEUE_SIZE,  # Maximum queue size
+        default_concurrency_limit=GRADIO_CONCURRENCY  # Concurrent users (CPU work is capped by CPU_WORKERS)
     )
     demo.launch(
         show_error=True,
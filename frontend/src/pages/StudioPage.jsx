@@ -104,6 +104,11 @@ export default function StudioPage({ apiKey, analysisData, initialPattern, onNav
           allocation: analysisData.default_allocation,
           paper_pattern: currentPattern,
           priority_scores: analysisData.priority_scores,
+          section_allocation: analysisData.section_allocation,
+          draft_id: analysisData.draft_id,
+          // Pre-render the PDF (and refine the header) so the download is instant
+          prerender: true,
+          header_text_raw: headerDetails,
         }),
       });
 
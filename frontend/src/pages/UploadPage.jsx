@@ -1,4 +1,4 @@
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import Navbar from '../components/Navbar';
 
 const API_BASE = 'https://question-paper-generator-jg4p.onrender.com/api';
@@ -57,14 +57,26 @@ const TEMPLATES = {
 export default function UploadPage({ onNavigate, onAnalysisComplete, showLoader, hideLoader }) {
   const [syllabusText, setSyllabusText] = useState('');
   const [selectedTemplate, setSelectedTemplate] = useState('ese_mu');
+  const [knownSyllabi, setKnownSyllabi] = useState([]);
+  const [selectedSyllabus, setSelectedSyllabus] = useState('');
   const pyqRef = useRef(null);
   const refRef = useRef(null);
 
+  // Syllabi already parsed by the backend load instantly (no parsing on analyze)
+  useEffect(() => {
+    // Let the backend load its PDF/LLM libraries while the user picks files
+    fetch(`${API_BASE}/warmup`, { method: 'POST' }).catch(() => {});
+    fetch(`${API_BASE}/syllabi`)
+      .then((res) => res.json())
+      .then((data) => setKnownSyllabi(data.syllabi || []))
+      .catch(() => setKnownSyllabi([]));
+  }, []);
+
   const handleAnalyze = async () => {
     const pyqFiles = pyqRef.current?.files;
     const referenceFile = refRef.current?.files?.[0];
 
-    if (!syllabusText || !pyqFiles || pyqFiles.length === 0) {
+    if ((!syllabusText && !selectedSyllabus) || !pyqFiles || pyqFiles.length === 0) {
       alert('Please fill in Syllabus and at least one PYQ PDF.');
       return;
     }
@@ -74,12 +86,17 @@ export default function UploadPage({ onNavigate, onAnalysisComplete, showLoader,
     const formData = new FormData();
     formData.append('api_key', '');
     formData.append('syllabus_text', syllabusText);
+    if (selectedSyllabus) {
+      formData.append('syllabus_id', selectedSyllabus);
+    }
     for (let i = 0; i < pyqFiles.length; i++) {
       formData.append('pyq_files', pyqFiles[i]);
     }
     if (referenceFile) {
       formData.append('reference_file', referenceFile);
     }
+    // Draft the paper in the background while the user reviews the analysis
+    formData.append('speculative', selectedTemplate === 'auto' ? '1' : '0');
 
     try {
       const response = await fetch(`${API_BASE}/analyze`, {
@@ -167,15 +184,35 @@ export default function UploadPage({ onNavigate, onAnalysisComplete, showLoader,
             </div>
           )}
 
-          <div className="input-group">
-            <label>Syllabus Text</label>
-            <textarea
-              placeholder="Paste module-wise syllabus..."
-              className="glass-input"
-              value={syllabusText}
-              onChange={(e) => setSyllabusText(e.target.value)}
-            />
-          </div>
+          {knownSyllabi.length > 0 && (
+            <div className="input-group">
+              <label>Known Syllabus</label>
+              <select
+                className="glass-input"
+                value={selectedSyllabus}
+                onChange={(e) => setSelectedSyllabus(e.target.value)}
+              >
+                <option value="">Paste a new syllabus below</option>
+                {knownSyllabi.map((s) => (
+                  <option key={s.id} value={s.id}>
+                    {s.course_code || 'Untitled'}{s.course_title ? ` — ${s.course_title}` : ''} (v{s.version}, {s.topic_count} modules)
+                  </option>
+                ))}
+              </select>
+            </div>
+          )}
+
+          {!selectedSyllabus && (
+            <div className="input-group">
+              <label>Syllabus Text</label>
+              <textarea
+                placeholder="Paste module-wise syllabus..."
+                className="glass-input"
+                value={syllabusText}
+                onChange={(e) => setSyllabusText(e.target.value)}
+              />
+            </div>
+          )}
 
           <div className="file-drop-zone">
             <div className="input-group">
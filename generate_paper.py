@@ -1,9 +1,15 @@
-
 import os
 import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from groq import APITimeoutError, RateLimitError
+from backend.services.model_router import model_chain
 
 def extract_text_from_pdf(pdf_path):
     try:
@@ -16,11 +22,80 @@ def extract_text_from_pdf(pdf_path):
         print(f"Error reading {pdf_path}: {e}")
         return ""
 
+def timed_extract(pdf_path):
+    # Runs in a pool worker: the time is this PDF's own extraction, without queueing
+    start = time.perf_counter()
+    text = extract_text_from_pdf(pdf_path)
+    return text, time.perf_counter() - start
+
+def build_chain(api_key):
+    # Model tier for "generate" comes from the shared router (the original 70b model unless
+    # MODEL_ROUTES says otherwise), with a faster fallback on timeout/429
+    models = model_chain("generate", default="large")
+    llms = [ChatGroq(temperature=0.3, model_name=m, api_key=api_key, max_retries=2 if i == len(models) - 1 else 0)
+            for i, m in enumerate(models)]
+    llm = llms[0].with_fallbacks(llms[1:], exceptions_to_handle=(APITimeoutError, RateLimitError)) if len(llms) > 1 else llms[0]
+
+    # Define the prompt template
+    prompt_template = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert academician and question paper setter. Your task is to generate a comprehensive and balanced question paper based on the provided syllabus and reference from previous years' papers."),
+        ("human", """Generate a new question paper for the subject based on the following inputs:
+
+        **Syllabus Content:**
+        {syllabus}
+
+        **Previous Years' Question Papers (for pattern and difficulty reference):**
+        {previous_papers}
+
+        **Instructions:**
+        1. Follow the standard university format (e.g., Duration: 3 Hours, Max Marks: 80/100).
+        2. Ensure questions cover different cognitive levels (Recall, Understand, Apply, Analyze, Evaluate).
+        3. Divide the paper into appropriate sections (e.g., Q1: Compulsory short notes, Q2-Q6: Detailed questions with internal choices).
+        4. Do not copy questions directly from previous papers, but maintain a similar difficulty level and topic distribution.
+        5. Output the result in clean Markdown format.
+
+        Generate the Question Paper now:""")
+    ])
+
+    # Create the chain
+    return prompt_template | llm
+
+def combine_inputs(files_and_texts):
+    """
+    Splits extracted (filename, text) pairs into syllabus text and previous papers text.
+    """
+    syllabus_text = ""
+    previous_papers_text = ""
+    for filename, extracted_text in files_and_texts:
+        # Simple logic to distinguish syllabus from question papers
+        if "syllabus" in filename.lower():
+            syllabus_text += extracted_text
+        else:
+            previous_papers_text += f"--- START OF PAPER: {filename} ---\n"
+            previous_papers_text += extracted_text
+            previous_papers_text += f"--- END OF PAPER: {filename} ---\n"
+    return syllabus_text, previous_papers_text
+
+def chain_inputs(syllabus_text, previous_papers_text):
+    return {
+        "syllabus": syllabus_text[:20000],  # Truncating to avoid token limits
+        "previous_papers": previous_papers_text[:40000]
+    }
+
+def token_usage(response):
+    """
+    Prompt/completion token counts reported by Groq for one response.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return {"prompt_tokens": usage.get("input_tokens", 0), "completion_tokens": usage.get("output_tokens", 0)}
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage", {})
+    return {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+
 def main():
     # Define paths
     qa_folder = "QA"
-    syllabus_text = ""
-    previous_papers_text = ""
+    files_and_texts = []
 
     # Iterate through files in the QA folder
     if os.path.exists(qa_folder):
@@ -28,20 +103,14 @@ def main():
             file_path = os.path.join(qa_folder, filename)
             if filename.lower().endswith(".pdf"):
                 print(f"Processing: {filename}")
-                extracted_text = extract_text_from_pdf(file_path)
-                
-                # Simple logic to distinguish syllabus from question papers
+                files_and_texts.append((filename, extract_text_from_pdf(file_path)))
                 if "syllabus" in filename.lower():
-                    syllabus_text += extracted_text
                     print("  -> Identified as Syllabus")
-                else:
-                    previous_papers_text += f"--- START OF PAPER: {filename} ---\n"
-                    previous_papers_text += extracted_text
-                    previous_papers_text += f"--- END OF PAPER: {filename} ---\n"
     else:
         print(f"Directory '{qa_folder}' not found. Please ensure the folder exists.")
         return
 
+    syllabus_text, previous_papers_text = combine_inputs(files_and_texts)
     print(f"\nSyllabus Length: {len(syllabus_text)} characters")
     print(f"Previous Papers Length: {len(previous_papers_text)} characters")
 
@@ -51,53 +120,215 @@ def main():
         print("Error: GROQ_API_KEY environment variable not set.")
         return
 
-    llm = ChatGroq(
-        temperature=0.3,
-        model_name="llama-3.3-70b-versatile",
-        api_key=api_key
-    )
-
-    # Define the prompt template
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert academician and question paper setter. Your task is to generate a comprehensive and balanced question paper based on the provided syllabus and reference from previous years' papers."),
-        ("human", """Generate a new question paper for the subject based on the following inputs:
-
-        **Syllabus Content:**
-        {syllabus}
-
-        **Previous Years' Question Papers (for pattern and difficulty reference):**
-        {previous_papers}
-
-        **Instructions:**
-        1. Follow the standard university format (e.g., Duration: 3 Hours, Max Marks: 80/100).
-        2. Ensure questions cover different cognitive levels (Recall, Understand, Apply, Analyze, Evaluate).
-        3. Divide the paper into appropriate sections (e.g., Q1: Compulsory short notes, Q2-Q6: Detailed questions with internal choices).
-        4. Do not copy questions directly from previous papers, but maintain a similar difficulty level and topic distribution.
-        5. Output the result in clean Markdown format.
-        
-        Generate the Question Paper now:""")
-    ])
-
-    # Create the chain
-    chain = prompt_template | llm
+    chain = build_chain(api_key)
 
     print("Generating question paper...")
     try:
-        response = chain.invoke({
-            "syllabus": syllabus_text[:20000],  # Truncating to avoid token limits
-            "previous_papers": previous_papers_text[:40000]
-        })
-        
+        response = chain.invoke(chain_inputs(syllabus_text, previous_papers_text))
+
         generated_paper = response.content
         print("Generation Complete!")
-        
+
         output_file = "Generated_Question_Paper_Sample.md"
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(generated_paper)
         print(f"Question paper saved to {output_file}")
-        
+
     except Exception as e:
         print(f"Error during generation: {e}")
 
+# --- Batch mode ---
+
+def load_subjects(manifest=None, subjects_dir=None):
+    """
+    Returns [{"name": str, "files": [pdf paths]}].
+
+    manifest: JSON file, either {"subject": [pdf paths]} or
+              [{"name": ..., "files": [...]}]; relative paths are resolved against the manifest.
+    subjects_dir: one sub-directory per subject containing its syllabus and PYQ PDFs.
+    """
+    subjects = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{"name": name, "files": files} for name, files in data.items()]
+        for item in data:
+            files = [p if os.path.isabs(p) else os.path.join(base, p) for p in item["files"]]
+            subjects.append({"name": item["name"], "files": files})
+    else:
+        for name in sorted(os.listdir(subjects_dir)):
+            folder = os.path.join(subjects_dir, name)
+            if not os.path.isdir(folder):
+                continue
+            files = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.lower().endswith(".pdf")]
+            if files:
+                subjects.append({"name": name, "files": files})
+    return subjects
+
+class RateLimiter:
+    """
+    Async limiter allowing at most `rate_per_minute` request starts per minute,
+    spaced evenly so bursts don't trip the provider's 429s.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+def _checkpoint_path(output_dir, name):
+    return os.path.join(output_dir, ".checkpoints", f"{_safe_name(name)}.json")
+
+def read_checkpoint(output_dir, name):
+    try:
+        with open(_checkpoint_path(output_dir, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def write_checkpoint(output_dir, name, record):
+    path = _checkpoint_path(output_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+async def generate_subject(chain, subject, texts, output_dir, semaphore, limiter, retries=2):
+    """
+    Generates one subject's paper under the shared concurrency/rate limits and checkpoints the outcome.
+    """
+    name = subject["name"]
+    record = {"name": name, "status": "failed", "extract_seconds": subject["extract_seconds"]}
+    syllabus_text, previous_papers_text = combine_inputs(texts)
+    async with semaphore:
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            await limiter.wait()
+            try:
+                response = await chain.ainvoke(chain_inputs(syllabus_text, previous_papers_text))
+                output_file = os.path.join(output_dir, f"{_safe_name(name)}.md")
+                with open(output_file, "w", encoding="utf-8") as f:
+                    f.write(response.content)
+                record.update({"status": "done", "output": output_file, "error": None, **token_usage(response)})
+                break
+            except Exception as e:
+                record["error"] = str(e)
+                if attempt < retries:
+                    await asyncio.sleep(2 ** attempt)
+        record["generate_seconds"] = round(time.perf_counter() - start, 3)
+        record["attempts"] = attempt + 1
+    write_checkpoint(output_dir, name, record)
+    print(f"  [{record['status']}] {name} ({record['generate_seconds']}s)")
+    return record
+
+async def run_batch(subjects, output_dir, api_key, concurrency=4, rate_per_minute=30, workers=None):
+    """
+    Extracts every subject's PDFs in one shared process pool, then generates papers
+    with bounded async concurrency. Subjects with a "done" checkpoint are skipped.
+    Returns (records, wall seconds of the extraction or None).
+    """
+    records = []
+    pending = []
+    for subject in subjects:
+        checkpoint = read_checkpoint(output_dir, subject["name"])
+        if checkpoint and checkpoint.get("status") == "done" and os.path.exists(checkpoint.get("output", "")):
+            print(f"  [skip] {subject['name']} (checkpoint)")
+            records.append(checkpoint)
+        else:
+            pending.append(subject)
+    if not pending:
+        return records, None
+
+    # Extraction: all PDFs of all pending subjects through one process pool
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        jobs = [(s, path, loop.run_in_executor(pool, timed_extract, path))
+                for s in pending for path in s["files"]]
+        texts = {s["name"]: [] for s in pending}
+        extract_seconds = {s["name"]: 0.0 for s in pending}
+        for subject, path, job in jobs:
+            text, seconds = await job
+            texts[subject["name"]].append((os.path.basename(path), text))
+            extract_seconds[subject["name"]] += seconds
+        extract_wall_seconds = round(time.perf_counter() - start, 3)
+    print(f"Extracted {len(jobs)} PDFs for {len(pending)} subject(s) in {extract_wall_seconds}s")
+
+    chain = build_chain(api_key)
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_per_minute)
+    tasks = []
+    for subject in pending:
+        subject = dict(subject, extract_seconds=round(extract_seconds[subject["name"]], 3))
+        tasks.append(generate_subject(chain, subject, texts[subject["name"]], output_dir, semaphore, limiter))
+    records.extend(await asyncio.gather(*tasks))
+    return records, extract_wall_seconds
+
+def write_summary(records, output_dir, wall_seconds, extract_wall_seconds=None):
+    summary = {
+        "subjects": len(records),
+        "done": sum(1 for r in records if r.get("status") == "done"),
+        "failed": [r["name"] for r in records if r.get("status") != "done"],
+        "wall_seconds": round(wall_seconds, 3),
+        # Wall time of the shared extraction pool; per-subject extract_seconds is
+        # the extraction time of that subject's own PDFs
+        "extract_wall_seconds": extract_wall_seconds,
+        "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in records),
+        "completion_tokens": sum(r.get("completion_tokens", 0) for r in records),
+        "results": records,
+    }
+    path = os.path.join(output_dir, "summary.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return path, summary
+
+def batch_main(args):
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        print("Error: GROQ_API_KEY environment variable not set.")
+        return 1
+
+    subjects = load_subjects(args.manifest, args.subjects_dir)
+    if not subjects:
+        print("No subjects found.")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"Batch: {len(subjects)} subject(s) -> {args.output_dir}")
+    start = time.perf_counter()
+    records, extract_wall_seconds = asyncio.run(run_batch(subjects, args.output_dir, api_key, args.concurrency,
+                                                          args.rate, args.workers))
+    path, summary = write_summary(records, args.output_dir, time.perf_counter() - start, extract_wall_seconds)
+    print(f"Done {summary['done']}/{summary['subjects']} in {summary['wall_seconds']}s "
+          f"({summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens). Report: {path}")
+    return 0 if not summary["failed"] else 2
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate question papers (single QA folder, or batch over many subjects).")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--manifest", help="JSON manifest of subjects and their PDF files")
+    source.add_argument("--subjects-dir", help="Directory with one sub-directory of PDFs per subject")
+    parser.add_argument("--output-dir", default="generated_papers", help="Where papers, checkpoints and summary.json go")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max in-flight generation requests")
+    parser.add_argument("--rate", type=float, default=30, help="Max generation requests started per minute")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    cli_args = parser.parse_args()
+
+    if cli_args.manifest or cli_args.subjects_dir:
+        sys.exit(batch_main(cli_args))
     main()
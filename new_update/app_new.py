@@ -1,3 +1,5 @@
+import os
+import sys
 import streamlit as st
 import re
 from collections import defaultdict
@@ -5,6 +7,11 @@ from groq import Groq
 from langchain_community.document_loaders import PyPDFLoader
 from fpdf import FPDF
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.services.syllabus_parser import parse_syllabus_text
+from backend.services.pdf_fonts import family_for, setup_unicode_fonts
+from backend.services.topic_matcher import TopicMatcher
+
 # =====================================================
 # PAGE CONFIG
 # =====================================================
@@ -59,30 +66,8 @@ generate_button = st.sidebar.button("🚀 Generate Paper")
 
 def parse_and_clean_syllabus(raw_text):
 
-    topics = {}
-    lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
-
-    for i in range(len(lines) - 2):
-
-        # Pattern:
-        # Module number
-        # Topic
-        # Hours
-
-        if lines[i].isdigit():  # Module number
-
-            topic = lines[i + 1]
-            hrs_line = lines[i + 2]
-
-            if hrs_line.isdigit():
-
-                hours = int(hrs_line)
-
-                # Accept realistic hour range
-                if 4 <= hours <= 12 and len(topic) > 5:
-                    topics[topic] = hours
-
-    return topics
+    # Shared deterministic parser (same hour bounds as the backend)
+    return parse_syllabus_text(raw_text)["topics"]
 
 
 # =====================================================
@@ -133,11 +118,18 @@ def allocate_questions(priority_scores, total_q):
 def generate_pdf(text):
 
     pdf = FPDF()
+    # Embedded Unicode font when one is installed, so LLM output (dashes, quotes,
+    # math symbols) is kept; otherwise core Arial, which only takes latin-1
+    unicode_text = setup_unicode_fonts(pdf)
     pdf.set_auto_page_break(auto=True, margin=10)
     pdf.add_page()
     pdf.set_font("Arial", size=11)
 
     for line in text.split("\n"):
+        if unicode_text:
+            pdf.set_font(family_for(line), size=11)
+        else:
+            line = line.encode("latin-1", "replace").decode("latin-1")
         pdf.multi_cell(0, 8, line)
 
     return pdf.output(dest="S").encode("latin-1")
@@ -178,6 +170,8 @@ if generate_button:
     # Phase 2: Analyse PYQs
     # -----------------------------
     frequency = defaultdict(int)
+    # Maps the model's labels back to syllabus topics (near-misses included)
+    matcher = TopicMatcher(syllabus_topics)
 
     with st.spinner("📄 Analysing Previous Year Papers..."):
         for pdf in pyq_pdfs:
@@ -206,13 +200,15 @@ Respond ONLY with topic name.
                         max_tokens=50
                     )
 
-                    topic = response.choices[0].message.content.strip()
+                    topic = matcher.resolve(response.choices[0].message.content.strip())
 
-                    if topic in syllabus_topics:
+                    if topic:
                         frequency[topic] += 1
 
     st.subheader("📊 PYQ Frequency")
     st.json(frequency)
+    stats = matcher.stats
+    st.caption(f"Topic labels: {stats['exact']} exact, {stats['fuzzy']} fuzzy, {stats['unresolved']} unresolved")
 
     # -----------------------------
     # Phase 3: Compute Priority
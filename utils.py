@@ -2,10 +2,26 @@
 import os
 import re
 import json
-import fitz  # PyMuPDF
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from collections import Counter
+from groq import APITimeoutError, RateLimitError
+from backend.services.model_router import model_chain
+from backend.services.pdf_ocr import page_texts
+from backend.services.syllabus_parser import DEFAULT_MIN_CONFIDENCE, parse_syllabus_pdf, parse_syllabus_text
+
+def routed_llm(task, api_key, temperature=0):
+    """
+    ChatGroq for the model tier routed to `task` (see backend/services/model_router.py),
+    falling back to the next tier on timeout or rate limiting.
+    """
+    models = model_chain(task, default="large")  # the Streamlit app's original 70b model
+    llms = [ChatGroq(temperature=temperature, model_name=m, api_key=api_key,
+                     max_retries=2 if i == len(models) - 1 else 0)
+            for i, m in enumerate(models)]
+    if len(llms) == 1:
+        return llms[0]
+    return llms[0].with_fallbacks(llms[1:], exceptions_to_handle=(APITimeoutError, RateLimitError))
 
 # --- 1. Text Extraction (OCR / PDF Reading) ---
 
@@ -13,35 +29,37 @@ def extract_text_from_pdf(pdf_file, api_key=None, use_ocr_fallback=False) -> str
     """
     Extracts text from a PDF file using PyMuPDF (fitz).
     More robust than PyPDF2 for complex layouts and fonts.
+    With `use_ocr_fallback`, scanned (image-only) pages are read with Tesseract
+    (see backend/services/pdf_ocr.py); pages with a text layer never pay for OCR.
     """
     try:
         # Check if file pointer or bytes (Streamlit UploadedFile)
         if hasattr(pdf_file, "read"):
             pdf_file.seek(0)
-            file_bytes = pdf_file.read()
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
+            source = pdf_file.read()
         else:
-            doc = fitz.open(pdf_file)
-            
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text() + "\n"
-            
-        return full_text
+            source = pdf_file
+
+        pages, stats = page_texts(source, ocr=use_ocr_fallback)
+        if stats["needs_ocr"]:
+            print(f"OCR fallback: {stats['needs_ocr']} scanned page(s) of {stats['pages']}, "
+                  f"{stats['cached']} cached, {stats['ocr']} read, {stats['failed']} unread")
+        return "".join(text + "\n" for text in pages)
     except Exception as e:
         return f"Error reading PDF: {e}"
 
 # --- 2. Pattern Extraction (LLM Based) ---
 
-def extract_pattern_from_text(text: str, api_key: str) -> str:
+def extract_pattern_from_text(text: str, api_key: str, llm=None) -> str:
     """
     Uses Groq to analyze the sample paper text and extract the exam structure.
     Returns a markdown description of the pattern.
+    `llm` is a prebuilt routed_llm("pattern", ...) to reuse instead of building one.
     """
     if not api_key:
         return "Error: API Key missing."
 
-    llm = ChatGroq(temperature=0, model_name="llama-3.3-70b-versatile", api_key=api_key)
+    llm = llm or routed_llm("pattern", api_key)
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an expert exam analyzer."),
@@ -70,19 +88,28 @@ def extract_pattern_from_text(text: str, api_key: str) -> str:
 
 # --- 3. Syllabus Parsing ---
 
-def parse_syllabus_modules(text: str, api_key: str = None) -> dict:
+def parse_syllabus_modules(text: str, api_key: str = None, pdf_file=None, llm=None, fallback=True) -> dict:
     """
     Parses syllabus text to find 'Module: Hours' mapping.
-    1. Tries Groq LLM first (smart, handles any syllabus format).
-    2. Falls back to Regex if LLM fails or no api_key is provided.
+    1. Tries the shared deterministic parser (no LLM call for well-formed syllabi),
+       using the table geometry of `pdf_file` when it is provided.
+    2. Uses Groq LLM when the local parse has low confidence.
+    3. Falls back to the local result if LLM fails or no api_key is provided.
+    `llm` is a prebuilt routed_llm("syllabus_parse", ...) to reuse.
+    With fallback=False, step 3 raises RuntimeError instead, so callers can avoid
+    caching a result that a working API key would improve.
     """
-    modules = {}
+    local = parse_syllabus_text(text)
+    if pdf_file is not None:
+        local = max(parse_syllabus_pdf(pdf_file), local, key=lambda r: r["confidence"])
+    if local["topics"] and local["confidence"] >= DEFAULT_MIN_CONFIDENCE:
+        return local["topics"]
 
-    # 1. Groq-based parsing (primary, if api_key provided)
-    # Uses llama-3.3-70b-versatile for higher accuracy in the Streamlit app context.
+    # 2. Groq-based parsing (if api_key provided)
+    # Routed to the "syllabus_parse" tier (the large model by default) for accuracy.
     if api_key:
         try:
-            llm = ChatGroq(temperature=0, model_name="llama-3.3-70b-versatile", api_key=api_key)
+            llm = llm or routed_llm("syllabus_parse", api_key)
             prompt = ChatPromptTemplate.from_messages([
                 ("system", "You are a precise data extraction assistant."),
                 ("human", """Analyze the Syllabus Text below and extract the **Module Names** and their **Teaching Hours**.
@@ -115,21 +142,12 @@ def parse_syllabus_modules(text: str, api_key: str = None) -> dict:
             if modules:
                 return modules
         except Exception as e:
-            print(f"Groq Syllabus Parsing failed: {e}. Falling back to regex.")
-
-    # 2. Regex fallback
-    lines = text.split('\n')
-    for line in lines:
-        match = re.search(r'(\d+)\s*(?:Hours|Hrs)', line, re.IGNORECASE)
-        if match:
-            hours = int(match.group(1))
-            topic_part = line[:match.start()].strip()
-            topic_name = re.sub(r'^[\d\.\s]+', '', topic_part)
-
-            if len(topic_name) > 3 and hours > 0:
-                modules[topic_name] = hours
+            print(f"Groq Syllabus Parsing failed: {e}. Falling back to local parse.")
 
-    return modules
+    # 3. Local fallback
+    if not fallback:
+        raise RuntimeError("Syllabus needs the LLM parse, which failed or had no API key")
+    return local["topics"]
 
 # --- 4. Weightage Calculation ---
 
@@ -173,23 +191,15 @@ def calculate_topic_weights(syllabus_modules: dict, pyq_text: str) -> dict:
 
 # --- 5. Question Paper Generation ---
 
-def generate_question_paper(
-    pattern_description: str,
-    weighted_topics: dict,
-    syllabus_text: str,
-    api_key: str
-) -> str:
+def _paper_chain(pattern_description, weighted_topics, syllabus_text, api_key, llm=None):
     """
-    Generates the final question paper.
+    (chain, inputs) for generating the question paper.
     """
-    if not api_key:
-        return "Error: API Key missing."
-        
     # Prepare High Priority Topics String
     sorted_topics = sorted(weighted_topics.items(), key=lambda x: x[1], reverse=True)
     top_topics_str = "\n".join([f"- {t[0]} (Weight: {t[1]:.2f})" for t in sorted_topics[:5]])
 
-    llm = ChatGroq(temperature=0.5, model_name="llama-3.3-70b-versatile", api_key=api_key)
+    llm = llm or routed_llm("generate", api_key, temperature=0.5)
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an expert academic question paper setter."),
@@ -211,13 +221,55 @@ def generate_question_paper(
         """)
     ])
     
-    chain = prompt | llm
+    inputs = {
+        "pattern": pattern_description,
+        "top_topics": top_topics_str,
+        "syllabus_snippet": syllabus_text[:10000] # Truncate
+    }
+    return prompt | llm, inputs
+
+def stream_question_paper(
+    pattern_description: str,
+    weighted_topics: dict,
+    syllabus_text: str,
+    api_key: str,
+    llm=None
+):
+    """
+    Yields the question paper in chunks as the model produces them (for st.write_stream).
+    Errors are yielded as text, after whatever was already generated.
+    """
+    if not api_key:
+        yield "Error: API Key missing."
+        return
+
+    chain, inputs = _paper_chain(pattern_description, weighted_topics, syllabus_text, api_key, llm)
+    streamed = False
+    try:
+        for chunk in chain.stream(inputs):
+            if chunk.content:
+                streamed = True
+                yield chunk.content
+    except Exception as e:
+        yield f"{chr(10) * 2 if streamed else ''}Error generating paper: {e}"
+
+def generate_question_paper(
+    pattern_description: str,
+    weighted_topics: dict,
+    syllabus_text: str,
+    api_key: str,
+    llm=None
+) -> str:
+    """
+    Generates the final question paper.
+    `llm` is a prebuilt routed_llm("generate", ..., temperature=0.5) to reuse.
+    """
+    if not api_key:
+        return "Error: API Key missing."
+
+    chain, inputs = _paper_chain(pattern_description, weighted_topics, syllabus_text, api_key, llm)
     try:
-        response = chain.invoke({
-            "pattern": pattern_description,
-            "top_topics": top_topics_str,
-            "syllabus_snippet": syllabus_text[:10000] # Truncate
-        })
+        response = chain.invoke(inputs)
         return response.content
     except Exception as e:
         return f"Error generating paper: {e}"